@@ -25,7 +25,9 @@ import app.usecases.performance
 import app.utils
 from app.logging import Ansi
 from app.logging import log
+from app.objects.player import Player
 from app.packets import BanchoPacketReader
+from app.packets import ClientPackets
 from .packets import aeris, osu, common
 
 OSU_API_V2_CHANGELOG_URL = "https://osu.ppy.sh/api/v2/changelog"
@@ -41,6 +43,39 @@ if (app.settings.CHEAT_SERVER):
 router = APIRouter(tags=["Bancho API"])
 
 
+# the packet ids we know of; others are tagged as "other" in metrics,
+# since they (& client versions) are chosen by the client.
+KNOWN_PACKET_IDS = frozenset(ClientPackets)
+
+
+def record_unhandled_packets(player: Player, packet_ids: list[int]) -> None:
+    """Count packets we had no handler for, per client version."""
+    if player.client_details is not None:
+        osu_version = str(player.client_details.osu_version)
+        osu_stream = player.client_details.osu_version.stream.value
+    else:
+        osu_version = osu_stream = "unknown"
+
+    all_packets = app.state.packet_tables["all"]
+
+    for packet_id in packet_ids:
+        if packet_id < len(all_packets) and all_packets[packet_id] is not None:
+            continue  # handled, but not for restricted players
+
+        app.state.unhandled_packets[(osu_version, packet_id)] += 1
+
+        if app.state.services.datadog:
+            if packet_id in KNOWN_PACKET_IDS:
+                packet_id_tag = str(packet_id)
+            else:
+                packet_id_tag = "other"
+
+            app.state.services.datadog.increment(
+                "bancho.unhandled_packets",
+                tags=[f"osu_stream:{osu_stream}", f"packet_id:{packet_id_tag}"],
+            )
+
+
 @router.get("/")
 async def bancho_http_handler() -> Response:
     """Handle a request from a web browser."""
@@ -149,17 +184,25 @@ async def bancho_handler(
     ip = app.state.services.ip_resolver.get_ip(request.headers)
 
     if osu_token is None:
-        # the client is performing a login
-        async with app.state.services.database.connection() as db_conn:
-            request._body = await request.body()
-            log(f"Login request from {ip}.\nRequest Body: {request._body}", Ansi.LCYAN, file=".data/logs/login.log")
-            login_data = await osu.login(
-                request.headers,
-                request._body,
-                ip,
-                db_conn,
+        # the client is performing a login; if too many are
+        # already in progress, ask them to reconnect later.
+        login_admission = app.state.services.login_admission
+        if not await login_admission.admit():
+            return Response(
+                content=app.packets.restart_server(login_admission.reconnect_delay()),
+                headers={"cho-token": "login-deferred"},
             )
 
+        # XXX: no connection is held for the login; its queries
+        # each take one from the pool (some of them concurrently).
+        request._body = await request.body()
+        log(f"Login request from {ip}.\nRequest Body: {request._body}", Ansi.LCYAN, file=".data/logs/login.log")
+        login_data = await osu.login(
+            request.headers,
+            request._body,
+            ip,
+        )
+
         return Response(
             content=login_data["response_body"],
             headers={"cho-token": login_data["osu_token"]},
@@ -169,20 +212,22 @@ async def bancho_handler(
     player = app.state.sessions.players.get(token=osu_token)
 
     if not player:
-        # chances are, we just restarted the server
-        # tell their client to reconnect immediately.
+        # chances are, we just restarted the server; tell their client to
+        # reconnect, spreading the reconnects of all clients out over time.
         return Response(
             content=(
                 app.packets.notification("Server has restarted.")
-                + app.packets.restart_server(0)  # ms until reconnection
+                + app.packets.restart_server(  # ms until reconnection
+                    app.state.services.login_admission.reconnect_delay(),
+                )
             ),
         )
 
     if player.restricted:
         # restricted users may only use certain packet handlers.
-        packet_map = app.state.packets["restricted"]
+        packet_table = app.state.packet_tables["restricted"]
     else:
-        packet_map = app.state.packets["all"]
+        packet_table = app.state.packet_tables["all"]
 
     # bancho connections can be comprised of multiple packets;
     # our reader is designed to iterate through them individually,
@@ -192,10 +237,26 @@ async def bancho_handler(
     with memoryview(await request.body()) as body_view:
         if app.settings.DEBUG and app.settings.DEBUG_REQUESTS:
             log(f"Packet from {player}: {body_view}", Ansi.GRAY, file=".data/logs/packets.log")
-        for packet in BanchoPacketReader(body_view, packet_map):
+        reader = BanchoPacketReader(body_view, packet_table)
+        for packet in reader:
             await packet.handle(player)
 
+    if reader.unhandled:
+        record_unhandled_packets(player, reader.unhandled)
+
     player.last_recv_time = time.time()
 
+    if player.queue_overflowed:
+        # the client fell too far behind for us to catch them up;
+        # log them out, and have them reconnect to get a fresh state.
+        player.logout()
+
+        return Response(
+            content=(
+                app.packets.notification("You have been resynced with the server.")
+                + app.packets.restart_server(0)  # ms until reconnection
+            ),
+        )
+
     response_data = player.dequeue()
     return Response(content=response_data)
\ No newline at end of file
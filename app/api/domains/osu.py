@@ -23,7 +23,6 @@ from typing import Optional
 from urllib.parse import unquote
 from urllib.parse import unquote_plus
 
-import bcrypt
 from fastapi import status
 from fastapi.datastructures import FormData
 from fastapi.datastructures import UploadFile
@@ -64,6 +63,8 @@ from app.objects import models
 from app.objects.beatmap import Beatmap
 from app.objects.beatmap import ensure_local_osu_file
 from app.objects.beatmap import RankedStatus
+from app.objects.leaderboard_cache import CachedLeaderboard
+from app.objects.leaderboard_cache import LeaderboardKey
 from app.objects.player import Player
 from app.objects.score import Grade
 from app.objects.score import Score
@@ -74,6 +75,11 @@ from app.repositories import scores as scores_repo
 from app.repositories import stats as stats_repo
 from app.repositories.achievements import Achievement
 from app.usecases import achievements as achievements_usecases
+from app.usecases import map_leaderboards as map_leaderboards_usecases
+from app.usecases import passwords as passwords_usecases
+from app.usecases import score_checksums as score_checksums_usecases
+from app.usecases import score_jobs as score_jobs_usecases
+from app.usecases import top_scores as top_scores_usecases
 from app.usecases import user_achievements as user_achievements_usecases
 from app.utils import escape_enum
 from app.utils import pymysql_encode
@@ -808,15 +814,12 @@ if app.settings.CHEAT_SERVER:
         if score.mode != score.player.status.mode:
             score.player.status.mods = score.mods
             score.player.status.mode = score.mode
+            score.player.invalidate_stats()
     
-            if not score.player.restricted:
-                app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.broadcast_stats(score.player)
     
         # stop here if this is a duplicate score
-        if await app.state.services.database.fetch_one(
-            "SELECT 1 FROM scores WHERE online_checksum = :checksum",
-            {"checksum": score.client_checksum},
-        ):
+        if await score_checksums_usecases.is_duplicate(score.client_checksum):
             log(f"{score.player} submitted a duplicate score.", Ansi.LYELLOW)
             return Response(b"error: no")
     
@@ -895,8 +898,6 @@ if app.settings.CHEAT_SERVER:
                 )
     
                 if score.rank == 1 and not score.player.restricted:
-                    announce_chan = app.state.sessions.channels.get_by_name("#announce")
-    
                     ann = [
                         f"\x01ACTION achieved #1 on {score.bmap.embed}",
                         f"with {score.acc:.2f}% for {performance}.",
@@ -905,31 +906,12 @@ if app.settings.CHEAT_SERVER:
                     if score.mods:
                         ann.insert(1, f"+{score.mods!r}")
     
-                    scoring_metric = "pp" if score.mode >= GameMode.RELAX_OSU else "score"
-    
-                    # If there was previously a score on the map, add old #1.
-                    prev_n1 = await app.state.services.database.fetch_one(
-                        "SELECT u.id, name FROM users u "
-                        "INNER JOIN scores s ON u.id = s.userid "
-                        "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-                        "AND s.status = 2 AND u.priv & 1 "
-                        f"ORDER BY s.{scoring_metric} DESC LIMIT 1",
-                        {"map_md5": score.bmap.md5, "mode": score.mode},
+                    # the previous #1 is found (& announced) in the background.
+                    await score_jobs_usecases.enqueue_first_place_announcement(
+                        score,
+                        " ".join(ann),
                     )
     
-                    if prev_n1:
-                        if score.player.id != prev_n1["id"]:
-                            ann.append(
-                                f"(Previous #1: [https://{app.settings.DOMAIN}/u/"
-                                "{id} {name}])".format(
-                                    id=prev_n1["id"],
-                                    name=prev_n1["name"],
-                                ),
-                            )
-    
-                    assert announce_chan is not None
-                    announce_chan.send(" ".join(ann), sender=score.player, to_self=True)
-    
             # this score is our best score.
             # update any preexisting personal best
             # records with SubmissionStatus.SUBMITTED.
@@ -977,6 +959,23 @@ if app.settings.CHEAT_SERVER:
                 "checksum": score.client_checksum,
             },
         )
+        score_checksums_usecases.add(score.client_checksum)
+
+        if score.status == SubmissionStatus.BEST:
+            # the map's leaderboards have changed.
+            app.state.cache.leaderboards.invalidate(score.bmap.md5)
+
+            if not score.player.restricted:
+                await map_leaderboards_usecases.add_best(
+                    score.bmap.md5,
+                    score.mode,
+                    score.player.id,
+                    (
+                        round(score.pp, 3)  # (as stored in sql)
+                        if score.mode >= GameMode.RELAX_OSU
+                        else score.score
+                    ),
+                )
     
         if score.passed:
             replay_data = await replay_file.read()
@@ -1063,34 +1062,19 @@ if app.settings.CHEAT_SERVER:
                 stats.rscore += additional_rscore
                 stats_updates["rscore"] = stats.rscore
     
-                # fetch scores sorted by pp for total acc/pp calc
-                # NOTE: we select all plays (and not just top100)
-                # because bonus pp counts the total amount of ranked
-                # scores. I'm aware this scales horribly, and it'll
-                # likely be split into two queries in the future.
-                best_scores = await app.state.services.database.fetch_all(
-                    "SELECT s.pp, s.acc FROM scores s "
-                    "INNER JOIN maps m ON s.map_md5 = m.md5 "
-                    "WHERE s.userid = :user_id AND s.mode = :mode "
-                    "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-                    "ORDER BY s.pp DESC",
-                    {"user_id": score.player.id, "mode": score.mode},
-                )
-    
-                # calculate new total weighted accuracy
-                weighted_acc = sum(
-                    row["acc"] * 0.95**i for i, row in enumerate(best_scores)
+                # update the player's top scores with the new best, &
+                # recalculate their total weighted acc & pp from them.
+                assert score.id is not None  # (inserted above)
+                top_scores = await top_scores_usecases.add_best(
+                    user_id=score.player.id,
+                    mode=score.mode,
+                    score_id=score.id,
+                    pp=score.pp,
+                    acc=score.acc,
+                    prev_best_id=score.prev_best.id if score.prev_best else None,
                 )
-                bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
-                stats.acc = (weighted_acc * bonus_acc) / 100
+                stats.acc, stats.pp = top_scores.stats
                 stats_updates["acc"] = stats.acc
-    
-                # calculate new total weighted pp
-                weighted_pp = sum(
-                    row["pp"] * 0.95**i for i, row in enumerate(best_scores)
-                )
-                bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
-                stats.pp = round(weighted_pp + bonus_pp)
                 stats_updates["pp"] = stats.pp
     
                 # update global & country ranking
@@ -1114,23 +1098,18 @@ if app.settings.CHEAT_SERVER:
             pp=stats_updates.get("pp", UNSET),
         )
     
+        score.player.invalidate_stats()
+    
         if not score.player.restricted:
             # enqueue new stats info to all other users
-            app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.broadcast_stats(score.player)
     
             # update beatmap with new stats
             score.bmap.plays += 1
             if score.passed:
                 score.bmap.passes += 1
     
-            await app.state.services.database.execute(
-                "UPDATE maps SET plays = :plays, passes = :passes WHERE md5 = :map_md5",
-                {
-                    "plays": score.bmap.plays,
-                    "passes": score.bmap.passes,
-                    "map_md5": score.bmap.md5,
-                },
-            )
+            await score_jobs_usecases.enqueue_map_plays_update(score.bmap, score)
     
         # update their recent score
         score.player.recent_scores[score.mode] = score
@@ -1167,6 +1146,8 @@ if app.settings.CHEAT_SERVER:
                     
                     achievement_condition = server_achievement["cond"]
                     if achievement_condition(score, score.mode.as_vanilla):
+                        # saved immediately (not by a job), so the player's
+                        # next submission can't unlock it a second time.
                         await user_achievements_usecases.create(
                             score.player.id,
                             server_achievement["id"],
@@ -1249,13 +1230,9 @@ if app.settings.CHEAT_SERVER:
                 if (score.status == 2) or (score.status > 0 and score.id and score.id != 0):
                     if app.settings.DEBUG and app.settings.DEBUG_SCORES:
                         log(f"Score ID: {score.id}")
-                    await app.state.services.database.execute(
-                        "INSERT INTO scoreinfo (scoreid, cheat_values) "
-                        "VALUES (:scoreid, :cheat_values)",
-                        {
-                            "scoreid": score.id,
-                            "cheat_values": cheat_values_str,
-                        },
+                    await score_jobs_usecases.enqueue_cheat_values_save(
+                        score,
+                        cheat_values_str,
                     )
         log(
             f"[{score.mode!r}] {score.player} submitted a score! "
@@ -1436,15 +1413,12 @@ else:
         if score.mode != score.player.status.mode:
             score.player.status.mods = score.mods
             score.player.status.mode = score.mode
+            score.player.invalidate_stats()
     
-            if not score.player.restricted:
-                app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.broadcast_stats(score.player)
     
         # stop here if this is a duplicate score
-        if await app.state.services.database.fetch_one(
-            "SELECT 1 FROM scores WHERE online_checksum = :checksum",
-            {"checksum": score.client_checksum},
-        ):
+        if await score_checksums_usecases.is_duplicate(score.client_checksum):
             log(f"{score.player} submitted a duplicate score.", Ansi.LYELLOW)
             return Response(b"error: no")
     
@@ -1523,8 +1497,6 @@ else:
                 )
     
                 if score.rank == 1 and not score.player.restricted:
-                    announce_chan = app.state.sessions.channels.get_by_name("#announce")
-    
                     ann = [
                         f"\x01ACTION achieved #1 on {score.bmap.embed}",
                         f"with {score.acc:.2f}% for {performance}.",
@@ -1533,31 +1505,12 @@ else:
                     if score.mods:
                         ann.insert(1, f"+{score.mods!r}")
     
-                    scoring_metric = "pp" if score.mode >= GameMode.RELAX_OSU else "score"
-    
-                    # If there was previously a score on the map, add old #1.
-                    prev_n1 = await app.state.services.database.fetch_one(
-                        "SELECT u.id, name FROM users u "
-                        "INNER JOIN scores s ON u.id = s.userid "
-                        "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-                        "AND s.status = 2 AND u.priv & 1 "
-                        f"ORDER BY s.{scoring_metric} DESC LIMIT 1",
-                        {"map_md5": score.bmap.md5, "mode": score.mode},
+                    # the previous #1 is found (& announced) in the background.
+                    await score_jobs_usecases.enqueue_first_place_announcement(
+                        score,
+                        " ".join(ann),
                     )
     
-                    if prev_n1:
-                        if score.player.id != prev_n1["id"]:
-                            ann.append(
-                                f"(Previous #1: [https://{app.settings.DOMAIN}/u/"
-                                "{id} {name}])".format(
-                                    id=prev_n1["id"],
-                                    name=prev_n1["name"],
-                                ),
-                            )
-    
-                    assert announce_chan is not None
-                    announce_chan.send(" ".join(ann), sender=score.player, to_self=True)
-    
             # this score is our best score.
             # update any preexisting personal best
             # records with SubmissionStatus.SUBMITTED.
@@ -1605,6 +1558,23 @@ else:
                 "checksum": score.client_checksum,
             },
         )
+        score_checksums_usecases.add(score.client_checksum)
+
+        if score.status == SubmissionStatus.BEST:
+            # the map's leaderboards have changed.
+            app.state.cache.leaderboards.invalidate(score.bmap.md5)
+
+            if not score.player.restricted:
+                await map_leaderboards_usecases.add_best(
+                    score.bmap.md5,
+                    score.mode,
+                    score.player.id,
+                    (
+                        round(score.pp, 3)  # (as stored in sql)
+                        if score.mode >= GameMode.RELAX_OSU
+                        else score.score
+                    ),
+                )
     
         if score.passed:
             replay_data = await replay_file.read()
@@ -1691,34 +1661,19 @@ else:
                 stats.rscore += additional_rscore
                 stats_updates["rscore"] = stats.rscore
     
-                # fetch scores sorted by pp for total acc/pp calc
-                # NOTE: we select all plays (and not just top100)
-                # because bonus pp counts the total amount of ranked
-                # scores. I'm aware this scales horribly, and it'll
-                # likely be split into two queries in the future.
-                best_scores = await app.state.services.database.fetch_all(
-                    "SELECT s.pp, s.acc FROM scores s "
-                    "INNER JOIN maps m ON s.map_md5 = m.md5 "
-                    "WHERE s.userid = :user_id AND s.mode = :mode "
-                    "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-                    "ORDER BY s.pp DESC",
-                    {"user_id": score.player.id, "mode": score.mode},
+                # update the player's top scores with the new best, &
+                # recalculate their total weighted acc & pp from them.
+                assert score.id is not None  # (inserted above)
+                top_scores = await top_scores_usecases.add_best(
+                    user_id=score.player.id,
+                    mode=score.mode,
+                    score_id=score.id,
+                    pp=score.pp,
+                    acc=score.acc,
+                    prev_best_id=score.prev_best.id if score.prev_best else None,
                 )
-    
-                # calculate new total weighted accuracy
-                weighted_acc = sum(
-                    row["acc"] * 0.95**i for i, row in enumerate(best_scores)
-                )
-                bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
-                stats.acc = (weighted_acc * bonus_acc) / 100
+                stats.acc, stats.pp = top_scores.stats
                 stats_updates["acc"] = stats.acc
-    
-                # calculate new total weighted pp
-                weighted_pp = sum(
-                    row["pp"] * 0.95**i for i, row in enumerate(best_scores)
-                )
-                bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
-                stats.pp = round(weighted_pp + bonus_pp)
                 stats_updates["pp"] = stats.pp
     
                 # update global & country ranking
@@ -1742,23 +1697,18 @@ else:
             pp=stats_updates.get("pp", UNSET),
         )
     
+        score.player.invalidate_stats()
+    
         if not score.player.restricted:
             # enqueue new stats info to all other users
-            app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.broadcast_stats(score.player)
     
             # update beatmap with new stats
             score.bmap.plays += 1
             if score.passed:
                 score.bmap.passes += 1
     
-            await app.state.services.database.execute(
-                "UPDATE maps SET plays = :plays, passes = :passes WHERE md5 = :map_md5",
-                {
-                    "plays": score.bmap.plays,
-                    "passes": score.bmap.passes,
-                    "map_md5": score.bmap.md5,
-                },
-            )
+            await score_jobs_usecases.enqueue_map_plays_update(score.bmap, score)
     
         # update their recent score
         score.player.recent_scores[score.mode] = score
@@ -1795,6 +1745,8 @@ else:
                     
                     achievement_condition = server_achievement["cond"]
                     if achievement_condition(score, score.mode.as_vanilla):
+                        # saved immediately (not by a job), so the player's
+                        # next submission can't unlock it a second time.
                         await user_achievements_usecases.create(
                             score.player.id,
                             server_achievement["id"],
@@ -1877,13 +1829,9 @@ else:
                 if (score.status == 2) or (score.status > 0 and score.id and score.id != 0):
                     if app.settings.DEBUG and app.settings.DEBUG_SCORES:
                         log(f"Score ID: {score.id}")
-                    await app.state.services.database.execute(
-                        "INSERT INTO scoreinfo (scoreid, cheat_values) "
-                        "VALUES (:scoreid, :cheat_values)",
-                        {
-                            "scoreid": score.id,
-                            "cheat_values": cheat_values_str,
-                        },
+                    await score_jobs_usecases.enqueue_cheat_values_save(
+                        score,
+                        cheat_values_str,
                     )
         log(
             f"[{score.mode!r}] {score.player} submitted a score! "
@@ -1993,14 +1941,42 @@ class LeaderboardType(IntEnum):
     Country = 4
 
 
-async def get_leaderboard_scores(
+SCORE_LISTING_FMTSTR = (
+    "{id}|{name}|{score}|{max_combo}|"
+    "{n50}|{n100}|{n300}|{nmiss}|{nkatu}|{ngeki}|"
+    "{perfect}|{mods}|{userid}|{rank}|{time}|{has_replay}"
+)
+
+
+def _leaderboard_cache_key(
+    leaderboard_type: LeaderboardType | int,
+    mode: int,
+    mods: Mods,
+    player: Player,
+) -> LeaderboardKey | None:
+    """Return the key of a leaderboard in the cache, if it can be cached."""
+    if player.restricted:
+        # restricted players see their own scores on leaderboards.
+        return None
+
+    if leaderboard_type == LeaderboardType.Mods:
+        return (mode, LeaderboardType.Mods, int(mods), "")
+    elif leaderboard_type == LeaderboardType.Friends:
+        return None  # (specific to the player)
+    elif leaderboard_type == LeaderboardType.Country:
+        return (mode, LeaderboardType.Country, 0, player.geoloc["country"]["acronym"])
+    else:  # local & top leaderboards are the same
+        return (mode, LeaderboardType.Top, 0, "")
+
+
+async def _fetch_leaderboard_score_rows(
     leaderboard_type: LeaderboardType | int,
     map_md5: str,
     mode: int,
     mods: Mods,
     player: Player,
     scoring_metric: Literal["pp", "score"],
-) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
+) -> list[dict[str, Any]]:
     query = [
         f"SELECT s.id, s.{scoring_metric} AS _score, "
         "s.max_combo, s.n50, s.n100, s.n300, "
@@ -2033,7 +2009,7 @@ async def get_leaderboard_scores(
     # TODO: customizability of the number of scores
     query.append("ORDER BY _score DESC LIMIT 50")
 
-    score_rows = [
+    return [
         dict(r._mapping)
         for r in await app.state.services.database.fetch_all(
             " ".join(query),
@@ -2041,54 +2017,143 @@ async def get_leaderboard_scores(
         )
     ]
 
-    if score_rows:  # None or []
-        # fetch player's personal best score
-        personal_best_score_rec = await app.state.services.database.fetch_one(
-            f"SELECT id, {scoring_metric} AS _score, "
-            "max_combo, n50, n100, n300, "
-            "nmiss, nkatu, ngeki, perfect, mods, "
-            "UNIX_TIMESTAMP(play_time) time "
-            "FROM scores "
-            "WHERE map_md5 = :map_md5 AND mode = :mode "
-            "AND userid = :user_id AND status = 2 "
-            "ORDER BY _score DESC LIMIT 1",
-            {"map_md5": map_md5, "mode": mode, "user_id": player.id},
-        )
 
-        if personal_best_score_rec is not None:
-            personal_best_score_row = dict(personal_best_score_rec._mapping)
+def _personal_best_score_row_from_cache(
+    map_md5: str,
+    mode: int,
+    player: Player,
+) -> dict[str, Any] | None:
+    """\
+    Find the player's personal best score & its rank on the map's
+    cached top leaderboard, if it's cached & they're on it.
+    """
+    if player.restricted:
+        return None
 
-            # calculate the rank of the score.
-            p_best_rank = 1 + await app.state.services.database.fetch_val(
-                "SELECT COUNT(*) FROM scores s "
-                "INNER JOIN users u ON u.id = s.userid "
-                "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-                "AND s.status = 2 AND u.priv & 1 "
-                f"AND s.{scoring_metric} > :score",
-                {
-                    "map_md5": map_md5,
-                    "mode": mode,
-                    "score": personal_best_score_row["_score"],
-                },
-                column=0,  # COUNT(*)
+    leaderboard = app.state.cache.leaderboards.peek(
+        map_md5,
+        (mode, LeaderboardType.Top, 0, ""),
+    )
+    if leaderboard is None:
+        return None
+
+    for row in leaderboard.score_rows:
+        if row["userid"] == player.id:
+            personal_best_score_row = dict(row)
+            del personal_best_score_row["userid"], personal_best_score_row["name"]
+
+            # the scores above it are all on the leaderboard.
+            personal_best_score_row["rank"] = 1 + sum(
+                other_row["_score"] > row["_score"]
+                for other_row in leaderboard.score_rows
             )
+            return personal_best_score_row
 
-            # attach rank to personal best row
-            personal_best_score_row["rank"] = p_best_rank
-        else:
-            personal_best_score_row = None
-    else:
-        score_rows = []
-        personal_best_score_row = None
+    return None
 
-    return score_rows, personal_best_score_row
 
+async def _fetch_personal_best_score_row(
+    map_md5: str,
+    mode: int,
+    player: Player,
+    scoring_metric: Literal["pp", "score"],
+) -> dict[str, Any] | None:
+    personal_best_score_rec = await app.state.services.database.fetch_one(
+        f"SELECT id, {scoring_metric} AS _score, "
+        "max_combo, n50, n100, n300, "
+        "nmiss, nkatu, ngeki, perfect, mods, "
+        "UNIX_TIMESTAMP(play_time) time "
+        "FROM scores "
+        "WHERE map_md5 = :map_md5 AND mode = :mode "
+        "AND userid = :user_id AND status = 2 "
+        "ORDER BY _score DESC LIMIT 1",
+        {"map_md5": map_md5, "mode": mode, "user_id": player.id},
+    )
+
+    if personal_best_score_rec is None:
+        return None
+
+    personal_best_score_row = dict(personal_best_score_rec._mapping)
+
+    # calculate the rank of the score & attach it to the row.
+    personal_best_score_row["rank"] = await map_leaderboards_usecases.fetch_rank(
+        map_md5,
+        mode,
+        personal_best_score_row["_score"],
+    )
+    return personal_best_score_row
 
-SCORE_LISTING_FMTSTR = (
-    "{id}|{name}|{score}|{max_combo}|"
-    "{n50}|{n100}|{n300}|{nmiss}|{nkatu}|{ngeki}|"
-    "{perfect}|{mods}|{userid}|{rank}|{time}|{has_replay}"
-)
+
+async def get_leaderboard_scores(
+    leaderboard_type: LeaderboardType | int,
+    map_md5: str,
+    mode: int,
+    mods: Mods,
+    player: Player,
+    scoring_metric: Literal["pp", "score"],
+) -> tuple[CachedLeaderboard, dict[str, Any] | None]:
+    """\
+    Fetch a map's leaderboard (from the cache, if possible),
+    & the player's personal best score on the map, if any.
+    """
+    cache_key = _leaderboard_cache_key(leaderboard_type, mode, mods, player)
+
+    leaderboard = None
+    if cache_key is not None:
+        leaderboard = app.state.cache.leaderboards.get(map_md5, cache_key)
+
+    if leaderboard is None:
+        # (read before fetching, so the leaderboard isn't cached
+        # if the map's scores change while it's being fetched.)
+        generation = app.state.cache.leaderboards.generation(map_md5)
+
+        score_rows = await _fetch_leaderboard_score_rows(
+            leaderboard_type,
+            map_md5,
+            mode,
+            mods,
+            player,
+            scoring_metric,
+        )
+        leaderboard = CachedLeaderboard(
+            score_rows=score_rows,
+            score_lines=[
+                SCORE_LISTING_FMTSTR.format(
+                    **s,
+                    score=int(s["_score"]),
+                    has_replay="1",
+                    rank=idx + 1,
+                )
+                for idx, s in enumerate(score_rows)
+            ],
+        )
+
+        if cache_key is not None:
+            app.state.cache.leaderboards.set(
+                map_md5,
+                cache_key,
+                leaderboard,
+                generation,
+            )
+
+    if not leaderboard.score_rows:
+        return leaderboard, None
+
+    # fetch player's personal best score
+    personal_best_score_row = _personal_best_score_row_from_cache(
+        map_md5,
+        mode,
+        player,
+    )
+    if personal_best_score_row is None:
+        personal_best_score_row = await _fetch_personal_best_score_row(
+            map_md5,
+            mode,
+            player,
+            scoring_metric,
+        )
+
+    return leaderboard, personal_best_score_row
 
 
 @router.get("/web/osu-osz2-getscores.php")
@@ -2137,9 +2202,9 @@ async def getScores(
     if mode != player.status.mode:
         player.status.mods = mods
         player.status.mode = mode
+        player.invalidate_stats()
 
-        if not player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(player))
+        app.state.sessions.players.broadcast_stats(player)
 
     scoring_metric: Literal["pp", "score"] = (
         "pp" if mode >= GameMode.RELAX_OSU else "score"
@@ -2154,7 +2219,7 @@ async def getScores(
 
         if has_set_id and map_set_id not in app.state.cache.beatmapset:
             # set not cached, it doesn't exist
-            app.state.cache.unsubmitted.add(map_md5)
+            app.state.cache.unsubmitted[map_md5] = True
             return Response(b"-1|false")
 
         map_filename = unquote_plus(map_filename)  # TODO: is unquote needed?
@@ -2180,13 +2245,13 @@ async def getScores(
 
         if map_exists:
             # map can be updated.
-            app.state.cache.needs_update.add(map_md5)
+            app.state.cache.needs_update[map_md5] = True
             return Response(b"1|false")
         else:
             # map is unsubmitted.
             # add this map to the unsubmitted cache, so
             # that we don't have to make this request again.
-            app.state.cache.unsubmitted.add(map_md5)
+            app.state.cache.unsubmitted[map_md5] = True
             return Response(b"-1|false")
 
     # we've found a beatmap for the request.
@@ -2200,9 +2265,8 @@ async def getScores(
         return Response(f"{int(bmap.status)}|false".encode())
 
     # fetch scores & personal best
-    # TODO: create a leaderboard cache
     if not requesting_from_editor_song_select:
-        score_rows, personal_best_score_row = await get_leaderboard_scores(
+        leaderboard, personal_best_score_row = await get_leaderboard_scores(
             leaderboard_type,
             bmap.md5,
             mode,
@@ -2210,8 +2274,9 @@ async def getScores(
             player,
             scoring_metric,
         )
+        score_lines = leaderboard.score_lines
     else:
-        score_rows = []
+        score_lines = []
         personal_best_score_row = None
 
     # fetch beatmap rating
@@ -2224,13 +2289,13 @@ async def getScores(
     response_lines: list[str] = [
         # NOTE: fa stands for featured artist (for the ones that may not know)
         # {ranked_status}|{serv_has_osz2}|{bid}|{bsid}|{len(scores)}|{fa_track_id}|{fa_license_text}
-        f"{int(bmap.status)}|false|{bmap.id}|{bmap.set_id}|{len(score_rows)}|0|",
+        f"{int(bmap.status)}|false|{bmap.id}|{bmap.set_id}|{len(score_lines)}|0|",
         # {offset}\n{beatmap_name}\n{rating}
         # TODO: server side beatmap offsets
         f"0\n{bmap.full_name}\n{rating}",
     ]
 
-    if not score_rows:
+    if not score_lines:
         response_lines.extend(("", ""))  # no scores, no personal best
         return Response("\n".join(response_lines).encode())
 
@@ -2247,17 +2312,7 @@ async def getScores(
     else:
         response_lines.append("")
 
-    response_lines.extend(
-        [
-            SCORE_LISTING_FMTSTR.format(
-                **s,
-                score=int(s["_score"]),
-                has_replay="1",
-                rank=idx + 1,
-            )
-            for idx, s in enumerate(score_rows)
-        ],
-    )
+    response_lines.extend(score_lines)
 
     return Response("\n".join(response_lines).encode())
 
@@ -2692,8 +2747,8 @@ async def register_account(
         # they want to register the account now.
         # make the md5 & bcrypt the md5 for sql.
         pw_md5 = hashlib.md5(pw_plaintext.encode()).hexdigest().encode()
-        pw_bcrypt = bcrypt.hashpw(pw_md5, bcrypt.gensalt())
-        app.state.cache.bcrypt[pw_bcrypt] = pw_md5  # cache result for login
+        pw_bcrypt = await app.state.services.bcrypt_pool.hashpw(pw_md5)
+        await passwords_usecases.remember(pw_md5, pw_bcrypt)  # for login
 
         ip = app.state.services.ip_resolver.get_ip(request.headers)
 
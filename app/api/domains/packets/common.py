@@ -15,7 +15,7 @@ def register(
     packet: ClientPackets,
     restricted: bool = False,
 ) -> Callable[[type[BasePacket]], type[BasePacket]]:
-    """Register a handler in `app.state.packets`."""
+    """Register a handler in `app.state.packets` (& its packet tables)."""
 
     def wrapper(cls: type[BasePacket]) -> type[BasePacket]:
         app.state.packets["all"][packet] = cls
@@ -23,6 +23,11 @@ def register(
         if restricted:
             app.state.packets["restricted"][packet] = cls
 
+        for key, packet_map in app.state.packets.items():
+            app.state.packet_tables[key] = app.packets.compile_packet_table(
+                packet_map,
+            )
+
         return cls
 
     return wrapper
@@ -1,20 +1,24 @@
 import asyncio
-from datetime import date
 import datetime
+import functools
 import random
 import struct
-from typing import Mapping, TypedDict
-from .common import *
-
 import time
-import bcrypt
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Mapping
+from datetime import date
+from typing import TypedDict
+
 import databases.core
+from databases.interfaces import Record
 
 import app.packets
 import app.settings
 import app.state
 import app.usecases.performance
 import app.utils
+from .common import *
 from app import commands
 from app._typing import IPAddress
 from app.constants import regexes
@@ -49,10 +53,10 @@ from app.packets import ClientPackets
 from app.repositories import ingame_logins as logins_repo
 from app.repositories import players as players_repo
 from app.state import services
+from app.usecases import passwords as passwords_usecases
 from app.usecases.performance import ScoreParams
 
 
-
 @register(ClientPackets.PING, restricted=True)
 class Ping(BasePacket):
     async def handle(self, player: Player) -> None:
@@ -89,10 +93,10 @@ class ChangeAction(BasePacket):
         player.status.mods = Mods(self.mods)
         player.status.mode = GameMode(self.mode)
         player.status.map_id = self.map_id
+        player.invalidate_stats()
 
         # broadcast it to all online players.
-        if not player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(player))
+        app.state.sessions.players.broadcast_stats(player)
 
 
 IGNORED_CHANNELS = ["#highlight", "#userlog"]
@@ -258,7 +262,7 @@ class Logout(BasePacket):
 @register(ClientPackets.REQUEST_STATUS_UPDATE, restricted=True)
 class StatsUpdateRequest(BasePacket):
     async def handle(self, player: Player) -> None:
-        player.enqueue(app.packets.user_stats(player))
+        player.enqueue(player.stats_packet)
 
 
 # Some messages to send on welcome/restricted/etc.
@@ -346,11 +350,98 @@ def parse_login_data(data: bytes) -> LoginData:
     }
 
 
+async def _update_client_hashes(
+    db_conn: databases.core.Connection,
+    user_id: int,
+    login_data: LoginData,
+) -> None:
+    """Record the client hashes a player logged in with."""
+    await db_conn.execute(
+        "INSERT INTO client_hashes "
+        "(userid, osupath, adapters, uninstall_id,"
+        " disk_serial, latest_time, occurrences) "
+        "VALUES (:id, :osupath, :adapters, :uninstall, :disk_serial, NOW(), 1) "
+        "ON DUPLICATE KEY UPDATE "
+        "occurrences = occurrences + 1, "
+        "latest_time = NOW() ",
+        {
+            "id": user_id,
+            "osupath": login_data["osu_path_md5"],
+            "adapters": login_data["adapters_md5"],
+            "uninstall": login_data["uninstall_md5"],
+            "disk_serial": login_data["disk_signature_md5"],
+        },
+    )
+
+    if app.settings.HARDWARE_INDEX_IN_MEMORY:
+        app.state.sessions.hardware_index.add(
+            user_id,
+            adapters=login_data["adapters_md5"],
+            uninstall_id=login_data["uninstall_md5"],
+            disk_serial=login_data["disk_signature_md5"],
+        )
+
+
+async def _fetch_hw_matches(
+    db_conn: databases.core.Connection,
+    user_id: int,
+    login_data: LoginData,
+    running_under_wine: bool,
+) -> list[Record]:
+    """Fetch other players who've logged in with matching hardware."""
+    # TODO: store adapters individually
+
+    if app.settings.HARDWARE_INDEX_IN_MEMORY:
+        # most players have no matches, in which case we can skip the query.
+        if not app.state.sessions.hardware_index.matches(
+            user_id,
+            adapters=None if running_under_wine else login_data["adapters_md5"],
+            uninstall_id=login_data["uninstall_md5"],
+            disk_serial=(
+                None if running_under_wine else login_data["disk_signature_md5"]
+            ),
+        ):
+            return []
+
+    if running_under_wine:
+        hw_checks = "h.uninstall_id = :uninstall"
+        hw_args = {"uninstall": login_data["uninstall_md5"]}
+    else:
+        hw_checks = "h.adapters = :adapters OR h.uninstall_id = :uninstall OR h.disk_serial = :disk_serial"
+        hw_args = {
+            "adapters": login_data["adapters_md5"],
+            "uninstall": login_data["uninstall_md5"],
+            "disk_serial": login_data["disk_signature_md5"],
+        }
+
+    return await db_conn.fetch_all(
+        "SELECT u.name, u.priv, h.occurrences "
+        "FROM client_hashes h "
+        "INNER JOIN users u ON h.userid = u.id "
+        "WHERE h.userid != :user_id AND "
+        f"({hw_checks})",
+        {"user_id": user_id, **hw_args},
+    )
+
+
+async def _fetch_unread_mail(
+    db_conn: databases.core.Connection,
+    user_id: int,
+) -> list[Record]:
+    """Fetch the mail a player was sent while offline."""
+    return await db_conn.fetch_all(
+        "SELECT m.`msg`, m.`time`, m.`from_id`, "
+        "(SELECT name FROM users WHERE id = m.`from_id`) AS `from`, "
+        "(SELECT name FROM users WHERE id = m.`to_id`) AS `to` "
+        "FROM `mail` m WHERE m.`to_id` = :to AND m.`read` = 0",
+        {"to": user_id},
+    )
+
+
 async def login(
     headers: Mapping[str, str],
     body: bytes,
     ip: IPAddress,
-    db_conn: databases.core.Connection,
 ) -> LoginResponse:
     """\
     Login has no specific packet, but happens when the osu!
@@ -395,33 +486,11 @@ async def login(
     )
 
     if app.settings.DISALLOW_OLD_CLIENTS:
-        osu_client_stream = osu_version.stream.value
-        if osu_client_stream in ("stable", "beta"):
-            osu_client_stream += "40"  # TODO: why?
-
-        allowed_client_versions = set()
-
-        # TODO: put this behind a layer of abstraction
-        #       for better handling of the error cases
-        response = await services.http_client.get(
-            OSU_API_V2_CHANGELOG_URL,
-            params={"stream": osu_client_stream},
-        )
-        response.raise_for_status()
-        for build in response.json()["builds"]:
-            version = date(
-                int(build["version"][0:4]),
-                int(build["version"][4:6]),
-                int(build["version"][6:8]),
-            )
-            allowed_client_versions.add(version)
-
-            if any(entry["major"] for entry in build["changelog_entries"]):
-                # this build is a major iteration to the client
-                # don't allow anything older than this
-                break
-
-        if osu_version.date not in allowed_client_versions:
+        # allowed versions are refreshed in the background (see app.bg_loops).
+        if not await app.state.sessions.client_versions.is_allowed(
+            osu_version.stream.value,
+            osu_version.date,
+        ):
             return {
                 "osu_token": "client-too-old",
                 "response_body": (
@@ -445,6 +514,16 @@ async def login(
 
     login_time = time.time()
 
+    # time taken by each stage of the login, for metrics.
+    stage_times: dict[str, float] = {}
+    stage_start = time.perf_counter()
+
+    def end_stage(stage: str) -> None:
+        nonlocal stage_start
+        stage_end = time.perf_counter()
+        stage_times[stage] = stage_end - stage_start
+        stage_start = stage_end
+
     # disallow multiple sessions from a single user
     # with the exception of tourney spectator clients
     player = app.state.sessions.players.get(name=login_data["username"])
@@ -488,81 +567,54 @@ async def login(
             "response_body": app.packets.user_id(-1),
         }
 
-    # get our bcrypt cache
-    bcrypt_cache = app.state.cache.bcrypt
     pw_bcrypt = user_info["pw_bcrypt"].encode()
 
     # check credentials against db. algorithms like these are intentionally
     # designed to be slow; we'll cache the results to speed up subsequent logins.
-    if pw_bcrypt in bcrypt_cache:  # ~0.01 ms
-        if login_data["password_md5"] != bcrypt_cache[pw_bcrypt]:
-            return {
-                "osu_token": "incorrect-password",
-                "response_body": (
-                    app.packets.notification(f"{BASE_DOMAIN}: Incorrect password")
-                    + app.packets.user_id(-1)
-                ),
-            }
-    else:  # ~200ms
-        if not bcrypt.checkpw(login_data["password_md5"], pw_bcrypt):
-            return {
-                "osu_token": "incorrect-password",
-                "response_body": (
-                    app.packets.notification(f"{BASE_DOMAIN}: Incorrect password")
-                    + app.packets.user_id(-1)
-                ),
-            }
-
-        bcrypt_cache[pw_bcrypt] = login_data["password_md5"]
+    if not await passwords_usecases.verify(login_data["password_md5"], pw_bcrypt):
+        return {
+            "osu_token": "incorrect-password",
+            "response_body": (
+                app.packets.notification(f"{BASE_DOMAIN}: Incorrect password")
+                + app.packets.user_id(-1)
+            ),
+        }
 
     """ login credentials verified """
 
-    await logins_repo.create(
-        user_id=user_info["id"],
-        ip=str(ip),
-        osu_ver=osu_version.date,
-        osu_stream=osu_version.stream,
-    )
+    end_stage("credentials")
 
-    await db_conn.execute(
-        "INSERT INTO client_hashes "
-        "(userid, osupath, adapters, uninstall_id,"
-        " disk_serial, latest_time, occurrences) "
-        "VALUES (:id, :osupath, :adapters, :uninstall, :disk_serial, NOW(), 1) "
-        "ON DUPLICATE KEY UPDATE "
-        "occurrences = occurrences + 1, "
-        "latest_time = NOW() ",
-        {
-            "id": user_info["id"],
-            "osupath": login_data["osu_path_md5"],
-            "adapters": login_data["adapters_md5"],
-            "uninstall": login_data["uninstall_md5"],
-            "disk_serial": login_data["disk_signature_md5"],
-        },
-    )
-
-    # TODO: store adapters individually
-
-    if running_under_wine:
-        hw_checks = "h.uninstall_id = :uninstall"
-        hw_args = {"uninstall": login_data["uninstall_md5"]}
-    else:
-        hw_checks = "h.adapters = :adapters OR h.uninstall_id = :uninstall OR h.disk_serial = :disk_serial"
-        hw_args = {
-            "adapters": login_data["adapters_md5"],
-            "uninstall": login_data["uninstall_md5"],
-            "disk_serial": login_data["disk_signature_md5"],
-        }
+    user_id = user_info["id"]  # (narrowed here, for the lambda below)
 
-    hw_matches = await db_conn.fetch_all(
-        "SELECT u.name, u.priv, h.occurrences "
-        "FROM client_hashes h "
-        "INNER JOIN users u ON h.userid = u.id "
-        "WHERE h.userid != :user_id AND "
-        f"({hw_checks})",
-        {"user_id": user_info["id"], **hw_args},
+    # these are independent of each other, so they're run concurrently.
+    hw_matches, *_ = await asyncio.gather(
+        services.run_pooled(
+            functools.partial(
+                _fetch_hw_matches,
+                user_id=user_id,
+                login_data=login_data,
+                running_under_wine=running_under_wine,
+            ),
+        ),
+        services.run_pooled(
+            lambda db_conn: logins_repo.create(
+                user_id=user_id,
+                ip=str(ip),
+                osu_ver=osu_version.date,
+                osu_stream=osu_version.stream,
+            ),
+        ),
+        services.run_pooled(
+            functools.partial(
+                _update_client_hashes,
+                user_id=user_id,
+                login_data=login_data,
+            ),
+        ),
     )
 
+    end_stage("client_checks")
+
     if hw_matches:
         # we have other accounts with matching hashes
         if user_info["priv"] & Privileges.VERIFIED:
@@ -599,6 +651,8 @@ async def login(
 
     geoloc = await app.state.services.fetch_geoloc(ip, headers)
 
+    end_stage("geolocation")
+
     if geoloc is None:
         return {
             "osu_token": "login-failed",
@@ -615,7 +669,7 @@ async def login(
         # country wasn't stored on registration.
         log(f"Fixing {login_data['username']}'s country.", Ansi.LGREEN)
 
-        await db_conn.execute(
+        await app.state.services.database.execute(
             "UPDATE users SET country = :country WHERE id = :user_id",
             {
                 "country": geoloc["country"]["acronym"],
@@ -694,10 +748,16 @@ async def login(
     # tells osu! to reorder channels based on config.
     data += app.packets.channel_info_end()
 
-    # fetch some of the player's
-    # information from sql to be cached.
-    await player.stats_from_sql_full(db_conn)
-    await player.relationships_from_sql(db_conn)
+    # fetch some of the player's information from sql to be cached
+    # (and any mail they were sent while offline), concurrently.
+    # XXX: mail is only sent to unrestricted players.
+    mail_rows, *_ = await asyncio.gather(
+        services.run_pooled(functools.partial(_fetch_unread_mail, user_id=player.id)),
+        services.run_pooled(player.stats_from_sql_full),
+        services.run_pooled(player.relationships_from_sql),
+    )
+
+    end_stage("player_data")
 
     # TODO: fetch player.recent_scores from sql
 
@@ -709,7 +769,7 @@ async def login(
     data += app.packets.silence_end(player.remaining_silence)
 
     # update our new player's stats, and broadcast them.
-    user_data = app.packets.user_presence(player) + app.packets.user_stats(player)
+    user_data = player.presence_packet + player.stats_packet
 
     data += user_data
 
@@ -719,27 +779,14 @@ async def login(
             # enqueue us to them
             o.enqueue(user_data)
 
-            # enqueue them to us.
-            if not o.restricted:
-                if o is app.state.sessions.bot:
-                    # optimization for bot since it's
-                    # the most frequently requested user
-                    data += app.packets.bot_presence(o)
-                    data += app.packets.bot_stats(o)
-                else:
-                    data += app.packets.user_presence(o)
-                    data += app.packets.user_stats(o)
+        # enqueue them to us; the bot's stats are rerolled
+        # periodically, so it's not included in the snapshot.
+        data += app.packets.bot_presence(app.state.sessions.bot)
+        data += app.packets.bot_stats(app.state.sessions.bot)
+        data += app.state.sessions.players.snapshot.blob
 
         # the player may have been sent mail while offline,
         # enqueue any messages from their respective authors.
-        mail_rows = await db_conn.fetch_all(
-            "SELECT m.`msg`, m.`time`, m.`from_id`, "
-            "(SELECT name FROM users WHERE id = m.`from_id`) AS `from`, "
-            "(SELECT name FROM users WHERE id = m.`to_id`) AS `to` "
-            "FROM `mail` m WHERE m.`to_id` = :to AND m.`read` = 0",
-            {"to": player.id},
-        )
-
         if mail_rows:
             sent_to = set()  # ids
 
@@ -788,16 +835,11 @@ async def login(
 
     else:
         # player is restricted, one way data
-        for o in app.state.sessions.players.unrestricted:
-            # enqueue them to us.
-            if o is app.state.sessions.bot:
-                # optimization for bot since it's
-                # the most frequently requested user
-                data += app.packets.bot_presence(o)
-                data += app.packets.bot_stats(o)
-            else:
-                data += app.packets.user_presence(o)
-                data += app.packets.user_stats(o)
+        # enqueue them to us; the bot's stats are rerolled
+        # periodically, so it's not included in the snapshot.
+        data += app.packets.bot_presence(app.state.sessions.bot)
+        data += app.packets.bot_stats(app.state.sessions.bot)
+        data += app.state.sessions.players.snapshot.blob
 
         data += app.packets.account_restricted()
         data += app.packets.send_message(
@@ -817,9 +859,18 @@ async def login(
         if not player.restricted:
             app.state.services.datadog.increment("bancho.online_players")
 
+        end_stage("response")
+
         time_taken = time.time() - login_time
         app.state.services.datadog.histogram("bancho.login_time", time_taken)
 
+        for stage, stage_time in stage_times.items():
+            app.state.services.datadog.histogram(
+                "bancho.login_stage_time",
+                stage_time,
+                tags=[f"stage:{stage}"],
+            )
+
     user_os = "unix (wine)" if running_under_wine else "win32"
     country_code = player.geoloc["country"]["acronym"].upper()
 
@@ -882,19 +933,28 @@ class StopSpectating(BasePacket):
         host.remove_spectator(player)
 
 
+# callbacks which are passed each decoded frame bundle sent by a
+# player being spectated (e.g. for anti-cheat or replay recording).
+# XXX: frame bundles are only decoded while a hook is registered.
+FrameBundleHook = Callable[[Player, app.packets.ReplayFrameBundle], Awaitable[None]]
+frame_bundle_hooks: list[FrameBundleHook] = []
+
+
 @register(ClientPackets.SPECTATE_FRAMES)
 class SpectateFrames(BasePacket):
     def __init__(self, reader: BanchoPacketReader) -> None:
-        self.frame_bundle = reader.read_replayframe_bundle()
+        self.frame_bundle = reader.read_raw_replayframe_bundle()
 
     async def handle(self, player: Player) -> None:
-        # TODO: perform validations on the parsed frame bundle
-        # to ensure it's not being tamperated with or weaponized.
+        if self.frame_bundle is None:
+            log(f"{player} sent a malformed spectator frame bundle.", Ansi.LYELLOW)
+            return
 
         # NOTE: this is given a fastpath here for efficiency due to the
-        # sheer rate of usage of these packets in spectator mode.
+        # sheer rate of usage of these packets in spectator mode; only
+        # the bundle's header & length are validated before forwarding.
 
-        # data = app.packets.spectateFrames(self.frame_bundle.raw_data)
+        # data = app.packets.spectate_frames(self.frame_bundle.raw_data)
         data = (
             struct.pack("<HxI", 15, len(self.frame_bundle.raw_data))
             + self.frame_bundle.raw_data
@@ -905,6 +965,19 @@ class SpectateFrames(BasePacket):
         for spectator in player.spectators:
             spectator.enqueue(data)
 
+        if frame_bundle_hooks:
+            try:
+                frame_bundle = self.frame_bundle.decode()
+            except (struct.error, ValueError):
+                log(
+                    f"{player} sent an undecodable spectator frame bundle.",
+                    Ansi.LYELLOW,
+                )
+                return
+
+            for hook in frame_bundle_hooks:
+                await hook(player, frame_bundle)
+
 
 @register(ClientPackets.CANT_SPECTATE)
 class CantSpectate(BasePacket):
@@ -1864,18 +1937,20 @@ class StatsRequest(BasePacket):
         self.user_ids = reader.read_i32_list_i16l()
 
     async def handle(self, player: Player) -> None:
-        unrestrcted_ids = [p.id for p in app.state.sessions.players.unrestricted]
-        is_online = lambda o: o in unrestrcted_ids and o != player.id
+        unrestricted = app.state.sessions.players.unrestricted
+
+        for online in self.user_ids:
+            if online == player.id:
+                continue
 
-        for online in filter(is_online, self.user_ids):
             target = app.state.sessions.players.get(id=online)
-            if target:
+            if target is not None and target in unrestricted:
                 if target is app.state.sessions.bot:
                     # optimization for bot since it's
                     # the most frequently requested user
                     packet = app.packets.bot_stats(target)
                 else:
-                    packet = app.packets.user_stats(target)
+                    packet = target.stats_packet
 
                 player.enqueue(packet)
 
@@ -1935,7 +2010,7 @@ class UserPresenceRequest(BasePacket):
                     # the most frequently requested user
                     packet = app.packets.bot_presence(target)
                 else:
-                    packet = app.packets.user_presence(target)
+                    packet = target.presence_packet
 
                 player.enqueue(packet)
 
@@ -1952,8 +2027,8 @@ class UserPresenceRequestAll(BasePacket):
 
         buffer = bytearray()
 
-        for player in app.state.sessions.players.unrestricted:
-            buffer += app.packets.user_presence(player)
+        for o in app.state.sessions.players.unrestricted:
+            buffer += o.presence_packet
 
         player.enqueue(bytes(buffer))
 
@@ -1967,5 +2042,3 @@ class ToggleBlockingDMs(BasePacket):
         player.pm_private = self.value == 1
 
         player.update_latest_activity_soon()
-
-
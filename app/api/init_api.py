@@ -4,6 +4,7 @@ from __future__ import annotations
 import asyncio
 import os
 import pprint
+from pathlib import Path
 from typing import Any
 
 import starlette.routing
@@ -21,6 +22,7 @@ from starlette.requests import ClientDisconnect
 import app.bg_loops
 import app.settings
 import app.state
+import app.usecases.score_jobs
 import app.utils
 from app.api import api_router  # type: ignore[attr-defined]
 from app.api import domains
@@ -135,11 +137,40 @@ def init_events(asgi_app: BanchoAPI) -> None:
 
         app.state.services.ip_resolver = app.state.services.IPResolver()
 
+        if app.settings.GEOLOCATION_DB_PATH:
+            app.state.services.geoloc_db = (
+                app.state.services.GeolocationDatabase.from_csv(
+                    Path(app.settings.GEOLOCATION_DB_PATH),
+                )
+            )
+            log(f"Loaded {app.state.services.geoloc_db}.", Ansi.LCYAN)
+
+        app.state.services.bcrypt_pool = app.state.services.BcryptPool(
+            max_workers=app.settings.BCRYPT_MAX_WORKERS,
+        )
+        app.state.services.login_admission = app.state.services.LoginAdmission(
+            rate=app.settings.LOGIN_ADMISSION_RATE,
+            burst=app.settings.LOGIN_ADMISSION_BURST,
+            max_queued=app.settings.LOGIN_ADMISSION_MAX_QUEUED,
+        )
+        app.state.services.job_queue = app.state.services.JobQueue(
+            stream="bancho:jobs",
+            handlers=app.usecases.score_jobs.JOB_HANDLERS,
+        )
+        await app.state.services.job_queue.initialize()
+
         await app.state.services.run_sql_migrations()
 
         async with app.state.services.database.connection() as db_conn:
             await collections.initialize_ram_caches(db_conn)
 
+        if app.settings.DISALLOW_OLD_CLIENTS:
+            client_versions = app.state.sessions.client_versions
+            if client_versions.load_snapshot():
+                log(f"Loaded client versions snapshot: {client_versions}", Ansi.LCYAN)
+
+            await client_versions.refresh()
+
         await app.bg_loops.initialize_housekeeping_tasks()
 
         log("Startup process complete.", Ansi.LGREEN)
@@ -159,6 +190,7 @@ def init_events(asgi_app: BanchoAPI) -> None:
         await app.state.services.http_client.aclose()
         await app.state.services.database.disconnect()
         await app.state.services.redis.close()
+        app.state.services.bcrypt_pool.shutdown()
 
         if app.state.services.datadog is not None:
             app.state.services.datadog.stop()
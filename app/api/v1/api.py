@@ -18,6 +18,7 @@ import orjson
 import app.packets
 import app.state
 import app.usecases.performance
+import app.usecases.top_scores
 from app.constants import regexes
 from app.constants.gamemodes import GameMode
 from app.constants.mods import Mods
@@ -69,6 +70,7 @@ oauth2_scheme = HTTPBearer(auto_error=False)
 
 # [Normal]
 # GET /calculate_pp: calculate & return pp for a given beatmap.
+# GET /get_cache_stats: return the size & hit rate of the server's caches.
 # POST/PUT /set_avatar: Update the tokenholder's avatar to a given file.
 
 # TODO handlers
@@ -275,6 +277,8 @@ async def api_update_map_status(
             {"map_ids": map_ids},
         )
 
+    # the maps' scores may no longer award pp (or vice versa)
+    app.usecases.top_scores.invalidate()
 
     return ORJSONResponse({"status": "success"})
 
@@ -323,6 +327,31 @@ async def api_get_player_count() -> Response:
     )
 
 
+@router.get("/get_cache_stats")
+async def api_get_cache_stats(
+    token: HTTPCredentials = Depends(oauth2_scheme),
+) -> Response:
+    """Get the size (& lookup stats, if bounded) of the server's caches."""
+    if token is None or app.state.sessions.api_keys.get(token.credentials) is None:
+        return ORJSONResponse(
+            {"status": "Invalid API key."},
+            status_code=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    if token.credentials != app.settings.BOT_API_KEY:
+        return ORJSONResponse(
+            {"status": "This endpoint is only available to the server."},
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+    return ORJSONResponse(
+        {
+            "status": "success",
+            "caches": app.state.cache.stats(),
+        },
+    )
+
+
 @router.get("/get_player_info")
 async def api_get_player_info(
     scope: Literal["stats", "info", "all"],
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import random
 import time
 
 import app.packets
 import app.settings
 import app.state
+import app.usecases.score_checksums
+import app.usecases.top_scores
 from app.constants.privileges import Privileges
 from app.logging import Ansi
 from app.logging import log
@@ -13,6 +16,9 @@ from app.logging import log
 __all__ = ("initialize_housekeeping_tasks",)
 
 OSU_CLIENT_MIN_PING_INTERVAL = 300000 // 1000  # defined by osu!
+STATS_BROADCAST_INTERVAL = 0.25  # seconds
+TOP_SCORES_CHECK_SAMPLE_SIZE = 10  # players' top scores checked per interval
+JOB_QUEUE_REPORT_INTERVAL = 15  # seconds
 
 
 async def initialize_housekeeping_tasks() -> None:
@@ -28,10 +34,23 @@ async def initialize_housekeeping_tasks() -> None:
                 _remove_expired_donation_privileges(interval=30 * 60),
                 _update_bot_status(interval=5 * 60),
                 _disconnect_ghosts(interval=OSU_CLIENT_MIN_PING_INTERVAL // 3),
+                _flush_stats_broadcasts(interval=STATS_BROADCAST_INTERVAL),
+                _check_top_scores_consistency(interval=10 * 60),
+                _report_job_queue_backlog(interval=JOB_QUEUE_REPORT_INTERVAL),
+                app.usecases.score_checksums.warm_filter(),
+                *(
+                    _process_jobs(consumer=f"worker-{i}")
+                    for i in range(app.settings.JOB_QUEUE_WORKERS)
+                ),
             )
         },
     )
 
+    if app.settings.DISALLOW_OLD_CLIENTS:
+        app.state.sessions.housekeeping_tasks.add(
+            loop.create_task(_refresh_client_versions(interval=60 * 60)),
+        )
+
 
 async def _remove_expired_donation_privileges(interval: int) -> None:
     """Remove donation privileges from users with expired sessions."""
@@ -89,3 +108,52 @@ async def _update_bot_status(interval: int) -> None:
     while True:
         await asyncio.sleep(interval)
         app.packets.bot_stats.cache_clear()
+
+
+async def _flush_stats_broadcasts(interval: float) -> None:
+    """Broadcast the latest stats of players whose stats changed, every `interval`."""
+    while True:
+        await asyncio.sleep(interval)
+        app.state.sessions.players.stats_broadcaster.flush()
+
+
+async def _refresh_client_versions(interval: int) -> None:
+    """Refresh the osu! client versions allowed to log in, every `interval`."""
+    while True:
+        # (they're first loaded on startup, before accepting logins.)
+        await asyncio.sleep(interval)
+
+        if app.settings.DEBUG:
+            log("Refreshing allowed client versions.", Ansi.LMAGENTA)
+
+        await app.state.sessions.client_versions.refresh()
+
+
+async def _check_top_scores_consistency(interval: int) -> None:
+    """Check a sample of players' cached top scores against sql, every `interval`."""
+    while True:
+        await asyncio.sleep(interval)
+
+        cached = list(app.state.cache.top_scores)
+        sample = random.sample(cached, min(len(cached), TOP_SCORES_CHECK_SAMPLE_SIZE))
+
+        for user_id, mode in sample:
+            await app.usecases.top_scores.check_consistency(user_id, mode)
+
+
+async def _process_jobs(consumer: str) -> None:
+    """Process jobs from the job queue, as they're enqueued."""
+    while True:
+        try:
+            await app.state.services.job_queue.process(consumer)
+        except Exception as exc:
+            # e.g. redis is unavailable; jobs will be retried.
+            log(f"Failed to process jobs ({consumer}): {exc!r}", Ansi.LRED)
+            await asyncio.sleep(5)
+
+
+async def _report_job_queue_backlog(interval: int) -> None:
+    """Report the job queue's backlog (as metrics), every `interval`."""
+    while True:
+        await asyncio.sleep(interval)
+        await app.state.services.job_queue.report_backlog()
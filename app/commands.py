@@ -35,7 +35,9 @@ import app.logging
 import app.packets
 import app.settings
 import app.state
+import app.usecases.map_leaderboards
 import app.usecases.performance
+import app.usecases.top_scores
 import app.utils
 from app.constants import regexes
 from app.constants.gamemodes import GAMEMODE_REPR_LIST
@@ -682,6 +684,9 @@ async def _map(ctx: Context) -> str | None:
             {"map_ids": map_ids},
         )
 
+    # the maps' scores may no longer award pp (or vice versa)
+    app.usecases.top_scores.invalidate()
+
     return f"{bmap.embed} updated to {new_status!s}."
 
 
@@ -1207,6 +1212,9 @@ async def wipemap(ctx: Context) -> str | None:
         "DELETE FROM scores WHERE map_md5 = :map_md5",
         {"map_md5": map_md5},
     )
+    app.usecases.top_scores.invalidate()
+    app.state.cache.leaderboards.invalidate(map_md5)
+    await app.usecases.map_leaderboards.wipe([map_md5])
 
     return "Scores wiped."
 
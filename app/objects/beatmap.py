@@ -19,6 +19,8 @@ from tenacity.stop import stop_after_attempt
 
 import app.settings
 import app.state
+import app.usecases.map_leaderboards
+import app.usecases.top_scores
 import app.utils
 from app.constants.gamemodes import GameMode
 from app.logging import Ansi
@@ -677,6 +679,9 @@ class BeatmapSet:
                         bmap = old_maps[old_id]
                         bmap._parse_from_osuapi_resp(new_map)
                         updated_maps.append(bmap)
+
+                        # the map's scores may no longer award pp (or vice versa)
+                        app.usecases.top_scores.invalidate()
                     else:
                         # map is the same, make no changes
                         updated_maps.append(old_map)  # TODO: is this needed?
@@ -716,6 +721,10 @@ class BeatmapSet:
                     "DELETE FROM scores WHERE map_md5 IN :map_md5s",
                     {"map_md5s": map_md5s_to_delete},
                 )
+                app.usecases.top_scores.invalidate()
+                for map_md5 in map_md5s_to_delete:
+                    app.state.cache.leaderboards.invalidate(map_md5)
+                await app.usecases.map_leaderboards.wipe(map_md5s_to_delete)
 
             # update last_osuapi_check
             await app.state.services.database.execute(
@@ -752,6 +761,10 @@ class BeatmapSet:
                 "DELETE FROM scores WHERE map_md5 IN :map_md5s",
                 {"map_md5s": map_md5s_to_delete},
             )
+            app.usecases.top_scores.invalidate()
+            for map_md5 in map_md5s_to_delete:
+                app.state.cache.leaderboards.invalidate(map_md5)
+            await app.usecases.map_leaderboards.wipe(map_md5s_to_delete)
 
             # delete set
             await app.state.services.database.execute(
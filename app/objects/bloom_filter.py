@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from collections.abc import Iterator
+from typing import Any
+
+__all__ = ("BloomFilter",)
+
+
+class BloomFilter:
+    """\
+    A compact, probabilistic set of strings, which may report false
+    positives (at about `error_rate`, when holding `capacity` items),
+    but never false negatives; items can't be removed.
+
+    Attributes
+    -----------
+    capacity: `int`
+        The number of items the filter is sized for; beyond
+        this, the false positive rate rises steadily.
+
+    complete: `bool`
+        Whether the filter holds every item of the set it represents,
+        so that items not in the filter are definitely not in the set.
+
+    Intended Usage:
+    >>> bloom = BloomFilter(capacity=1_000_000, error_rate=0.01)
+    >>> bloom.add("6c7e7d5e2fb1c1f6b6f1bd8b8f1a1d0c")
+    >>> "6c7e7d5e2fb1c1f6b6f1bd8b8f1a1d0c" in bloom
+    True
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.complete = False
+
+        # the optimal number of bits & hashes for the capacity & error rate.
+        self.num_bits = max(
+            8,
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def __repr__(self) -> str:
+        return f"<BloomFilter ({len(self)}/{self.capacity} items)>"
+
+    def __len__(self) -> int:
+        """The number of items added (including any repeats)."""
+        return self._count
+
+    def _indices(self, item: str) -> Iterator[int]:
+        # derive the hashes from two halves of one digest (double hashing).
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter."""
+        for idx in self._indices(item):
+            self._bits[idx >> 3] |= 1 << (idx & 7)
+
+        self._count += 1
+
+    def __contains__(self, item: object) -> bool:
+        if not isinstance(item, str):
+            return False
+
+        return all(
+            self._bits[idx >> 3] & (1 << (idx & 7)) for idx in self._indices(item)
+        )
+
+    @property
+    def estimated_error_rate(self) -> float:
+        """The estimated false positive rate, for the items added so far."""
+        return (1 - math.exp(-self.num_hashes * self._count / self.num_bits)) ** (
+            self.num_hashes
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """Return the filter's size & estimated error rate (e.g. for metrics)."""
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "complete": self.complete,
+            "bytes": len(self._bits),
+            "estimated_error_rate": self.estimated_error_rate,
+        }
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable
+from collections.abc import Mapping
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import app.state
+from app.logging import Ansi
+from app.logging import log
+
+__all__ = ("ClientVersions", "parse_changelog_builds")
+
+OSU_API_V2_CHANGELOG_URL = "https://osu.ppy.sh/api/v2/changelog"
+
+# the osu! release streams with changelogs, by our client stream name.
+CHANGELOG_STREAMS = {
+    "stable": "stable40",
+    "beta": "beta40",
+    "cuttingedge": "cuttingedge",
+}
+
+
+def parse_changelog_builds(builds: Iterable[Mapping[str, Any]]) -> set[date]:
+    """Return the versions allowed from a stream's changelog builds (newest first)."""
+    allowed_versions = set()
+
+    for build in builds:
+        allowed_versions.add(
+            date(
+                int(build["version"][0:4]),
+                int(build["version"][4:6]),
+                int(build["version"][6:8]),
+            ),
+        )
+
+        if any(entry["major"] for entry in build["changelog_entries"]):
+            # this build is a major iteration to the client
+            # don't allow anything older than this
+            break
+
+    return allowed_versions
+
+
+class ClientVersions:
+    """\
+    The osu! client versions allowed to log in, by release stream.
+
+    The allowed versions are refreshed from the osu! api's changelog on
+    startup & by a housekeeping task (see `app.bg_loops`), & the last good
+    versions of each stream are persisted to disk, so they're available
+    if the api is down. Streams without versions yet (e.g. if neither the
+    api nor a snapshot had them) are fetched when a client first logs in
+    on them; if that fails too, the client is rejected.
+
+    Attributes
+    -----------
+    snapshot_path: `Path`
+        Where the last good snapshot is persisted.
+
+    fixture_path: `Path | None`
+        A local file of changelog responses by stream, read instead of
+        the osu! api (e.g. for testing offline).
+
+    updated_at: `float | None`
+        The time the current snapshot was fetched, if any.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        fixture_path: Path | None = None,
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.fixture_path = fixture_path
+        self.updated_at: float | None = None
+
+        self._allowed: dict[str, set[date]] = {}
+
+    def __repr__(self) -> str:
+        streams = ", ".join(
+            f"{stream}: {len(versions)}" for stream, versions in self._allowed.items()
+        )
+        return f"<ClientVersions ({streams})>"
+
+    async def is_allowed(self, stream: str, version: date) -> bool:
+        """Return whether `version` of the client's `stream` may log in."""
+        allowed_versions = self._allowed.get(stream)
+        if allowed_versions is None:
+            if not await self.refresh_stream(stream):
+                return False
+
+            allowed_versions = self._allowed[stream]
+
+        return version in allowed_versions
+
+    def load_snapshot(self) -> bool:
+        """Load the last good snapshot from disk, if there is one."""
+        if not self.snapshot_path.exists():
+            return False
+
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text())
+            allowed = {
+                stream: {date.fromisoformat(version) for version in versions}
+                for stream, versions in snapshot["allowed"].items()
+            }
+        except (ValueError, KeyError, TypeError) as exc:
+            log(f"Failed to load client versions snapshot: {exc}", Ansi.LRED)
+            return False
+
+        self._allowed = allowed
+        self.updated_at = snapshot["updated_at"]
+        return True
+
+    def save_snapshot(self) -> None:
+        """Persist the current snapshot to disk."""
+        snapshot = {
+            "updated_at": self.updated_at,
+            "allowed": {
+                stream: sorted(version.isoformat() for version in versions)
+                for stream, versions in self._allowed.items()
+            },
+        }
+
+        # write atomically, so a crash can't leave a partial snapshot.
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        tmp_path.replace(self.snapshot_path)
+
+    async def _fetch_builds(self, changelog_stream: str) -> list[dict[str, Any]]:
+        if self.fixture_path is not None:
+            fixture = json.loads(self.fixture_path.read_text())
+            return fixture[changelog_stream]["builds"]  # type: ignore[no-any-return]
+
+        response = await app.state.services.http_client.get(
+            OSU_API_V2_CHANGELOG_URL,
+            params={"stream": changelog_stream},
+        )
+        response.raise_for_status()
+        return response.json()["builds"]  # type: ignore[no-any-return]
+
+    async def _refresh_stream(self, stream: str) -> bool:
+        # streams without changelogs are requested by name, as they always were.
+        changelog_stream = CHANGELOG_STREAMS.get(stream, stream)
+
+        try:
+            builds = await self._fetch_builds(changelog_stream)
+            allowed_versions = parse_changelog_builds(builds)
+        except Exception as exc:
+            log(f"Failed to refresh {stream} client versions: {exc!r}", Ansi.LRED)
+            return False
+
+        if not allowed_versions:
+            log(f"No {stream} client versions found.", Ansi.LRED)
+            return False
+
+        self._allowed[stream] = allowed_versions
+        return True
+
+    def _snapshot_updated(self) -> None:
+        self.updated_at = time.time()
+
+        try:
+            self.save_snapshot()
+        except OSError as exc:
+            log(f"Failed to save client versions snapshot: {exc}", Ansi.LRED)
+
+    async def refresh_stream(self, stream: str) -> bool:
+        """Refresh the allowed versions of a single stream, & persist them."""
+        if not await self._refresh_stream(stream):
+            return False
+
+        self._snapshot_updated()
+        return True
+
+    async def refresh(self) -> bool:
+        """\
+        Refresh the allowed versions of all streams, & persist them.
+
+        Streams which fail to refresh keep their last good versions;
+        returns whether all streams were refreshed.
+        """
+        refreshed = [
+            await self._refresh_stream(stream)
+            for stream in CHANGELOG_STREAMS.keys() | self._allowed.keys()
+        ]
+
+        if any(refreshed):
+            self._snapshot_updated()
+
+        return all(refreshed)
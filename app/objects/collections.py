@@ -2,13 +2,16 @@
 # in a lot of these classes; needs refactor.
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Iterable
 from collections.abc import Iterator
 from collections.abc import Sequence
 from typing import Any
+from typing import TypeVar
 
 import databases.core
 
+import app.packets
 import app.settings
 import app.state
 import app.utils
@@ -27,12 +30,15 @@ from app.repositories import achievements as achievements_repo
 from app.repositories import channels as channels_repo
 from app.repositories import clans as clans_repo
 from app.repositories import players as players_repo
+from app.usecases import passwords as passwords_usecases
 from app.utils import make_safe_name
 
 __all__ = (
     "Channels",
     "Matches",
+    "OnlineSnapshot",
     "Players",
+    "StatsBroadcaster",
     "MapPools",
     "Clans",
     "initialize_ram_caches",
@@ -41,10 +47,45 @@ __all__ = (
 # TODO: decorator for these collections which automatically
 # adds debugging to their append/remove/insert/extend methods.
 
+K = TypeVar("K")
+T = TypeVar("T")
+
+# the collections below keep hash indexes of their items, mapping each
+# key to the items with that key, in the order they were added. lookups
+# return the first of these, matching the linear scans they replaced.
+
+
+def _index_add(index: dict[K, list[T]], key: K, item: T) -> None:
+    """Add `item` to `index` under `key`."""
+    index.setdefault(key, []).append(item)
+
+
+def _index_remove(index: dict[K, list[T]], key: K, item: T) -> None:
+    """Remove `item` from `index` under `key`."""
+    items = index[key]
+    items.remove(item)
+
+    if not items:
+        del index[key]
+
+
+def _index_get(index: dict[K, list[T]], key: K) -> T | None:
+    """Get the first item in `index` under `key`."""
+    items = index.get(key)
+    return items[0] if items else None
+
 
 class Channels(list[Channel]):
     """The currently active chat channels on the server."""
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        self._by_name: dict[str, list[Channel]] = {}  # by "real" name
+
+        for channel in self:
+            _index_add(self._by_name, channel._name, channel)
+
     def __iter__(self) -> Iterator[Channel]:
         return super().__iter__()
 
@@ -64,29 +105,31 @@ class Channels(list[Channel]):
 
     def get_by_name(self, name: str) -> Channel | None:
         """Get a channel from the list by `name`."""
-        for channel in self:
-            if channel._name == name:
-                return channel
-
-        return None
+        return _index_get(self._by_name, name)
 
     def append(self, channel: Channel) -> None:
         """Append `channel` to the list."""
         super().append(channel)
+        _index_add(self._by_name, channel._name, channel)
 
         if app.settings.DEBUG:
             log(f"{channel} added to channels list.")
 
     def extend(self, channels: Iterable[Channel]) -> None:
         """Extend the list with `channels`."""
+        channels = list(channels)
         super().extend(channels)
 
+        for channel in channels:
+            _index_add(self._by_name, channel._name, channel)
+
         if app.settings.DEBUG:
             log(f"{channels} added to channels list.")
 
     def remove(self, channel: Channel) -> None:
         """Remove `channel` from the list."""
         super().remove(channel)
+        _index_remove(self._by_name, channel._name, channel)
 
         if app.settings.DEBUG:
             log(f"{channel} removed from channels list.")
@@ -113,6 +156,9 @@ class Matches(list[Match | None]):
         MAX_MATCHES = 64  # TODO: refactor this out of existence
         super().__init__([None] * MAX_MATCHES)
 
+        # matches whose state is yet to be sent to the lobby.
+        self._lobby_pending: dict[Match, None] = {}  # ordered set
+
     def __iter__(self) -> Iterator[Match | None]:
         return super().__iter__()
 
@@ -127,6 +173,34 @@ class Matches(list[Match | None]):
 
         return None
 
+    def enqueue_lobby_state(self, match: Match) -> None:
+        """Enqueue `match`'s state to the lobby, once the current handler yields."""
+        if not self._lobby_pending:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # no event loop (e.g. in tools); send it immediately.
+                self._lobby_pending[match] = None
+                self.flush_lobby_states()
+                return
+
+            loop.call_soon(self.flush_lobby_states)
+
+        self._lobby_pending[match] = None
+
+    def flush_lobby_states(self) -> None:
+        """Enqueue the state of all pending matches to the lobby."""
+        pending, self._lobby_pending = self._lobby_pending, {}
+
+        lchan = app.state.sessions.channels.get_by_name("#lobby")
+        if not (lchan and lchan.players):
+            return
+
+        for match in pending:
+            # the match may have been disposed in the meantime.
+            if any(m is match for m in self):
+                lchan.enqueue(app.packets.update_match(match, send_pw=False))
+
     def remove(self, match: Match | None) -> None:
         """Remove `match` from the list."""
         for i, _m in enumerate(self):
@@ -144,7 +218,16 @@ class Groups(list[Group]):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
 
-    
+        self._by_token: dict[str, Group] = {}
+        self._by_player: dict[Player, list[Group]] = {}
+        self._by_invitee: dict[Player, list[Group]] = {}
+
+        # the players & invitees each group was indexed with.
+        self._indexed: dict[Group, tuple[list[Player], list[Player]]] = {}
+
+        for group in self:
+            self._index(group)
+
     def __iter__(self) -> Iterator[Group]:
         return super().__iter__()
 
@@ -159,24 +242,64 @@ class Groups(list[Group]):
     def __repr__(self) -> str:
         return f'[{", ".join(map(repr, self))}]'
 
+    def _index(self, group: Group) -> None:
+        """Add `group` & its players to the lookup indexes."""
+        players, invitees = list(group.players), list(group.invites)
+        self._indexed[group] = (players, invitees)
+
+        self._by_token[group.token] = group
+        for player in players:
+            _index_add(self._by_player, player, group)
+        for player in invitees:
+            _index_add(self._by_invitee, player, group)
+
+    def _unindex(self, group: Group) -> None:
+        """Remove `group` & its players from the lookup indexes."""
+        players, invitees = self._indexed.pop(group)
+
+        del self._by_token[group.token]
+        for player in players:
+            _index_remove(self._by_player, player, group)
+        for player in invitees:
+            _index_remove(self._by_invitee, player, group)
+
+    def reindex(self, group: Group) -> None:
+        """\
+        Refresh the lookup indexes for `group`'s players & invites.
+
+        XXX: this must be called after `group.players`
+             or `group.invites` have been modified.
+        """
+        if group in self._indexed:
+            self._unindex(group)
+            self._index(group)
+
+    def append(self, group: Group) -> None:
+        """Append `group` to the list."""
+        super().append(group)
+        self._index(group)
+
+    def extend(self, groups: Iterable[Group]) -> None:
+        """Extend the list with `groups`."""
+        groups = list(groups)
+        super().extend(groups)
+
+        for group in groups:
+            self._index(group)
+
+    def remove(self, group: Group) -> None:
+        """Remove `group` from the list."""
+        super().remove(group)
+        self._unindex(group)
+
     def has_group(self, player: Player) -> bool:
-        for group in self:
-            if player in group.players:
-                return True
-        return False
+        return player in self._by_player
     
     def get_group(self, player: Player) -> Group:
-        for group in self:
-            if player in group.players:
-                return group
-        return None
+        return _index_get(self._by_player, player)
     
     def player_invites(self, player:Player) -> [Group]:
-        groups : [Group] = []
-        for group in self:
-            if player in group.invites:
-                groups.append(group)
-        return groups
+        return list(self._by_invitee.get(player, ()))
     
     def show_invite_str(self, player:Player) -> str:
         invites = self.player_invites(player)
@@ -187,16 +310,200 @@ class Groups(list[Group]):
             base += f"Warning !!! joining another group will make you leave the one you are in"
 
     def check_token(self, token:str) -> bool:
-        for group in self:
-            if group.token == token:
-                return False
-        return True
+        return token not in self._by_token
+
+class OnlineSnapshot:
+    """\
+    The user presence & stats packets of all unrestricted online
+    players (excluding the bot), concatenated to be sent on login.
+
+    Each player's entry is refreshed as they log in & out, are (un)restricted
+    or have their status/stats change; new entries are appended to the blob,
+    while any other change causes it to be rebuilt the next time it's read.
+
+    Attributes
+    -----------
+    rebuilds: `int`
+        The number of times the blob has been rebuilt from scratch.
+    """
+
+    def __init__(self) -> None:
+        self.rebuilds = 0
+
+        self._players: set[Player] = set()  # all online players
+        self._entries: dict[Player, bytes] = {}  # unrestricted players only
+        self._stale: set[Player] = set()  # entries to be refreshed
+        self._blob = b""
+        self._dirty = False  # whether the blob must be rebuilt
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"<OnlineSnapshot ({len(self)} players, {self.size} bytes)>"
+
+    @property
+    def size(self) -> int:
+        """The size of the (current) blob in bytes."""
+        return len(self._blob)
+
+    @property
+    def blob(self) -> bytes:
+        """The presence & stats packets of all unrestricted online players."""
+        while self._stale:
+            self._refresh(self._stale.pop())
+
+        if self._dirty:
+            self._blob = b"".join(self._entries.values())
+            self._dirty = False
+            self.rebuilds += 1
+
+            if app.state.services.datadog:
+                app.state.services.datadog.increment("bancho.online_snapshot.rebuilds")
+                app.state.services.datadog.gauge(
+                    "bancho.online_snapshot.size",
+                    len(self._blob),
+                )
+
+        return self._blob
+
+    def _refresh(self, player: Player) -> None:
+        """Refresh `player`'s entry, marking the blob dirty if needed."""
+        prev_entry = self._entries.get(player)
+
+        if player.restricted:
+            if prev_entry is not None:
+                del self._entries[player]
+                self._dirty = True
+            return
+
+        entry = player.presence_packet + player.stats_packet
+
+        if prev_entry is None:
+            self._entries[player] = entry
+
+            if not self._dirty:
+                # new entries can be appended in place.
+                self._blob += entry
+        elif entry != prev_entry:
+            self._entries[player] = entry
+            self._dirty = True
+
+    def add(self, player: Player) -> None:
+        """Start tracking `player`'s presence & stats."""
+        if not player.bot_client:
+            self._players.add(player)
+            self._stale.add(player)
+
+    def remove(self, player: Player) -> None:
+        """Stop tracking `player`'s presence & stats."""
+        self._players.discard(player)
+        self._stale.discard(player)
+
+        if self._entries.pop(player, None) is not None:
+            self._dirty = True
+
+    def invalidate(self, player: Player) -> None:
+        """Mark `player`'s entry as stale, if they're being tracked."""
+        if player in self._players:
+            self._stale.add(player)
+
+
+class StatsBroadcaster:
+    """\
+    Coalesces broadcasts of players' stats to all online players.
+
+    Players whose stats change are marked as pending, & their latest stats
+    are broadcast on the next flush (see `app.bg_loops`); players changing
+    their status many times between flushes are only broadcast once.
+
+    Attributes
+    -----------
+    flushed: `int`
+        The number of stats broadcasts sent.
+
+    suppressed: `int`
+        The number of broadcasts coalesced into an already pending one.
+    """
+
+    def __init__(self, players: Players) -> None:
+        self.players = players
+        self.flushed = 0
+        self.suppressed = 0
+
+        self._pending: dict[Player, None] = {}  # ordered set
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __repr__(self) -> str:
+        return f"<StatsBroadcaster ({len(self)} pending)>"
+
+    def add(self, player: Player) -> None:
+        """Mark `player`'s stats to be broadcast on the next flush."""
+        if player in self._pending:
+            self.suppressed += 1
+
+            if app.state.services.datadog:
+                app.state.services.datadog.increment(
+                    "bancho.stats_broadcasts.suppressed",
+                )
+        else:
+            self._pending[player] = None
+
+    def discard(self, player: Player) -> None:
+        """Drop `player`'s pending broadcast, if any."""
+        self._pending.pop(player, None)
+
+    def flush(self) -> None:
+        """Broadcast the latest stats of all pending players."""
+        pending, self._pending = self._pending, {}
+        flushed = 0
+
+        for player in pending:
+            # players may have been restricted since being marked.
+            if not player.restricted:
+                self.players.enqueue(player.stats_packet)
+                flushed += 1
+
+        self.flushed += flushed
+
+        if flushed and app.state.services.datadog:
+            app.state.services.datadog.increment(
+                "bancho.stats_broadcasts.flushed",
+                flushed,
+            )
+
 
 class Players(list[Player]):
-    """The currently active players on the server."""
+    """\
+    The currently active players on the server.
+
+    Players are indexed by token, id & safe name as they're appended &
+    removed, so lookups don't depend on the number of players online.
+    XXX: tourney clients may have multiple sessions for a single player,
+         the first of which is returned by id & name lookups.
+    """
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
+        self.snapshot = OnlineSnapshot()
+        self.stats_broadcaster = StatsBroadcaster(self)
+
+        self._by_token: dict[str, Player] = {}
+        self._by_id: dict[int, list[Player]] = {}
+        self._by_name: dict[str, list[Player]] = {}  # by safe name
+
+        # the keys each player was indexed under; their token
+        # is cleared on logout, before they're removed.
+        self._keys: dict[Player, tuple[str, int, str]] = {}
+
+        self._staff: set[Player] = set()
+        self._restricted: set[Player] = set()
+        self._unrestricted: set[Player] = set()
+
+        for player in self:
+            self._index(player)
 
     def __iter__(self) -> Iterator[Player]:
         return super().__iter__()
@@ -205,32 +512,82 @@ class Players(list[Player]):
         # allow us to either pass in the player
         # obj, or the player name as a string.
         if isinstance(player, str):
-            return player in (player.name for player in self)
+            return any(
+                p.name == player
+                for p in self._by_name.get(make_safe_name(player), ())
+            )
+        elif isinstance(player, Player):
+            return player in self._keys
         else:
             return super().__contains__(player)
 
     def __repr__(self) -> str:
         return f'[{", ".join(map(repr, self))}]'
 
+    def _index(self, player: Player) -> None:
+        """Add `player` to the lookup indexes."""
+        keys = (player.token, player.id, player.safe_name)
+        self._keys[player] = keys
+
+        self._by_token[player.token] = player
+        _index_add(self._by_id, player.id, player)
+        _index_add(self._by_name, player.safe_name, player)
+
+        self._categorize(player)
+
+    def _unindex(self, player: Player) -> None:
+        """Remove `player` from the lookup indexes."""
+        token, id, safe_name = self._keys.pop(player)
+
+        del self._by_token[token]
+        _index_remove(self._by_id, id, player)
+        _index_remove(self._by_name, safe_name, player)
+
+        self._staff.discard(player)
+        self._restricted.discard(player)
+        self._unrestricted.discard(player)
+
+    def _categorize(self, player: Player) -> None:
+        """Sort `player` into the staff & (un)restricted sets by privileges."""
+        if player.priv & Privileges.STAFF:
+            self._staff.add(player)
+        else:
+            self._staff.discard(player)
+
+        if player.priv & Privileges.UNRESTRICTED:
+            self._unrestricted.add(player)
+            self._restricted.discard(player)
+        else:
+            self._restricted.add(player)
+            self._unrestricted.discard(player)
+
+    def update_privs(self, player: Player) -> None:
+        """Re-sort `player` into the privilege sets after a change."""
+        if player in self._keys:
+            self._categorize(player)
+
     @property
     def ids(self) -> set[int]:
         """Return a set of the current ids in the list."""
-        return {p.id for p in self}
+        return set(self._by_id)
+
+    # XXX: the sets below are maintained as players log in & out, or
+    # have their privileges changed; they must not be modified directly.
 
     @property
     def staff(self) -> set[Player]:
         """Return a set of the current staff online."""
-        return {p for p in self if p.priv & Privileges.STAFF}
+        return self._staff
 
     @property
     def restricted(self) -> set[Player]:
         """Return a set of the current restricted players."""
-        return {p for p in self if not p.priv & Privileges.UNRESTRICTED}
+        return self._restricted
 
     @property
     def unrestricted(self) -> set[Player]:
         """Return a set of the current unrestricted players."""
-        return {p for p in self if p.priv & Privileges.UNRESTRICTED}
+        return self._unrestricted
 
     def enqueue(self, data: bytes, immune: Sequence[Player] = []) -> None:
         """Enqueue `data` to all players, except for those in `immune`."""
@@ -238,6 +595,11 @@ class Players(list[Player]):
             if player not in immune:
                 player.enqueue(data)
 
+    def broadcast_stats(self, player: Player) -> None:
+        """Broadcast `player`'s stats to all players, on the next flush."""
+        if not player.restricted:
+            self.stats_broadcaster.add(player)
+
     def get(
         self,
         token: str | None = None,
@@ -245,16 +607,12 @@ class Players(list[Player]):
         name: str | None = None,
     ) -> Player | None:
         """Get a player by token, id, or name from cache."""
-        for player in self:
-            if token is not None:
-                if player.token == token:
-                    return player
-            elif id is not None:
-                if player.id == id:
-                    return player
-            elif name is not None:
-                if player.safe_name == make_safe_name(name):
-                    return player
+        if token is not None:
+            return self._by_token.get(token)
+        elif id is not None:
+            return _index_get(self._by_id, id)
+        elif name is not None:
+            return _index_get(self._by_name, make_safe_name(name))
 
         return None
 
@@ -332,7 +690,7 @@ class Players(list[Player]):
 
         assert player.pw_bcrypt is not None
 
-        if app.state.cache.bcrypt[player.pw_bcrypt] == pw_md5.encode():
+        if await passwords_usecases.verify(pw_md5.encode(), player.pw_bcrypt):
             return player
 
         return None
@@ -345,6 +703,8 @@ class Players(list[Player]):
             return
 
         super().append(player)
+        self._index(player)
+        self.snapshot.add(player)
 
     def remove(self, player: Player) -> None:
         """Remove `p` from the list."""
@@ -354,11 +714,23 @@ class Players(list[Player]):
             return
 
         super().remove(player)
+        self._unindex(player)
+        self.snapshot.remove(player)
+        self.stats_broadcaster.discard(player)
 
 
 class MapPools(list[MapPool]):
     """The currently active mappools on the server."""
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        self._by_id: dict[int, list[MapPool]] = {}
+        self._by_name: dict[str, list[MapPool]] = {}
+
+        for mappool in self:
+            self._index(mappool)
+
     def __iter__(self) -> Iterator[MapPool]:
         return super().__iter__()
 
@@ -368,13 +740,10 @@ class MapPools(list[MapPool]):
         name: str | None = None,
     ) -> MapPool | None:
         """Get a mappool by id, or name from cache."""
-        for player in self:
-            if id is not None:
-                if player.id == id:
-                    return player
-            elif name is not None:
-                if player.name == name:
-                    return player
+        if id is not None:
+            return _index_get(self._by_id, id)
+        elif name is not None:
+            return _index_get(self._by_name, name)
 
         return None
 
@@ -382,35 +751,43 @@ class MapPools(list[MapPool]):
         """Check whether internal list contains `o`."""
         # Allow string to be passed to compare vs. name.
         if isinstance(o, str):
-            return o in (pool.name for pool in self)
+            return o in self._by_name
         else:
-            return o in self
+            return super().__contains__(o)
+
+    def _index(self, mappool: MapPool) -> None:
+        """Add `mappool` to the lookup indexes."""
+        _index_add(self._by_id, mappool.id, mappool)
+        _index_add(self._by_name, mappool.name, mappool)
 
     def get_by_name(self, name: str) -> MapPool | None:
         """Get a pool from the list by `name`."""
-        for player in self:
-            if player.name == name:
-                return player
-
-        return None
+        return _index_get(self._by_name, name)
 
     def append(self, mappool: MapPool) -> None:
         """Append `mappool` to the list."""
         super().append(mappool)
+        self._index(mappool)
 
         if app.settings.DEBUG:
             log(f"{mappool} added to mappools list.")
 
     def extend(self, mappools: Iterable[MapPool]) -> None:
         """Extend the list with `mappools`."""
+        mappools = list(mappools)
         super().extend(mappools)
 
+        for mappool in mappools:
+            self._index(mappool)
+
         if app.settings.DEBUG:
             log(f"{mappools} added to mappools list.")
 
     def remove(self, mappool: MapPool) -> None:
         """Remove `mappool` from the list."""
         super().remove(mappool)
+        _index_remove(self._by_id, mappool.id, mappool)
+        _index_remove(self._by_name, mappool.name, mappool)
 
         if app.settings.DEBUG:
             log(f"{mappool} removed from mappools list.")
@@ -438,6 +815,16 @@ class MapPools(list[MapPool]):
 class Clans(list[Clan]):
     """The currently active clans on the server."""
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        self._by_id: dict[int, list[Clan]] = {}
+        self._by_name: dict[str, list[Clan]] = {}
+        self._by_tag: dict[str, list[Clan]] = {}
+
+        for clan in self:
+            self._index(clan)
+
     def __iter__(self) -> Iterator[Clan]:
         return super().__iter__()
 
@@ -445,9 +832,15 @@ class Clans(list[Clan]):
         """Check whether internal list contains `o`."""
         # Allow string to be passed to compare vs. name.
         if isinstance(o, str):
-            return o in (clan.name for clan in self)
+            return o in self._by_name
         else:
-            return o in self
+            return super().__contains__(o)
+
+    def _index(self, clan: Clan) -> None:
+        """Add `clan` to the lookup indexes."""
+        _index_add(self._by_id, clan.id, clan)
+        _index_add(self._by_name, clan.name, clan)
+        _index_add(self._by_tag, clan.tag, clan)
 
     def get(
         self,
@@ -456,36 +849,40 @@ class Clans(list[Clan]):
         tag: str | None = None,
     ) -> Clan | None:
         """Get a clan by name, tag, or id."""
-        for clan in self:
-            if id is not None:
-                if clan.id == id:
-                    return clan
-            elif name is not None:
-                if clan.name == name:
-                    return clan
-            elif tag is not None:
-                if clan.tag == tag:
-                    return clan
+        if id is not None:
+            return _index_get(self._by_id, id)
+        elif name is not None:
+            return _index_get(self._by_name, name)
+        elif tag is not None:
+            return _index_get(self._by_tag, tag)
 
         return None
 
     def append(self, clan: Clan) -> None:
         """Append `clan` to the list."""
         super().append(clan)
+        self._index(clan)
 
         if app.settings.DEBUG:
             log(f"{clan} added to clans list.")
 
     def extend(self, clans: Iterable[Clan]) -> None:
         """Extend the list with `clans`."""
+        clans = list(clans)
         super().extend(clans)
 
+        for clan in clans:
+            self._index(clan)
+
         if app.settings.DEBUG:
             log(f"{clans} added to clans list.")
 
     def remove(self, clan: Clan) -> None:
         """Remove `clan` from the list."""
         super().remove(clan)
+        _index_remove(self._by_id, clan.id, clan)
+        _index_remove(self._by_name, clan.name, clan)
+        _index_remove(self._by_tag, clan.tag, clan)
 
         if app.settings.DEBUG:
             log(f"{clan} removed from clans list.")
@@ -513,6 +910,9 @@ async def initialize_ram_caches(db_conn: databases.core.Connection) -> None:
     await app.state.sessions.clans.prepare(db_conn)
     await app.state.sessions.pools.prepare(db_conn)
 
+    if app.settings.HARDWARE_INDEX_IN_MEMORY:
+        await app.state.sessions.hardware_index.prepare(db_conn)
+
     bot = await players_repo.fetch_one(id=1)
     if bot is None:
         raise RuntimeError("Bot account not found in database.")
@@ -35,7 +35,8 @@ class Group:
             lead.enqueue(app.packets.group_users(lead))
     
     def invite(self, player:Player):
-        self.invite.append(player)
+        self.invites.append(player)
+        app.state.sessions.groups.reindex(self)
         if (player.has_group_capability):
             player.enqueue(app.packets.group_invite(self.lead))
         else:
@@ -47,6 +48,7 @@ class Group:
     def add_player(self, player:Player):
         self.invites.remove(player)
         self.players.append(player)
+        app.state.sessions.groups.reindex(self)
         if (player.has_group_capability):
             player.enqueue(app.packets.group_join())
         for p in self.players:
@@ -59,6 +61,7 @@ class Group:
     def remove_user(self, player:Player, kick:bool=False):
         player.leave_channel(self.channel)
         self.players.remove(player)
+        app.state.sessions.groups.reindex(self)
         if player.has_group_capability:
             player.enqueue(app.packets.group_leave())
 
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+import databases.core
+
+from app.logging import Ansi
+from app.logging import log
+
+__all__ = ("HardwareIndex",)
+
+
+class HardwareIndex:
+    """\
+    An in-memory inverted index of the hardware hashes players have
+    logged in with (from `client_hashes`), to the ids of those players.
+
+    This lets logins check for other accounts on the same hardware with a
+    few set lookups, rather than a query; most players have no matches.
+    XXX: rows added to `client_hashes` outside of `add` (e.g. by hand)
+         aren't seen until the index is prepared again (on restart).
+
+    Intended Usage:
+    >>> hardware_index.add(3, adapters="...", uninstall_id="...", disk_serial="...")
+    >>> hardware_index.matches(4, adapters="...", uninstall_id="...", disk_serial=None)
+    {3}
+    """
+
+    def __init__(self) -> None:
+        self.adapters: defaultdict[str, set[int]] = defaultdict(set)
+        self.uninstall_ids: defaultdict[str, set[int]] = defaultdict(set)
+        self.disk_serials: defaultdict[str, set[int]] = defaultdict(set)
+
+    def __repr__(self) -> str:
+        return (
+            f"<HardwareIndex ({len(self.adapters)} adapters, "
+            f"{len(self.uninstall_ids)} uninstall ids, "
+            f"{len(self.disk_serials)} disk serials)>"
+        )
+
+    def add(
+        self,
+        user_id: int,
+        adapters: str,
+        uninstall_id: str,
+        disk_serial: str,
+    ) -> None:
+        """Record that a player has logged in with a set of hashes."""
+        self.adapters[adapters].add(user_id)
+        self.uninstall_ids[uninstall_id].add(user_id)
+        self.disk_serials[disk_serial].add(user_id)
+
+    def matches(
+        self,
+        user_id: int,
+        adapters: str | None,
+        uninstall_id: str,
+        disk_serial: str | None,
+    ) -> set[int]:
+        """\
+        Return the ids of other players who've logged in with any of
+        the given hashes (those which are `None` are not checked).
+        """
+        user_ids = set(self.uninstall_ids.get(uninstall_id, ()))
+
+        if adapters is not None:
+            user_ids.update(self.adapters.get(adapters, ()))
+
+        if disk_serial is not None:
+            user_ids.update(self.disk_serials.get(disk_serial, ()))
+
+        user_ids.discard(user_id)
+        return user_ids
+
+    async def prepare(self, db_conn: databases.core.Connection) -> None:
+        """Fetch all recorded hardware hashes from sql."""
+        log("Fetching client hashes from sql.", Ansi.LCYAN)
+        for row in await db_conn.fetch_all(
+            "SELECT userid, adapters, uninstall_id, disk_serial FROM client_hashes",
+        ):
+            self.add(
+                row["userid"],
+                row["adapters"],
+                row["uninstall_id"],
+                row["disk_serial"],
+            )
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import Any
+from typing import NamedTuple
+
+import app.state
+from app.objects.lru_cache import LRUCache
+
+__all__ = ("CachedLeaderboard", "LeaderboardKey", "LeaderboardCache")
+
+# (mode, leaderboard type, mods, country) - unused parts are zeroed.
+LeaderboardKey = tuple[int, int, int, str]
+
+
+class CachedLeaderboard(NamedTuple):
+    score_rows: list[dict[str, Any]]
+    score_lines: list[str]  # preformatted, for the osu! client
+
+
+class LeaderboardCache:
+    """\
+    A cache of maps' top scores leaderboards, by map md5 & leaderboard.
+
+    Each map's leaderboards are invalidated together, whenever its
+    scores change (e.g. new best scores, or a player's restriction).
+    XXX: leaderboards also expire after `ttl` seconds, for any changes
+         not invalidated explicitly (e.g. name or clan changes).
+
+    Leaderboards fetched before an invalidation of their map aren't cached,
+    so their (stale) scores don't outlive it; each map has a generation,
+    which is read before fetching & changes when the map is invalidated.
+
+    Attributes
+    -----------
+    hits, misses: `int`
+        The number of lookups which found (or didn't find) a leaderboard.
+
+    Intended Usage:
+    >>> leaderboard = leaderboard_cache.get(map_md5, key)
+    >>> if leaderboard is None:
+    ...     generation = leaderboard_cache.generation(map_md5)
+    ...     leaderboard = await fetch_leaderboard(...)
+    ...     leaderboard_cache.set(map_md5, key, leaderboard, generation)
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self._maps: LRUCache[str, dict[LeaderboardKey, CachedLeaderboard]] = LRUCache(
+            maxsize=maxsize,
+            ttl=ttl,
+        )
+
+        # the generations of the most recently invalidated maps, oldest
+        # first; the rest are at `_min_generation` (the newest forgotten).
+        # XXX: generations only increase, so forgetting a map's generation
+        #      may drop (but never keep) a write fetched before invalidation.
+        self._generations: dict[str, int] = {}
+        self._min_generation = 0
+        self._next_generation = 1
+
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"<LeaderboardCache ({len(self._maps)} maps)>"
+
+    def _record_lookup(self, result: str) -> None:
+        if app.state.services.datadog:
+            app.state.services.datadog.increment(
+                "bancho.leaderboard_cache.lookups",
+                tags=[f"result:{result}"],
+            )
+
+    def get(self, map_md5: str, key: LeaderboardKey) -> CachedLeaderboard | None:
+        """Get a cached leaderboard of a map, if it's cached."""
+        leaderboards = self._maps.get(map_md5)
+        leaderboard = leaderboards.get(key) if leaderboards is not None else None
+
+        if leaderboard is None:
+            self.misses += 1
+            self._record_lookup("miss")
+        else:
+            self.hits += 1
+            self._record_lookup("hit")
+
+        return leaderboard
+
+    def peek(self, map_md5: str, key: LeaderboardKey) -> CachedLeaderboard | None:
+        """Get a cached leaderboard of a map, without counting the lookup."""
+        leaderboards = self._maps.get(map_md5)
+        return leaderboards.get(key) if leaderboards is not None else None
+
+    def generation(self, map_md5: str) -> int:
+        """Get the generation of a map's leaderboards, for `set`."""
+        return self._generations.get(map_md5, self._min_generation)
+
+    def _new_generation(self) -> int:
+        generation = self._next_generation
+        self._next_generation += 1
+        return generation
+
+    def set(
+        self,
+        map_md5: str,
+        key: LeaderboardKey,
+        leaderboard: CachedLeaderboard,
+        generation: int,
+    ) -> None:
+        """\
+        Cache a leaderboard of a map, fetched at `generation`; if the map
+        has been invalidated since, the leaderboard may be stale & isn't.
+        """
+        if self.generation(map_md5) != generation:
+            return
+
+        leaderboards = self._maps.get(map_md5)
+        if leaderboards is None:
+            leaderboards = self._maps[map_md5] = {}
+
+        leaderboards[key] = leaderboard
+
+    def invalidate(self, map_md5: str) -> None:
+        """Invalidate all cached leaderboards of a map."""
+        self._maps.pop(map_md5, None)
+
+        # (moved to the end, to keep the generations in order)
+        self._generations.pop(map_md5, None)
+        self._generations[map_md5] = self._new_generation()
+
+        if len(self._generations) > self._maps.maxsize:
+            oldest_map_md5 = next(iter(self._generations))
+            self._min_generation = self._generations.pop(oldest_map_md5)
+
+    def clear(self) -> None:
+        """Invalidate all cached leaderboards."""
+        self._maps.clear()
+        self._generations.clear()
+        self._min_generation = self._new_generation()
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups which found a leaderboard."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Return the cache's size & lookup stats (e.g. for metrics)."""
+        return {
+            "size": len(self._maps),  # (maps)
+            "maxsize": self._maps.maxsize,
+            "ttl": self._maps.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._maps.evictions,
+            "hit_rate": self.hit_rate,
+        }
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from collections.abc import MutableMapping
+from typing import Any
+from typing import TypeVar
+
+__all__ = ("LRUCache",)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(MutableMapping[K, V]):
+    """\
+    A mapping bounded to `maxsize` items, evicting the least recently
+    used item when full, & optionally expiring items after `ttl` seconds.
+
+    Lookups are counted, so the cache's effectiveness can be monitored.
+    XXX: expired items are only removed once looked up, or evicted.
+
+    Attributes
+    -----------
+    maxsize: `int`
+        The maximum number of items held.
+
+    ttl: `float | None`
+        The number of seconds items are held for, if they expire.
+
+    hits, misses, evictions: `int`
+        The number of lookups which found (or didn't find)
+        an item, & the number of items evicted when full.
+
+    Intended Usage:
+    >>> cache: LRUCache[str, IPAddress] = LRUCache(maxsize=2)
+    >>> cache["1.1.1.1"] = ipaddress.ip_address("1.1.1.1")
+    >>> cache.get("1.1.1.1")
+    IPv4Address('1.1.1.1')
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # {key: (value, expires_at), ...}, least recently used first.
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"<LRUCache ({len(self)}/{self.maxsize} items)>"
+
+    def __getitem__(self, key: K) -> V:
+        try:
+            value, expires_at = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            raise KeyError(key)
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __delitem__(self, key: K) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]  # type: ignore[index]
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups which found an item."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Return the cache's size & lookup stats (e.g. for metrics)."""
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
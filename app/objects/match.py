@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 from collections import defaultdict
 from collections.abc import Sequence
 from datetime import datetime as datetime
 from datetime import timedelta as timedelta
 from enum import IntEnum
 from enum import unique
+from typing import Any
 from typing import TYPE_CHECKING
 from typing import TypedDict
 
@@ -142,9 +144,44 @@ class MapPool:
             self.maps[key] = bmap
 
 
+# versions for the serialized state of matches & their slots; these
+# are drawn from a single counter, so they're unique across objects.
+_state_versions = itertools.count(1)
+
+# the attributes of slots & matches serialized by `app.packets.write_match`.
+_SLOT_STATE_ATTRS = frozenset(("player", "status", "team", "mods"))
+_MATCH_STATE_ATTRS = frozenset(
+    (
+        "id",
+        "in_progress",
+        "mods",
+        "name",
+        "passwd",
+        "map_name",
+        "map_id",
+        "map_md5",
+        "slots",
+        "host_id",
+        "mode",
+        "win_condition",
+        "team_type",
+        "freemods",
+        "seed",
+    ),
+)
+
+
 class Slot:
     """An individual player slot in an osu! multiplayer match."""
 
+    version = 0  # bumped whenever the slot's serialized state changes
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+
+        if name in _SLOT_STATE_ATTRS:
+            super().__setattr__("version", next(_state_versions))
+
     def __init__(self) -> None:
         self.player: Player | None = None
         self.status = SlotStatus.open
@@ -199,8 +236,20 @@ class Match:
 
     use_pp_scoring: `bool`
         Whether pp should be used as a win condition override during scrims.
+
+    state_version: `int`
+        Changes whenever the match's serialized state (see `state_data`)
+        changes, so it's only written again after it's been modified.
     """
 
+    _version = 0  # bumped whenever the match's serialized state changes
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+
+        if name in _MATCH_STATE_ATTRS:
+            super().__setattr__("_version", next(_state_versions))
+
     def __init__(
         self,
         id: int,
@@ -257,6 +306,10 @@ class Match:
 
         self.tourney_clients: set[int] = set()  # player ids
 
+        # `state_data` for the current `state_version`, by send_pw
+        self._state_cache: dict[bool, bytes] = {}
+        self._state_cache_version = 0
+
     @property  # TODO: test cache speed
     def host(self) -> Player:
         player = app.state.sessions.players.get(id=self.host_id)
@@ -296,6 +349,26 @@ class Match:
     def __repr__(self) -> str:
         return f"<{self.name} ({self.id})>"
 
+    @property
+    def state_version(self) -> int:
+        """The version of the match's serialized state."""
+        return max(self._version, max(s.version for s in self.slots))
+
+    def state_data(self, send_pw: bool = True) -> bytes:
+        """`self` serialized for osu!, cached until its state changes."""
+        version = self.state_version
+
+        if version != self._state_cache_version:
+            self._state_cache.clear()
+            self._state_cache_version = version
+
+        data = self._state_cache.get(send_pw)
+        if data is None:
+            data = bytes(app.packets.write_match(self, send_pw))
+            self._state_cache[send_pw] = data
+
+        return data
+
     def get_slot(self, player: Player) -> Slot | None:
         """Return the slot containing a given player."""
         for s in self.slots:
@@ -355,14 +428,13 @@ class Match:
 
     def enqueue_state(self, lobby: bool = True) -> None:
         """Enqueue `self`'s state to players in the match & lobby."""
-        # TODO: hmm this is pretty bad, writes twice
-
         # send password only to users currently in the match.
         self.chat.enqueue(app.packets.update_match(self, send_pw=True))
 
-        lchan = app.state.sessions.channels.get_by_name("#lobby")
-        if lobby and lchan and lchan.players:
-            lchan.enqueue(app.packets.update_match(self, send_pw=False))
+        if lobby:
+            # XXX: the lobby is sent the match's state once the current
+            # handler yields, so many changes are only broadcast once.
+            app.state.sessions.matches.enqueue_lobby_state(self)
 
     def unready_players(self, expected: SlotStatus = SlotStatus.ready) -> None:
         """Unready any players in the `expected` state."""
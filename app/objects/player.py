@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import time
 import uuid
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import date
 from enum import Enum
@@ -20,6 +21,7 @@ import databases.core
 import app.packets
 import app.settings
 import app.state
+import app.usecases.map_leaderboards
 from app._typing import IPAddress
 from app.constants.gamemodes import GameMode
 from app.constants.mods import Mods
@@ -140,6 +142,11 @@ class OsuVersion:
         self.revision = revision
         self.stream = stream
 
+    def __str__(self) -> str:
+        revision = f".{self.revision}" if self.revision is not None else ""
+        stream = self.stream.value if self.stream is not OsuStream.STABLE else ""
+        return f"b{self.date:%Y%m%d}{revision}{stream}"
+
 
 class ClientDetails:
     def __init__(
@@ -201,11 +208,24 @@ class Player:
     tourney_client: `bool`
         Whether this is a management/spectator tourney client.
 
-    _queue: `bytearray`
-        Bytes enqueued to the player which will be transmitted
+    _queue: `list[bytes]`
+        Packets enqueued to the player which will be transmitted
         at the tail end of their next connection to the server.
         XXX: cls.enqueue() will add data to this queue, and
              cls.dequeue() will return the data, and remove it.
+             packets are stored by reference (broadcasts share a
+             single bytes object), and only joined on dequeue.
+
+    queue_overflowed: `bool`
+        Whether the player's queue exceeded `PLAYER_QUEUE_MAX_SIZE`
+        and was dropped; they must be logged out and reconnect.
+
+    presence_packet & stats_packet: `bytes`
+        The player's serialized user presence & stats packets.
+        XXX: these are cached until the data they're built from changes;
+             cls.invalidate_presence() & cls.invalidate_stats() must be
+             called after modifying the player's status, stats, privileges,
+             geolocation, or name.
     """
 
     def __init__(
@@ -293,15 +313,15 @@ class Player:
         # although if anything, bot accounts will
         # probably just use the /api/ routes?
         self.bot_client = extras.get("bot_client", False)
-        if self.bot_client:
-            self.enqueue = lambda data: None  # type: ignore
 
         self.tourney_client = extras.get("tourney_client", False)
 
         self.api_key = extras.get("api_key", None)
 
         # packet queue
-        self._queue = bytearray()
+        self._queue: list[bytes] = []
+        self.queue_size = 0  # bytes
+        self.queue_overflowed = False
 
     def __repr__(self) -> str:
         return f"<{self.name} ({self.id})>"
@@ -361,6 +381,29 @@ class Player:
             ret |= ClientPrivileges.OWNER
         return ret
 
+    @cached_property
+    def presence_packet(self) -> bytes:
+        """The player's user presence packet."""
+        return app.packets.user_presence(self)
+
+    @cached_property
+    def stats_packet(self) -> bytes:
+        """The player's user stats packet."""
+        return app.packets.user_stats(self)
+
+    def invalidate_presence(self) -> None:
+        """Wipe `self`'s cached user presence packet."""
+        self.__dict__.pop("presence_packet", None)
+        app.state.sessions.players.snapshot.invalidate(self)
+
+    def invalidate_stats(self) -> None:
+        """Wipe `self`'s cached user stats (and presence) packets."""
+        # the presence packet also contains the
+        # player's current mode & global rank.
+        self.__dict__.pop("stats_packet", None)
+        self.__dict__.pop("presence_packet", None)
+        app.state.sessions.players.snapshot.invalidate(self)
+
     @property
     def restricted(self) -> bool:
         """Return whether the player is restricted."""
@@ -455,6 +498,9 @@ class Player:
         if "bancho_priv" in self.__dict__:
             del self.bancho_priv  # wipe cached_property
 
+        self.invalidate_presence()
+        app.state.sessions.players.update_privs(self)
+
     async def add_privs(self, bits: Privileges) -> None:
         """Update `self`'s privileges, adding `bits`."""
         self.priv |= bits
@@ -467,6 +513,9 @@ class Player:
         if "bancho_priv" in self.__dict__:
             del self.bancho_priv  # wipe cached_property
 
+        self.invalidate_presence()
+        app.state.sessions.players.update_privs(self)
+
         if self.is_online:
             # if they're online, send a packet
             # to update their client-side privileges
@@ -484,6 +533,9 @@ class Player:
         if "bancho_priv" in self.__dict__:
             del self.bancho_priv  # wipe cached_property
 
+        self.invalidate_presence()
+        app.state.sessions.players.update_privs(self)
+
         if self.is_online:
             # if they're online, send a packet
             # to update their client-side privileges
@@ -510,6 +562,9 @@ class Player:
                 self.id,
             )
 
+        # remove their scores from maps' leaderboards
+        await app.usecases.map_leaderboards.update_player(self.id, restricted=True)
+
         log_msg = f"{admin} restricted {self} for: {reason}."
 
         log(log_msg, Ansi.LRED)
@@ -548,6 +603,9 @@ class Player:
                 {str(self.id): stats.pp},
             )
 
+        # add their scores back to maps' leaderboards
+        await app.usecases.map_leaderboards.update_player(self.id, restricted=False)
+
         log_msg = f"{admin} unrestricted {self} for: {reason}."
 
         log(log_msg, Ansi.LRED)
@@ -974,6 +1032,18 @@ class Player:
         )
         return cast(int, rank) + 1 if rank is not None else 0
 
+    async def get_global_ranks(self, modes: Sequence[GameMode]) -> list[int]:
+        """Return `self`'s global ranks in `modes`, in a single round trip."""
+        if self.restricted or not modes:
+            return [0] * len(modes)
+
+        pipe = app.state.services.redis.pipeline(transaction=False)
+        for mode in modes:
+            pipe.zrevrank(f"bancho:leaderboard:{mode.value}", str(self.id))
+
+        ranks = await pipe.execute()
+        return [rank + 1 if rank is not None else 0 for rank in ranks]
+
     async def get_country_rank(self, mode: GameMode) -> int:
         if self.restricted:
             return 0
@@ -1007,8 +1077,11 @@ class Player:
 
     async def stats_from_sql_full(self, db_conn: databases.core.Connection) -> None:
         """Retrieve `self`'s stats (all modes) from sql."""
-        for row in await stats_repo.fetch_many(player_id=self.id):
-            game_mode = GameMode(row["mode"])
+        rows = await stats_repo.fetch_many(player_id=self.id)
+        game_modes = [GameMode(row["mode"]) for row in rows]
+        ranks = await self.get_global_ranks(game_modes)
+
+        for row, game_mode, rank in zip(rows, game_modes, ranks):
             self.stats[game_mode] = ModeData(
                 tscore=row["tscore"],
                 rscore=row["rscore"],
@@ -1018,7 +1091,7 @@ class Player:
                 playtime=row["playtime"],
                 max_combo=row["max_combo"],
                 total_hits=row["total_hits"],
-                rank=await self.get_global_rank(game_mode),
+                rank=rank,
                 grades={
                     Grade.XH: row["xh_count"],
                     Grade.X: row["x_count"],
@@ -1028,6 +1101,8 @@ class Player:
                 },
             )
 
+        self.invalidate_stats()
+
     def update_latest_activity_soon(self) -> None:
         """Update the player's latest activity in the database."""
         task = app.state.services.database.execute(
@@ -1037,14 +1112,38 @@ class Player:
         app.state.loop.create_task(task)
 
     def enqueue(self, data: bytes) -> None:
-        """Add data to be sent to the client."""
-        self._queue += data
+        """Add data to be sent to the client.
+
+        XXX: `data` is queued by reference, and must not be mutated.
+        """
+        if self.bot_client:
+            # bots have no client to read their queue.
+            return
+
+        self._queue.append(data)
+        self.queue_size += len(data)
+
+        if self.queue_size > app.settings.PLAYER_QUEUE_MAX_SIZE:
+            # the client isn't reading its queue fast enough (or at all);
+            # rather than buffering indefinitely, drop everything queued.
+            # they'll be logged out & resynced on their next request.
+            self._queue.clear()
+            self.queue_size = 0
+
+            if not self.queue_overflowed:
+                self.queue_overflowed = True
+
+                log(f"{self}'s packet queue overflowed; dropping it.", Ansi.LYELLOW)
+
+                if app.state.services.datadog:
+                    app.state.services.datadog.increment("bancho.queue_overflows")
 
     def dequeue(self) -> bytes | None:
         """Get data from the queue to send to the client."""
         if self._queue:
-            data = bytes(self._queue)
+            data = b"".join(self._queue)
             self._queue.clear()
+            self.queue_size = 0
             return data
 
         return None
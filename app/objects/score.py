@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 
 import app.state
+import app.usecases.map_leaderboards
 import app.usecases.performance
 import app.utils
 from app.constants.clientflags import ClientFlags
@@ -297,27 +298,15 @@ class Score:
         assert self.bmap is not None
 
         if self.mode >= GameMode.RELAX_OSU:
-            scoring_metric = "pp"
             score = self.pp
         else:
-            scoring_metric = "score"
             score = self.score
 
-        num_better_scores: int | None = await app.state.services.database.fetch_val(
-            "SELECT COUNT(*) AS c FROM scores s "
-            "INNER JOIN users u ON u.id = s.userid "
-            "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-            "AND s.status = 2 AND u.priv & 1 "
-            f"AND s.{scoring_metric} > :score",
-            {
-                "map_md5": self.bmap.md5,
-                "mode": self.mode,
-                "score": score,
-            },
-            column=0,  # COUNT(*)
+        return await app.usecases.map_leaderboards.fetch_rank(
+            self.bmap.md5,
+            self.mode,
+            score,
         )
-        assert num_better_scores is not None
-        return num_better_scores + 1
 
     def calculate_performance(self, osu_file_path: Path) -> tuple[float, float]:
         """Calculate PP and star rating for our score."""
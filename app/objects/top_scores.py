@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import bisect
+from array import array
+from collections.abc import Iterable
+
+__all__ = ("TopScores", "calculate_weighted_stats")
+
+# the weight of a player's nth best score is 0.95^n, so scores beyond the
+# top 1000 add (at most) 0.95^1000 ≈ 5e-23 of their pp; they're not kept.
+TOP_SCORES_LIMIT = 1000
+
+
+def calculate_weighted_stats(
+    scores: Iterable[tuple[float, float]],
+    count: int,
+) -> tuple[float, int]:
+    """\
+    Calculate a player's total weighted accuracy & pp from their
+    best scores' (pp, acc), sorted by pp, & their number of bests.
+    """
+    if count == 0:
+        return 0.0, 0
+
+    weighted_acc = 0.0
+    weighted_pp = 0.0
+    for i, (pp, acc) in enumerate(scores):
+        weighted_acc += acc * 0.95**i
+        weighted_pp += pp * 0.95**i
+
+    bonus_acc = 100.0 / (20 * (1 - 0.95**count))
+    bonus_pp = 416.6667 * (1 - 0.9994**count)
+    return (weighted_acc * bonus_acc) / 100, round(weighted_pp + bonus_pp)
+
+
+class TopScores:
+    """\
+    A player's best scores in a mode on ranked & approved maps, from which
+    their total weighted accuracy & pp are calculated.
+
+    Only the top `limit` scores (by pp, then id) are held, along with the
+    total number of best scores (for bonus pp); the structure is updated
+    incrementally as the player submits new best scores.
+
+    Attributes
+    -----------
+    count: `int`
+        The player's total number of best scores.
+
+    limit: `int`
+        The maximum number of scores held.
+
+    Intended Usage:
+    >>> top_scores = TopScores([(1, 727.0, 98.5)], count=1)
+    >>> top_scores.replace(2, pp=800.0, acc=99.0, prev_best_id=None)
+    True
+    >>> top_scores.stats
+    (98.756..., 1491)
+    """
+
+    def __init__(
+        self,
+        scores: Iterable[tuple[int, float, float]],  # (id, pp, acc), by pp
+        count: int,
+        limit: int = TOP_SCORES_LIMIT,
+    ) -> None:
+        self.count = count
+        self.limit = limit
+
+        # parallel arrays sorted by (-pp, id), to keep them compact.
+        self._neg_pps = array("d")
+        self._ids = array("q")
+        self._accs = array("d")
+
+        for score_id, pp, acc in scores:
+            self._insert(score_id, pp, acc)
+
+        del self._neg_pps[limit:], self._ids[limit:], self._accs[limit:]
+
+    def __repr__(self) -> str:
+        return f"<TopScores ({len(self)}/{self.count} scores)>"
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def complete(self) -> bool:
+        """Whether all of the top `limit` scores are known."""
+        return len(self) == min(self.count, self.limit)
+
+    @property
+    def stats(self) -> tuple[float, int]:
+        """The player's total weighted accuracy & pp."""
+        return calculate_weighted_stats(
+            zip((-neg_pp for neg_pp in self._neg_pps), self._accs),
+            self.count,
+        )
+
+    def _insert(self, score_id: int, pp: float, acc: float) -> None:
+        # find the range of scores with the same pp, & order them by id.
+        lo = bisect.bisect_left(self._neg_pps, -pp)
+        hi = bisect.bisect_right(self._neg_pps, -pp, lo)
+        idx = bisect.bisect_left(self._ids, score_id, lo, hi)
+
+        self._neg_pps.insert(idx, -pp)
+        self._ids.insert(idx, score_id)
+        self._accs.insert(idx, acc)
+
+    def _remove(self, score_id: int) -> bool:
+        try:
+            idx = self._ids.index(score_id)
+        except ValueError:
+            return False
+
+        del self._neg_pps[idx], self._ids[idx], self._accs[idx]
+        return True
+
+    def replace(
+        self,
+        score_id: int,
+        pp: float,
+        acc: float,
+        prev_best_id: int | None,
+    ) -> bool:
+        """\
+        Add a new best score, replacing the player's previous best on the map.
+
+        Return whether the top scores are still complete; they won't be if
+        a score must be replaced by one beyond the top `limit` (which isn't
+        held), in which case they should be fetched again.
+        """
+        if prev_best_id is not None:
+            self.count -= 1
+            self._remove(prev_best_id)
+
+            if not self.complete:
+                return False
+
+        self.count += 1
+
+        if len(self) < self.limit:
+            self._insert(score_id, pp, acc)
+        elif (-pp, score_id) < (self._neg_pps[-1], self._ids[-1]):
+            self._insert(score_id, pp, acc)
+            del self._neg_pps[-1], self._ids[-1], self._accs[-1]
+
+        return True
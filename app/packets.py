@@ -276,6 +276,28 @@ class ReplayFrameBundle(NamedTuple):
     raw_data: memoryview  # readonly
 
 
+class RawReplayFrameBundle(NamedTuple):
+    """\
+    A replay frame bundle whose header & length have been validated,
+    but whose frames are only decoded on demand (see `decode`).
+
+    Spectator frames are the highest-rate packets we receive, and are
+    usually just forwarded to spectators as is; decoding them is left
+    to consumers which need the frames themselves (e.g. anti-cheat).
+    """
+
+    extra: int
+    frame_count: int
+
+    raw_data: memoryview  # readonly
+
+    def decode(self) -> ReplayFrameBundle:
+        """Decode the bundle's frames, raising on malformed data."""
+        reader = BanchoPacketReader(self.raw_data, [])
+        reader.current_len = len(self.raw_data)
+        return reader.read_replayframe_bundle()
+
+
 @dataclass
 class MultiplayerMatch:
     id: int = 0
@@ -316,6 +338,34 @@ class BasePacket(ABC):
 
 
 PacketMap = dict[ClientPackets, type[BasePacket]]
+PacketTable = list[type[BasePacket] | None]  # indexed by raw packet id
+
+
+def compile_packet_table(packet_map: PacketMap) -> PacketTable:
+    """Compile `packet_map` into a dense table indexed by raw packet id."""
+    table: PacketTable = [None] * (max(packet_map, default=-1) + 1)
+
+    for packet_id, packet_cls in packet_map.items():
+        table[packet_id] = packet_cls
+
+    return table
+
+
+# precompiled formats for the fixed-width fields read from client packets;
+# these are unpacked in-place at the reader's offset, avoiding any slicing.
+_HEADER_FMT = struct.Struct("<HxI")
+_I8_FMT = struct.Struct("<b")
+_I16_FMT = struct.Struct("<h")
+_U16_FMT = struct.Struct("<H")
+_I32_FMT = struct.Struct("<i")
+_U32_FMT = struct.Struct("<I")
+_I64_FMT = struct.Struct("<q")
+_U64_FMT = struct.Struct("<Q")
+_F16_FMT = struct.Struct("<e")
+_F32_FMT = struct.Struct("<f")
+_F64_FMT = struct.Struct("<d")
+_REPLAYFRAME_FMT = struct.Struct("<BBffi")
+_REPLAYFRAME_BUNDLE_HEADER_FMT = struct.Struct("<iH")  # extra, frame count
 
 
 class BanchoPacketReader:
@@ -328,122 +378,140 @@ class BanchoPacketReader:
     body_view: `memoryview`
         A readonly view of the request's body.
 
-    packet_map: `dict[ClientPackets, BasePacket]`
-        The map of registered packets the reader may handle.
+    packet_table: `list[type[BasePacket] | None]`
+        The registered packets the reader may handle, indexed by
+        raw packet id (see `compile_packet_table`).
+
+    unhandled: list[int]
+        The raw ids of packets skipped by the reader, either
+        because they're unknown or have no handler registered.
 
     current_length: int
         The length in bytes of the packet currently being handled.
 
+    offset: int
+        The reader's current position within `body_view`.
+        XXX: all reads are performed in-place at this offset,
+             so no intermediate views are created per field.
+
     Intended Usage:
     >>> with memoryview(await request.body()) as body_view:
-    ...     for packet in BanchoPacketReader(conn.body):
+    ...     for packet in BanchoPacketReader(body_view, packet_table):
     ...         await packet.handle()
     """
 
-    def __init__(self, body_view: memoryview, packet_map: PacketMap) -> None:
+    def __init__(self, body_view: memoryview, packet_table: PacketTable) -> None:
         self.body_view = body_view  # readonly
-        self.packet_map = packet_map
+        self.packet_table = packet_table
+        self.unhandled: list[int] = []
 
+        self.offset = 0  # current position in the body
         self.current_len = 0  # last read packet's length
 
     def __iter__(self) -> Iterator[BasePacket]:
         return self
 
     def __next__(self) -> BasePacket:
+        packet_table = self.packet_table
+
         # do not break until we've read the
         # header of a packet we can handle.
-        while self.body_view:  # len(self.view) < 7?
+        # XXX: a truncated header (less than 7 bytes remaining) ends the body.
+        while self.offset + 7 <= len(self.body_view):
             p_type, p_len = self._read_header()
 
-            if p_type not in self.packet_map:
-                # packet type not handled, remove
-                # from internal buffer and continue.
-                if p_len != 0:
-                    self.body_view = self.body_view[p_len:]
-            else:
-                # we can handle this one.
-                break
+            # XXX: ids are looked up raw, so unknown ids (such as ones
+            # from newer clients) are skipped rather than raising.
+            if p_type < len(packet_table):
+                packet_cls = packet_table[p_type]
+
+                if packet_cls is not None:
+                    # we can handle this one.
+                    break
+
+            # packet type not handled, skip
+            # over its data and continue.
+            self.unhandled.append(p_type)
+            self.offset += p_len
         else:
             raise StopIteration
 
         # we have a packet handler for this.
-        packet_cls = self.packet_map[p_type]
         self.current_len = p_len
 
         return packet_cls(self)
 
-    def _read_header(self) -> tuple[ClientPackets, int]:
-        """Read the header of an osu! packet (id & length)."""
+    def _read_header(self) -> tuple[int, int]:
+        """Read the header of an osu! packet (raw id & length)."""
         # read type & length from the body
-        
-        data = struct.unpack("<HxI", self.body_view[:7])
-        self.body_view = self.body_view[7:]
-        return ClientPackets(data[0]), data[1]
+        p_type, p_len = _HEADER_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 7
+        return p_type, p_len
 
     """ public API (exposed for packet handler's __init__ methods) """
 
     def read_raw(self) -> memoryview:
-        val = self.body_view[: self.current_len]
-        self.body_view = self.body_view[self.current_len :]
-        return val
+        start = self.offset
+        self.offset += self.current_len
+        return self.body_view[start : self.offset]
 
     # integral types
 
     def read_i8(self) -> int:
-        val = self.body_view[0]
-        self.body_view = self.body_view[1:]
-        return val - 256 if val > 127 else val
+        (val,) = _I8_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 1
+        return cast(int, val)
 
     def read_u8(self) -> int:
-        val = self.body_view[0]
-        self.body_view = self.body_view[1:]
+        val = self.body_view[self.offset]
+        self.offset += 1
         return val
 
     def read_i16(self) -> int:
-        val = int.from_bytes(self.body_view[:2], "little", signed=True)
-        self.body_view = self.body_view[2:]
-        return val
+        (val,) = _I16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
+        return cast(int, val)
 
     def read_u16(self) -> int:
-        val = int.from_bytes(self.body_view[:2], "little", signed=False)
-        self.body_view = self.body_view[2:]
-        return val
+        (val,) = _U16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
+        return cast(int, val)
 
     def read_i32(self) -> int:
-        val = int.from_bytes(self.body_view[:4], "little", signed=True)
-        self.body_view = self.body_view[4:]
-        return val
+        (val,) = _I32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
+        return cast(int, val)
 
     def read_u32(self) -> int:
-        val = int.from_bytes(self.body_view[:4], "little", signed=False)
-        self.body_view = self.body_view[4:]
-        return val
+        (val,) = _U32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
+        return cast(int, val)
 
     def read_i64(self) -> int:
-        val = int.from_bytes(self.body_view[:8], "little", signed=True)
-        self.body_view = self.body_view[8:]
-        return val
+        (val,) = _I64_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 8
+        return cast(int, val)
 
     def read_u64(self) -> int:
-        val = int.from_bytes(self.body_view[:8], "little", signed=False)
-        self.body_view = self.body_view[8:]
-        return val
+        (val,) = _U64_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 8
+        return cast(int, val)
 
     # floating-point types
 
     def read_f16(self) -> float:
-        (val,) = struct.unpack_from("<e", self.body_view[:2])
-        self.body_view = self.body_view[2:]
+        (val,) = _F16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
         return cast(float, val)
 
     def read_f32(self) -> float:
-        (val,) = struct.unpack_from("<f", self.body_view[:4])
-        self.body_view = self.body_view[4:]
+        (val,) = _F32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
         return cast(float, val)
 
     def read_f64(self) -> float:
-        (val,) = struct.unpack_from("<d", self.body_view[:8])
-        self.body_view = self.body_view[8:]
+        (val,) = _F64_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 8
         return cast(float, val)
 
     # complex types
@@ -451,35 +519,39 @@ class BanchoPacketReader:
     # XXX: some osu! packets use i16 for
     # array length, while others use i32
     def read_i32_list_i16l(self) -> tuple[int, ...]:
-        length = int.from_bytes(self.body_view[:2], "little")
-        self.body_view = self.body_view[2:]
+        (length,) = _U16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
 
-        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
-        self.body_view = self.body_view[length * 4 :]
+        val = struct.unpack_from(f"<{length}I", self.body_view, self.offset)
+        self.offset += length * 4
         return val
 
     def read_i32_list_i32l(self) -> tuple[int, ...]:
-        length = int.from_bytes(self.body_view[:4], "little")
-        self.body_view = self.body_view[4:]
+        (length,) = _U32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
 
-        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
-        self.body_view = self.body_view[length * 4 :]
+        val = struct.unpack_from(f"<{length}I", self.body_view, self.offset)
+        self.offset += length * 4
         return val
 
     def read_string(self) -> str:
-        exists = self.body_view[0] == 0x0B
-        self.body_view = self.body_view[1:]
+        view = self.body_view
+        offset = self.offset
+
+        exists = view[offset] == 0x0B
+        offset += 1
 
         if not exists:
             # no string sent.
+            self.offset = offset
             return ""
 
         # non-empty string, decode str length (uleb128)
         length = shift = 0
 
         while True:
-            byte = self.body_view[0]
-            self.body_view = self.body_view[1:]
+            byte = view[offset]
+            offset += 1
 
             length |= (byte & 0x7F) << shift
             if (byte & 0x80) == 0:
@@ -487,8 +559,8 @@ class BanchoPacketReader:
 
             shift += 7
 
-        val = self.body_view[:length].tobytes().decode()  # copy
-        self.body_view = self.body_view[length:]
+        val = str(view[offset : offset + length], "utf-8")
+        self.offset = offset + length
         return val
 
     # custom osu! types
@@ -545,8 +617,8 @@ class BanchoPacketReader:
         return match
 
     def read_scoreframe(self) -> ScoreFrame:
-        sf = ScoreFrame(*SCOREFRAME_FMT.unpack_from(self.body_view[:29]))
-        self.body_view = self.body_view[29:]
+        sf = ScoreFrame(*SCOREFRAME_FMT.unpack_from(self.body_view, self.offset))
+        self.offset += SCOREFRAME_FMT.size
 
         if sf.score_v2:
             sf.combo_portion = self.read_f64()
@@ -555,17 +627,15 @@ class BanchoPacketReader:
         return sf
 
     def read_replayframe(self) -> ReplayFrame:
-        return ReplayFrame(
-            button_state=self.read_u8(),
-            taiko_byte=self.read_u8(),  # pre-taiko support (<=2008)
-            x=self.read_f32(),
-            y=self.read_f32(),
-            time=self.read_i32(),
+        frame = ReplayFrame._make(
+            _REPLAYFRAME_FMT.unpack_from(self.body_view, self.offset),
         )
+        self.offset += _REPLAYFRAME_FMT.size
+        return frame
 
     def read_replayframe_bundle(self) -> ReplayFrameBundle:
         # save raw format to distribute to the other clients
-        raw_data = self.body_view[: self.current_len]
+        raw_data = self.body_view[self.offset : self.offset + self.current_len]
 
         extra = self.read_i32()  # bancho proto >= 18
         framecount = self.read_u16()
@@ -576,6 +646,34 @@ class BanchoPacketReader:
 
         return ReplayFrameBundle(frames, scoreframe, action, extra, sequence, raw_data)
 
+    def read_raw_replayframe_bundle(self) -> RawReplayFrameBundle | None:
+        """\
+        Read a replay frame bundle without decoding its frames.
+
+        Only the header is read, & the length is validated against the
+        frame count; returns `None` if the bundle is malformed.
+        """
+        start = self.offset
+        raw_data = self.body_view[start : start + self.current_len]
+        self.offset = start + self.current_len  # skip the whole bundle
+
+        if len(raw_data) < _REPLAYFRAME_BUNDLE_HEADER_FMT.size:
+            return None
+
+        extra, frame_count = _REPLAYFRAME_BUNDLE_HEADER_FMT.unpack_from(raw_data)
+
+        min_len = (
+            _REPLAYFRAME_BUNDLE_HEADER_FMT.size
+            + frame_count * _REPLAYFRAME_FMT.size
+            + 1  # action
+            + SCOREFRAME_FMT.size
+            + 2  # sequence
+        )
+        if len(raw_data) < min_len:
+            return None
+
+        return RawReplayFrameBundle(extra, frame_count, raw_data)
+
 
 # write functions
 
@@ -596,25 +694,28 @@ def write_uleb128(num: int) -> bytes | bytearray:
     return ret
 
 
+# the vast majority of strings sent are shorter than 128 bytes,
+# so their (single byte) uleb128 length prefixes are prebuilt.
+_SHORT_STRING_PREFIXES = tuple(b"\x0b" + bytes((length,)) for length in range(0x80))
+
+
 def write_string(s: str) -> bytes:
     """Write `s` into bytes (ULEB128 & string)."""
-    if s:
-        encoded = s.encode()
-        ret = b"\x0b" + write_uleb128(len(encoded)) + encoded
-    else:
-        ret = b"\x00"
-
-    return ret
+    if not s:
+        return b"\x00"
 
+    encoded = s.encode()
+    length = len(encoded)
 
-def write_i32_list(l: Collection[int]) -> bytearray:
-    """Write `l` into bytes (int32 list)."""
-    ret = bytearray(len(l).to_bytes(2, "little"))
+    if length < 0x80:
+        return _SHORT_STRING_PREFIXES[length] + encoded
+    else:
+        return b"\x0b" + write_uleb128(length) + encoded
 
-    for i in l:
-        ret += i.to_bytes(4, "little", signed=True)
 
-    return ret
+def write_i32_list(l: Collection[int]) -> bytes:
+    """Write `l` into bytes (int32 list)."""
+    return struct.pack(f"<H{len(l)}i", len(l), *l)
 
 
 def write_message(sender: str, msg: str, recipient: str, sender_id: int) -> bytearray:
@@ -742,8 +843,12 @@ _expand_types: dict[osuTypes, Callable[..., bytearray]] = {
 
 
 def write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
-    """Write `args` into bytes."""
-    ret = bytearray(struct.pack("<Hx", packid))
+    """Write `args` into bytes.
+
+    XXX: this is the generic (slow) path; the packets below
+         are written by layouts compiled with `compile_packet`.
+    """
+    ret = bytearray()
 
     for p_args, p_type in args:
         if p_type == osuTypes.raw:
@@ -753,9 +858,105 @@ def write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
         elif p_type in _expand_types:
             ret += _expand_types[p_type](*p_args)
 
-    # add size
-    ret[3:3] = struct.pack("<I", len(ret) - 3)
-    return bytes(ret)
+    return _HEADER_FMT.pack(packid, len(ret)) + ret
+
+
+_FIXED_WIDTH_FORMATS: dict[osuTypes, str] = {
+    osuTypes.i8: "b",
+    osuTypes.u8: "B",
+    osuTypes.i16: "h",
+    osuTypes.u16: "H",
+    osuTypes.i32: "i",
+    osuTypes.u32: "I",
+    osuTypes.f32: "f",
+    osuTypes.i64: "q",
+    osuTypes.u64: "Q",
+    osuTypes.f64: "d",
+}
+
+
+def _write_raw(data: bytes) -> bytes:
+    return data
+
+
+_VARIABLE_WIDTH_WRITERS: dict[osuTypes, Callable[[Any], bytes]] = {
+    osuTypes.string: write_string,
+    osuTypes.i32_list: write_i32_list,
+    osuTypes.scoreframe: write_scoreframe,
+    osuTypes.raw: _write_raw,
+}
+
+PacketWriter = Callable[..., bytes]
+
+
+def compile_packet(packet_id: ServerPackets, *layout: osuTypes) -> PacketWriter:
+    """\
+    Compile the `layout` of a server packet into a function writing it.
+
+    Runs of fixed-width fields are collapsed into a single `struct.Struct`,
+    and the packet's header is folded into the leading run (if any), so
+    most packets are written with one or two pack calls and a single join.
+
+    Intended Usage:
+    >>> logout = compile_packet(ServerPackets.USER_LOGOUT, osuTypes.i32, osuTypes.u8)
+    >>> logout(1001, 0)
+    b'\\x0c\\x00\\x00\\x05\\x00\\x00\\x00\\xe9\\x03\\x00\\x00\\x00'
+    """
+    # split the layout into runs of fixed-width
+    # fields, and individual variable-width fields.
+    runs: list[tuple[str | None, int, int]] = []  # (fmt, start, stop)
+
+    for idx, p_type in enumerate(layout):
+        if p_type in _FIXED_WIDTH_FORMATS:
+            if runs and (run_fmt := runs[-1][0]) is not None:
+                run_start = runs[-1][1]
+                runs[-1] = (run_fmt + _FIXED_WIDTH_FORMATS[p_type], run_start, idx + 1)
+            else:
+                runs.append((_FIXED_WIDTH_FORMATS[p_type], idx, idx + 1))
+        elif p_type in _VARIABLE_WIDTH_WRITERS:
+            runs.append((None, idx, idx + 1))
+        else:
+            raise ValueError(f"{p_type!r} cannot be compiled into a packet layout.")
+
+    # the header is written along with the leading fixed-width run.
+    head_fmt = "<HxI"
+    head_stop = 0
+    if runs and runs[0][0] is not None:
+        head_fmt += runs[0][0]
+        head_stop = runs[0][2]
+        runs = runs[1:]
+
+    head = struct.Struct(head_fmt)
+    head_size = head.size - _HEADER_FMT.size
+
+    tail: list[tuple[PacketWriter, int, int]] = []
+    for fmt, start, stop in runs:
+        write: PacketWriter
+        if fmt is not None:
+            write = struct.Struct(f"<{fmt}").pack
+        else:
+            write = _VARIABLE_WIDTH_WRITERS[layout[start]]
+
+        tail.append((write, start, stop))
+
+    if not tail:
+        # fixed size packet, written by a single struct.
+        def write_fixed(*args: Any) -> bytes:
+            return head.pack(packet_id, head_size, *args)
+
+        return write_fixed
+
+    def write_variable(*args: Any) -> bytes:
+        parts = [b""]
+        parts += [write(*args[start:stop]) for write, start, stop in tail]
+        parts[0] = head.pack(
+            packet_id,
+            head_size + sum(map(len, parts)),
+            *args[:head_stop],
+        )
+        return b"".join(parts)
+
+    return write_variable
 
 
 #
@@ -764,6 +965,160 @@ def write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
 
 # TODO: fix consistency of parameter names
 
+# the layouts of each server packet, compiled once at import.
+_USER_ID = compile_packet(ServerPackets.USER_ID, osuTypes.i32)
+_SEND_MESSAGE = compile_packet(
+    ServerPackets.SEND_MESSAGE,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+_PONG = compile_packet(ServerPackets.PONG)
+_CHANGE_USERNAME = compile_packet(
+    ServerPackets.HANDLE_IRC_CHANGE_USERNAME,
+    osuTypes.string,
+)
+_USER_STATS = compile_packet(
+    ServerPackets.USER_STATS,
+    osuTypes.i32,  # id
+    osuTypes.u8,  # action
+    osuTypes.string,  # info_text
+    osuTypes.string,  # map_md5
+    osuTypes.i32,  # mods
+    osuTypes.u8,  # mode
+    osuTypes.i32,  # map_id
+    osuTypes.i64,  # rscore
+    osuTypes.f32,  # acc
+    osuTypes.i32,  # plays
+    osuTypes.i64,  # tscore
+    osuTypes.i32,  # rank
+    osuTypes.i16,  # pp; why not u16 peppy :(
+)
+_LOGOUT = compile_packet(ServerPackets.USER_LOGOUT, osuTypes.i32, osuTypes.u8)
+_SPECTATOR_JOINED = compile_packet(ServerPackets.SPECTATOR_JOINED, osuTypes.i32)
+_SPECTATOR_LEFT = compile_packet(ServerPackets.SPECTATOR_LEFT, osuTypes.i32)
+_SPECTATE_FRAMES = compile_packet(ServerPackets.SPECTATE_FRAMES, osuTypes.raw)
+_VERSION_UPDATE = compile_packet(ServerPackets.VERSION_UPDATE)
+_SPECTATOR_CANT_SPECTATE = compile_packet(
+    ServerPackets.SPECTATOR_CANT_SPECTATE,
+    osuTypes.i32,
+)
+_GET_ATTENTION = compile_packet(ServerPackets.GET_ATTENTION)
+_NOTIFICATION = compile_packet(ServerPackets.NOTIFICATION, osuTypes.string)
+_UPDATE_MATCH = compile_packet(ServerPackets.UPDATE_MATCH, osuTypes.raw)
+_NEW_MATCH = compile_packet(ServerPackets.NEW_MATCH, osuTypes.raw)
+_DISPOSE_MATCH = compile_packet(ServerPackets.DISPOSE_MATCH, osuTypes.i32)
+_TOGGLE_BLOCK_NON_FRIEND_DMS = compile_packet(ServerPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)
+_MATCH_JOIN_SUCCESS = compile_packet(ServerPackets.MATCH_JOIN_SUCCESS, osuTypes.raw)
+_MATCH_JOIN_FAIL = compile_packet(ServerPackets.MATCH_JOIN_FAIL)
+_FELLOW_SPECTATOR_JOINED = compile_packet(
+    ServerPackets.FELLOW_SPECTATOR_JOINED,
+    osuTypes.i32,
+)
+_FELLOW_SPECTATOR_LEFT = compile_packet(
+    ServerPackets.FELLOW_SPECTATOR_LEFT,
+    osuTypes.i32,
+)
+_MATCH_START = compile_packet(ServerPackets.MATCH_START, osuTypes.raw)
+_MATCH_SCORE_UPDATE = compile_packet(
+    ServerPackets.MATCH_SCORE_UPDATE,
+    osuTypes.scoreframe,
+)
+_MATCH_TRANSFER_HOST = compile_packet(ServerPackets.MATCH_TRANSFER_HOST)
+_MATCH_ALL_PLAYERS_LOADED = compile_packet(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
+_MATCH_PLAYER_FAILED = compile_packet(ServerPackets.MATCH_PLAYER_FAILED, osuTypes.i32)
+_MATCH_COMPLETE = compile_packet(ServerPackets.MATCH_COMPLETE)
+_MATCH_SKIP = compile_packet(ServerPackets.MATCH_SKIP)
+_CHANNEL_JOIN_SUCCESS = compile_packet(
+    ServerPackets.CHANNEL_JOIN_SUCCESS,
+    osuTypes.string,
+)
+_CHANNEL_INFO = compile_packet(
+    ServerPackets.CHANNEL_INFO,
+    osuTypes.string,  # name
+    osuTypes.string,  # topic
+    osuTypes.u16,  # player count
+)
+_CHANNEL_KICK = compile_packet(ServerPackets.CHANNEL_KICK, osuTypes.string)
+_CHANNEL_AUTO_JOIN = compile_packet(
+    ServerPackets.CHANNEL_AUTO_JOIN,
+    osuTypes.string,  # name
+    osuTypes.string,  # topic
+    osuTypes.u16,  # player count
+)
+_PRIVILEGES = compile_packet(ServerPackets.PRIVILEGES, osuTypes.i32)
+_FRIENDS_LIST = compile_packet(ServerPackets.FRIENDS_LIST, osuTypes.i32_list)
+_PROTOCOL_VERSION = compile_packet(ServerPackets.PROTOCOL_VERSION, osuTypes.i32)
+_MAIN_MENU_ICON = compile_packet(ServerPackets.MAIN_MENU_ICON, osuTypes.string)
+_MONITOR = compile_packet(ServerPackets.MONITOR)
+_MATCH_PLAYER_SKIPPED = compile_packet(
+    ServerPackets.MATCH_PLAYER_SKIPPED,
+    osuTypes.i32,
+)
+_USER_PRESENCE = compile_packet(
+    ServerPackets.USER_PRESENCE,
+    osuTypes.i32,  # id
+    osuTypes.string,  # name
+    osuTypes.u8,  # utc_offset + 24
+    osuTypes.u8,  # country code
+    osuTypes.u8,  # bancho privileges | (mode << 5)
+    osuTypes.f32,  # longitude
+    osuTypes.f32,  # latitude
+    osuTypes.i32,  # global rank
+)
+_RESTART = compile_packet(ServerPackets.RESTART, osuTypes.i32)
+_MATCH_INVITE = compile_packet(
+    ServerPackets.MATCH_INVITE,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+_CHANNEL_INFO_END = compile_packet(ServerPackets.CHANNEL_INFO_END)
+_MATCH_CHANGE_PASSWORD = compile_packet(
+    ServerPackets.MATCH_CHANGE_PASSWORD,
+    osuTypes.string,
+)
+_SILENCE_END = compile_packet(ServerPackets.SILENCE_END, osuTypes.i32)
+_USER_SILENCED = compile_packet(ServerPackets.USER_SILENCED, osuTypes.i32)
+_USER_PRESENCE_SINGLE = compile_packet(
+    ServerPackets.USER_PRESENCE_SINGLE,
+    osuTypes.i32,
+)
+_USER_PRESENCE_BUNDLE = compile_packet(
+    ServerPackets.USER_PRESENCE_BUNDLE,
+    osuTypes.i32_list,
+)
+_USER_DM_BLOCKED = compile_packet(
+    ServerPackets.USER_DM_BLOCKED,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+_TARGET_IS_SILENCED = compile_packet(
+    ServerPackets.TARGET_IS_SILENCED,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+_VERSION_UPDATE_FORCED = compile_packet(ServerPackets.VERSION_UPDATE_FORCED)
+_SWITCH_SERVER = compile_packet(ServerPackets.SWITCH_SERVER, osuTypes.i32)
+_ACCOUNT_RESTRICTED = compile_packet(ServerPackets.ACCOUNT_RESTRICTED)
+_RTX = compile_packet(ServerPackets.RTX, osuTypes.string)
+_MATCH_ABORT = compile_packet(ServerPackets.MATCH_ABORT)
+_SWITCH_TOURNAMENT_SERVER = compile_packet(
+    ServerPackets.SWITCH_TOURNAMENT_SERVER,
+    osuTypes.string,
+)
+_GROUP_JOIN = compile_packet(ServerPackets.GROUP_JOIN)
+_GROUP_LEAVE = compile_packet(ServerPackets.GROUP_LEAVE)
+_GROUP_INVITE = compile_packet(ServerPackets.GROUP_INVITE, osuTypes.string)
+_GROUP_USERS = compile_packet(ServerPackets.GROUP_USERS, osuTypes.string)
+_IDENTIFY = compile_packet(ServerPackets.IDENTIFY, osuTypes.i32)
+
 
 # packet id: 5
 @cache
@@ -778,30 +1133,24 @@ def user_id(user_id: int) -> bytes:
     # -7: password reset
     # -8: requires verification
     # ??: valid id
-    return write(ServerPackets.USER_ID, (user_id, osuTypes.i32))
+    return _USER_ID(user_id)
 
 
 # packet id: 7
 def send_message(sender: str, msg: str, recipient: str, sender_id: int) -> bytes:
-    return write(
-        ServerPackets.SEND_MESSAGE,
-        ((sender, msg, recipient, sender_id), osuTypes.message),
-    )
+    return _SEND_MESSAGE(sender, msg, recipient, sender_id)
 
 
 # packet id: 8
 @cache
 def pong() -> bytes:
-    return write(ServerPackets.PONG)
+    return _PONG()
 
 
 # packet id: 9
 # NOTE: deprecated
 def change_username(old: str, new: str) -> bytes:
-    return write(
-        ServerPackets.HANDLE_IRC_CHANGE_USERNAME,
-        (f"{old}>>>>{new}", osuTypes.string),
-    )
+    return _CHANGE_USERNAME(f"{old}>>>>{new}")
 
 
 BOT_STATUSES = (
@@ -826,21 +1175,20 @@ def bot_stats(player: Player) -> bytes:
     # pick at random from list of potential statuses.
     status_id, status_txt = random.choice(BOT_STATUSES)
 
-    return write(
-        ServerPackets.USER_STATS,
-        (player.id, osuTypes.i32),  # id
-        (status_id, osuTypes.u8),  # action
-        (status_txt, osuTypes.string),  # info_text
-        ("", osuTypes.string),  # map_md5
-        (0, osuTypes.i32),  # mods
-        (0, osuTypes.u8),  # mode
-        (0, osuTypes.i32),  # map_id
-        (0, osuTypes.i64),  # rscore
-        (0.0, osuTypes.f32),  # acc
-        (0, osuTypes.i32),  # plays
-        (0, osuTypes.i64),  # tscore
-        (0, osuTypes.i32),  # rank
-        (0, osuTypes.i16),  # pp
+    return _USER_STATS(
+        player.id,  # id
+        status_id,  # action
+        status_txt,  # info_text
+        "",  # map_md5
+        0,  # mods
+        0,  # mode
+        0,  # map_id
+        0,  # rscore
+        0.0,  # acc
+        0,  # plays
+        0,  # tscore
+        0,  # rank
+        0,  # pp
     )
 
 
@@ -866,21 +1214,20 @@ def _user_stats(
         ranked_score = pp
         pp = 0
 
-    return write(
-        ServerPackets.USER_STATS,
-        (user_id, osuTypes.i32),
-        (action, osuTypes.u8),
-        (info_text, osuTypes.string),
-        (map_md5, osuTypes.string),
-        (mods, osuTypes.i32),
-        (mode, osuTypes.u8),
-        (map_id, osuTypes.i32),
-        (ranked_score, osuTypes.i64),
-        (accuracy / 100.0, osuTypes.f32),
-        (plays, osuTypes.i32),
-        (total_score, osuTypes.i64),
-        (global_rank, osuTypes.i32),
-        (pp, osuTypes.i16),  # why not u16 peppy :(
+    return _USER_STATS(
+        user_id,
+        action,
+        info_text,
+        map_md5,
+        mods,
+        mode,
+        map_id,
+        ranked_score,
+        accuracy / 100.0,
+        plays,
+        total_score,
+        global_rank,
+        pp,
     )
 
 
@@ -896,40 +1243,41 @@ def user_stats(player: Player) -> bytes:
         rscore = gm_stats.rscore
         pp = gm_stats.pp
 
-    return write(
-        ServerPackets.USER_STATS,
-        (player.id, osuTypes.i32),
-        (player.status.action, osuTypes.u8),
-        (player.status.info_text, osuTypes.string),
-        (player.status.map_md5, osuTypes.string),
-        (player.status.mods, osuTypes.i32),
-        (player.status.mode.as_vanilla, osuTypes.u8),
-        (player.status.map_id, osuTypes.i32),
-        (rscore, osuTypes.i64),
-        (gm_stats.acc / 100.0, osuTypes.f32),
-        (gm_stats.plays, osuTypes.i32),
-        (gm_stats.tscore, osuTypes.i64),
-        (gm_stats.rank, osuTypes.i32),
-        (pp, osuTypes.i16),  # why not u16 peppy :(
+    status = player.status
+
+    return _USER_STATS(
+        player.id,
+        status.action,
+        status.info_text,
+        status.map_md5,
+        status.mods,
+        status.mode.as_vanilla,
+        status.map_id,
+        rscore,
+        gm_stats.acc / 100.0,
+        gm_stats.plays,
+        gm_stats.tscore,
+        gm_stats.rank,
+        pp,
     )
 
 
 # packet id: 12
 @cache
 def logout(user_id: int) -> bytes:
-    return write(ServerPackets.USER_LOGOUT, (user_id, osuTypes.i32), (0, osuTypes.u8))
+    return _LOGOUT(user_id, 0)
 
 
 # packet id: 13
 @cache
 def spectator_joined(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_JOINED, (user_id, osuTypes.i32))
+    return _SPECTATOR_JOINED(user_id)
 
 
 # packet id: 14
 @cache
 def spectator_left(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_LEFT, (user_id, osuTypes.i32))
+    return _SPECTATOR_LEFT(user_id)
 
 
 # packet id: 15
@@ -939,81 +1287,81 @@ def spectate_frames(data: bytes) -> bytes:
 
     # spectator frames *received* by the server are always validated.
 
-    return write(ServerPackets.SPECTATE_FRAMES, (data, osuTypes.raw))
+    return _SPECTATE_FRAMES(data)
 
 
 # packet id: 19
 @cache
 def version_update() -> bytes:
-    return write(ServerPackets.VERSION_UPDATE)
+    return _VERSION_UPDATE()
 
 
 # packet id: 22
 @cache
 def spectator_cant_spectate(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_CANT_SPECTATE, (user_id, osuTypes.i32))
+    return _SPECTATOR_CANT_SPECTATE(user_id)
 
 
 # packet id: 23
 @cache
 def get_attention() -> bytes:
-    return write(ServerPackets.GET_ATTENTION)
+    return _GET_ATTENTION()
 
 
 # packet id: 24
 @lru_cache(maxsize=4)
 def notification(msg: str) -> bytes:
-    return write(ServerPackets.NOTIFICATION, (msg, osuTypes.string))
+    return _NOTIFICATION(msg)
 
 
 # packet id: 26
 def update_match(m: Match, send_pw: bool = True) -> bytes:
-    return write(ServerPackets.UPDATE_MATCH, ((m, send_pw), osuTypes.match))
+    return _UPDATE_MATCH(m.state_data(send_pw))
 
 
 # packet id: 27
 def new_match(m: Match) -> bytes:
-    return write(ServerPackets.NEW_MATCH, ((m, True), osuTypes.match))
+    return _NEW_MATCH(m.state_data(send_pw=True))
 
 
 # packet id: 28
 @cache
 def dispose_match(id: int) -> bytes:
-    return write(ServerPackets.DISPOSE_MATCH, (id, osuTypes.i32))
+    return _DISPOSE_MATCH(id)
 
 
 # packet id: 34
 @cache
 def toggle_block_non_friend_dm() -> bytes:
-    return write(ServerPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)
+    return _TOGGLE_BLOCK_NON_FRIEND_DMS()
 
 
 # packet id: 36
 def match_join_success(m: Match) -> bytes:
-    return write(ServerPackets.MATCH_JOIN_SUCCESS, ((m, True), osuTypes.match))
+    return _MATCH_JOIN_SUCCESS(m.state_data(send_pw=True))
 
 
 # packet id: 37
 @cache
 def match_join_fail() -> bytes:
-    return write(ServerPackets.MATCH_JOIN_FAIL)
+    return _MATCH_JOIN_FAIL()
 
 
 # packet id: 42
 @cache
 def fellow_spectator_joined(user_id: int) -> bytes:
-    return write(ServerPackets.FELLOW_SPECTATOR_JOINED, (user_id, osuTypes.i32))
+    return _FELLOW_SPECTATOR_JOINED(user_id)
 
 
 # packet id: 43
 @cache
 def fellow_spectator_left(user_id: int) -> bytes:
-    return write(ServerPackets.FELLOW_SPECTATOR_LEFT, (user_id, osuTypes.i32))
+    return _FELLOW_SPECTATOR_LEFT(user_id)
 
 
 # packet id: 46
 def match_start(m: Match) -> bytes:
-    return write(ServerPackets.MATCH_START, ((m, True), osuTypes.match))
+    return _MATCH_START(m.state_data(send_pw=True))
 
 
 # packet id: 48
@@ -1022,64 +1370,61 @@ def match_start(m: Match) -> bytes:
 #       rather than parsing them. Though I might
 #       end up doing it eventually for security reasons
 def match_score_update(frame: ScoreFrame) -> bytes:
-    return write(ServerPackets.MATCH_SCORE_UPDATE, (frame, osuTypes.scoreframe))
+    return _MATCH_SCORE_UPDATE(frame)
 
 
 # packet id: 50
 @cache
 def match_transfer_host() -> bytes:
-    return write(ServerPackets.MATCH_TRANSFER_HOST)
+    return _MATCH_TRANSFER_HOST()
 
 
 # packet id: 53
 @cache
 def match_all_players_loaded() -> bytes:
-    return write(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
+    return _MATCH_ALL_PLAYERS_LOADED()
 
 
 # packet id: 57
 @cache
 def match_player_failed(slot_id: int) -> bytes:
-    return write(ServerPackets.MATCH_PLAYER_FAILED, (slot_id, osuTypes.i32))
+    return _MATCH_PLAYER_FAILED(slot_id)
 
 
 # packet id: 58
 @cache
 def match_complete() -> bytes:
-    return write(ServerPackets.MATCH_COMPLETE)
+    return _MATCH_COMPLETE()
 
 
 # packet id: 61
 @cache
 def match_skip() -> bytes:
-    return write(ServerPackets.MATCH_SKIP)
+    return _MATCH_SKIP()
 
 
 # packet id: 64
 @lru_cache(maxsize=16)
 def channel_join(name: str) -> bytes:
-    return write(ServerPackets.CHANNEL_JOIN_SUCCESS, (name, osuTypes.string))
+    return _CHANNEL_JOIN_SUCCESS(name)
 
 
 # packet id: 65
 @lru_cache(maxsize=8)
 def channel_info(name: str, topic: str, p_count: int) -> bytes:
-    return write(ServerPackets.CHANNEL_INFO, ((name, topic, p_count), osuTypes.channel))
+    return _CHANNEL_INFO(name, topic, p_count)
 
 
 # packet id: 66
 @lru_cache(maxsize=8)
 def channel_kick(name: str) -> bytes:
-    return write(ServerPackets.CHANNEL_KICK, (name, osuTypes.string))
+    return _CHANNEL_KICK(name)
 
 
 # packet id: 67
 @lru_cache(maxsize=8)
 def channel_auto_join(name: str, topic: str, p_count: int) -> bytes:
-    return write(
-        ServerPackets.CHANNEL_AUTO_JOIN,
-        ((name, topic, p_count), osuTypes.channel),
-    )
+    return _CHANNEL_AUTO_JOIN(name, topic, p_count)
 
 
 # packet id: 69
@@ -1093,27 +1438,24 @@ def channel_auto_join(name: str, topic: str, p_count: int) -> bytes:
 # packet id: 71
 @cache
 def bancho_privileges(priv: int) -> bytes:
-    return write(ServerPackets.PRIVILEGES, (priv, osuTypes.i32))
+    return _PRIVILEGES(priv)
 
 
 # packet id: 72
 def friends_list(friends: Collection[int]) -> bytes:
-    return write(ServerPackets.FRIENDS_LIST, (friends, osuTypes.i32_list))
+    return _FRIENDS_LIST(friends)
 
 
 # packet id: 75
 @cache
 def protocol_version(ver: int) -> bytes:
-    return write(ServerPackets.PROTOCOL_VERSION, (ver, osuTypes.i32))
+    return _PROTOCOL_VERSION(ver)
 
 
 # packet id: 76
 @cache
 def main_menu_icon(icon_url: str, onclick_url: str) -> bytes:
-    return write(
-        ServerPackets.MAIN_MENU_ICON,
-        (icon_url + "|" + onclick_url, osuTypes.string),
-    )
+    return _MAIN_MENU_ICON(icon_url + "|" + onclick_url)
 
 
 # packet id: 80
@@ -1127,13 +1469,13 @@ def monitor() -> bytes:
 
     # this doesn't work on newer clients, and I had no plans
     # of trying to put it to use - just coded for completion.
-    return write(ServerPackets.MONITOR)
+    return _MONITOR()
 
 
 # packet id: 81
 @cache
 def match_player_skipped(user_id: int) -> bytes:
-    return write(ServerPackets.MATCH_PLAYER_SKIPPED, (user_id, osuTypes.i32))
+    return _MATCH_PLAYER_SKIPPED(user_id)
 
 
 # since the bot is always online and is
@@ -1142,16 +1484,15 @@ def match_player_skipped(user_id: int) -> bytes:
 # *very* frequently; only build it once.
 @cache
 def bot_presence(player: Player) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (player.id, osuTypes.i32),
-        (player.name, osuTypes.string),
-        (-5 + 24, osuTypes.u8),
-        (245, osuTypes.u8),  # satellite provider
-        (31, osuTypes.u8),
-        (1234.0, osuTypes.f32),  # send coordinates waaay
-        (4321.0, osuTypes.f32),  # off the map for the bot
-        (0, osuTypes.i32),
+    return _USER_PRESENCE(
+        player.id,
+        player.name,
+        -5 + 24,
+        245,  # satellite provider
+        31,
+        1234.0,  # send coordinates waaay
+        4321.0,  # off the map for the bot
+        0,
     )
 
 
@@ -1167,70 +1508,65 @@ def _user_presence(
     longitude: int,
     global_rank: int,
 ) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (user_id, osuTypes.i32),
-        (name, osuTypes.string),
-        (utc_offset + 24, osuTypes.u8),
-        (country_code, osuTypes.u8),
-        (bancho_privileges | (mode << 5), osuTypes.u8),
-        (longitude, osuTypes.f32),
-        (latitude, osuTypes.f32),
-        (global_rank, osuTypes.i32),
+    return _USER_PRESENCE(
+        user_id,
+        name,
+        utc_offset + 24,
+        country_code,
+        bancho_privileges | (mode << 5),
+        longitude,
+        latitude,
+        global_rank,
     )
 
 
 # TODO: this is implementation-specific, move it out
 def user_presence(player: Player) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (player.id, osuTypes.i32),
-        (player.name, osuTypes.string),
-        (player.utc_offset + 24, osuTypes.u8),
-        (player.geoloc["country"]["numeric"], osuTypes.u8),
-        (player.bancho_priv | (player.status.mode.as_vanilla << 5), osuTypes.u8),
-        (player.geoloc["longitude"], osuTypes.f32),
-        (player.geoloc["latitude"], osuTypes.f32),
-        (player.gm_stats.rank, osuTypes.i32),
+    geoloc = player.geoloc
+    return _USER_PRESENCE(
+        player.id,
+        player.name,
+        player.utc_offset + 24,
+        geoloc["country"]["numeric"],
+        player.bancho_priv | (player.status.mode.as_vanilla << 5),
+        geoloc["longitude"],
+        geoloc["latitude"],
+        player.gm_stats.rank,
     )
 
 
 # packet id: 86
-@cache
 def restart_server(ms: int) -> bytes:
-    return write(ServerPackets.RESTART, (ms, osuTypes.i32))
+    return _RESTART(ms)
 
 
 # packet id: 88
 def match_invite(player: Player, target_name: str) -> bytes:
     assert player.match is not None
     msg = f"Come join my game: {player.match.embed}."
-    return write(
-        ServerPackets.MATCH_INVITE,
-        ((player.name, msg, target_name, player.id), osuTypes.message),
-    )
+    return _MATCH_INVITE(player.name, msg, target_name, player.id)
 
 
 # packet id: 89
 @cache
 def channel_info_end() -> bytes:
-    return write(ServerPackets.CHANNEL_INFO_END)
+    return _CHANNEL_INFO_END()
 
 
 # packet id: 91
 def match_change_password(new: str) -> bytes:
-    return write(ServerPackets.MATCH_CHANGE_PASSWORD, (new, osuTypes.string))
+    return _MATCH_CHANGE_PASSWORD(new)
 
 
 # packet id: 92
 def silence_end(delta: int) -> bytes:
-    return write(ServerPackets.SILENCE_END, (delta, osuTypes.i32))
+    return _SILENCE_END(delta)
 
 
 # packet id: 94
 @cache
 def user_silenced(user_id: int) -> bytes:
-    return write(ServerPackets.USER_SILENCED, (user_id, osuTypes.i32))
+    return _USER_SILENCED(user_id)
 
 
 """ not sure why 95 & 96 exist? unused in bancho.py """
@@ -1239,44 +1575,41 @@ def user_silenced(user_id: int) -> bytes:
 # packet id: 95
 @cache
 def user_presence_single(user_id: int) -> bytes:
-    return write(ServerPackets.USER_PRESENCE_SINGLE, (user_id, osuTypes.i32))
+    return _USER_PRESENCE_SINGLE(user_id)
 
 
 # packet id: 96
 def user_presence_bundle(user_ids: Collection[int]) -> bytes:
-    return write(ServerPackets.USER_PRESENCE_BUNDLE, (user_ids, osuTypes.i32_list))
+    return _USER_PRESENCE_BUNDLE(user_ids)
 
 
 # packet id: 100
 def user_dm_blocked(target: str) -> bytes:
-    return write(ServerPackets.USER_DM_BLOCKED, (("", "", target, 0), osuTypes.message))
+    return _USER_DM_BLOCKED("", "", target, 0)
 
 
 # packet id: 101
 def target_silenced(target: str) -> bytes:
-    return write(
-        ServerPackets.TARGET_IS_SILENCED,
-        (("", "", target, 0), osuTypes.message),
-    )
+    return _TARGET_IS_SILENCED("", "", target, 0)
 
 
 # packet id: 102
 @cache
 def version_update_forced() -> bytes:
-    return write(ServerPackets.VERSION_UPDATE_FORCED)
+    return _VERSION_UPDATE_FORCED()
 
 
 # packet id: 103
 def switch_server(t: int) -> bytes:
     # increment endpoint index if
     # idletime >= t && match == null
-    return write(ServerPackets.SWITCH_SERVER, (t, osuTypes.i32))
+    return _SWITCH_SERVER(t)
 
 
 # packet id: 104
 @cache
 def account_restricted() -> bytes:
-    return write(ServerPackets.ACCOUNT_RESTRICTED)
+    return _ACCOUNT_RESTRICTED()
 
 
 # packet id: 105
@@ -1286,13 +1619,13 @@ def rtx(msg: str) -> bytes:
     # to show some visual effects on screen for 5 seconds:
     # - black screen, freezes game, beeps loudly.
     # within the next 3-8 seconds at random.
-    return write(ServerPackets.RTX, (msg, osuTypes.string))
+    return _RTX(msg)
 
 
 # packet id: 106
 @cache
 def match_abort() -> bytes:
-    return write(ServerPackets.MATCH_ABORT)
+    return _MATCH_ABORT()
 
 
 # packet id: 107
@@ -1300,17 +1633,17 @@ def switch_tournament_server(ip: str) -> bytes:
     # the client only reads the string if it's
     # not on the client's normal endpoints,
     # but we can send it either way xd.
-    return write(ServerPackets.SWITCH_TOURNAMENT_SERVER, (ip, osuTypes.string))
+    return _SWITCH_TOURNAMENT_SERVER(ip)
 
 # packet id: 127
 def identify(version: int) -> bytes:
-    return write(ServerPackets.IDENTIFY, (version, osuTypes.i32))
+    return _IDENTIFY(version)
 
 def group_join():
-    return write(ServerPackets.GROUP_JOIN)
+    return _GROUP_JOIN()
 
 def group_leave():
-    return write(ServerPackets.GROUP_LEAVE)
+    return _GROUP_LEAVE()
 
 def group_users(player:Player):
     group = groups.get_group(player)
@@ -1323,11 +1656,11 @@ def group_users(player:Player):
             "ID" : str(user.id),
             "Lead": str(lead)
         })
-    return write(ServerPackets.GROUP_USERS, (json.dumps(users, indent=5), osuTypes.string))
+    return _GROUP_USERS(json.dumps(users, indent=5))
 
 def group_invite(lead:Player):
     invite = {
 		"From":lead.name,
 		"ID":lead.id
 	}
-    return write(ServerPackets.GROUP_INVITE, (json.dumps(invite, indent=5), osuTypes.string))
\ No newline at end of file
+    return _GROUP_INVITE(json.dumps(invite, indent=5))
\ No newline at end of file
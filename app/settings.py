@@ -65,6 +65,20 @@ SEASONAL_BGS = read_list(os.environ["SEASONAL_BGS"])
 MENU_ICON_URL = os.environ["MENU_ICON_URL"]
 MENU_ONCLICK_URL = os.environ["MENU_ONCLICK_URL"]
 
+PLAYER_QUEUE_MAX_SIZE = int(os.environ["PLAYER_QUEUE_MAX_SIZE"])
+BCRYPT_MAX_WORKERS = int(os.environ["BCRYPT_MAX_WORKERS"])
+LOGIN_ADMISSION_RATE = float(os.environ["LOGIN_ADMISSION_RATE"])
+LOGIN_ADMISSION_BURST = int(os.environ["LOGIN_ADMISSION_BURST"])
+LOGIN_ADMISSION_MAX_QUEUED = int(os.environ["LOGIN_ADMISSION_MAX_QUEUED"])
+JOB_QUEUE_WORKERS = int(os.environ["JOB_QUEUE_WORKERS"])
+
+GEOLOCATION_DB_PATH = os.environ["GEOLOCATION_DB_PATH"]
+GEOLOCATION_HTTP_FALLBACK = read_bool(os.environ["GEOLOCATION_HTTP_FALLBACK"])
+
+HARDWARE_INDEX_IN_MEMORY = read_bool(os.environ["HARDWARE_INDEX_IN_MEMORY"])
+PASSWORD_CACHE_SECRET = os.environ["PASSWORD_CACHE_SECRET"]
+PASSWORD_CACHE_TTL = int(os.environ["PASSWORD_CACHE_TTL"])
+
 DATADOG_API_KEY = os.environ["DATADOG_API_KEY"]
 DATADOG_APP_KEY = os.environ["DATADOG_APP_KEY"]
 
@@ -82,6 +96,7 @@ PP_CACHED_ACCURACIES = [int(acc) for acc in read_list(os.environ["PP_CACHED_ACCS
 DISALLOWED_NAMES = read_list(os.environ["DISALLOWED_NAMES"])
 DISALLOWED_PASSWORDS = read_list(os.environ["DISALLOWED_PASSWORDS"])
 DISALLOW_OLD_CLIENTS = read_bool(os.environ["DISALLOW_OLD_CLIENTS"])
+CLIENT_VERSIONS_FIXTURE = os.environ["CLIENT_VERSIONS_FIXTURE"]
 
 DISCORD_AUDIT_LOG_WEBHOOK = os.environ["DISCORD_AUDIT_LOG_WEBHOOK"]
 
@@ -100,4 +115,4 @@ DISCORD_LINK = os.environ["DISCORD_LINK"]
 ## WARNING touch this if you know how
 ##          the migrations system works.
 ##          you'll regret it.
-VERSION = "4.8.1"
+VERSION = "4.8.3"
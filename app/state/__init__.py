@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import Counter
 from typing import Literal
 from typing import TYPE_CHECKING
 
@@ -11,10 +12,18 @@ if TYPE_CHECKING:
     from asyncio import AbstractEventLoop
     from app.packets import ClientPackets
     from app.packets import BasePacket
+    from app.packets import PacketTable
 
 loop: AbstractEventLoop
 packets: dict[Literal["all", "restricted"], dict[ClientPackets, type[BasePacket]]] = {
     "all": {},
     "restricted": {},
 }
+# `packets` compiled into tables indexed by raw packet id, for dispatch.
+packet_tables: dict[Literal["all", "restricted"], PacketTable] = {
+    "all": [],
+    "restricted": [],
+}
+# unhandled packets received, {(osu_version, packet_id): count}
+unhandled_packets: Counter[tuple[str, int]] = Counter()
 shutting_down = False
@@ -1,13 +1,61 @@
 from __future__ import annotations
 
+from typing import Any
 from typing import TYPE_CHECKING
 
+import app.state
+from app.objects.bloom_filter import BloomFilter
+from app.objects.leaderboard_cache import LeaderboardCache
+from app.objects.lru_cache import LRUCache
+
 if TYPE_CHECKING:
+    from app.constants.gamemodes import GameMode
     from app.objects.beatmap import Beatmap, BeatmapSet
+    from app.objects.top_scores import TopScores
+
 
+# credentials verified against bcrypt hashes (~200ms), for subsequent logins.
+bcrypt: LRUCache[bytes, bytes] = LRUCache(maxsize=10_000)  # {bcrypt: md5, ...}
 
-bcrypt: dict[bytes, bytes] = {}  # {bcrypt: md5, ...}
 beatmap: dict[str | int, Beatmap] = {}  # {md5: map, id: map, ...}
 beatmapset: dict[int, BeatmapSet] = {}  # {bsid: map_set}
-unsubmitted: set[str] = set()  # {md5, ...}
-needs_update: set[str] = set()  # {md5, ...}
+
+# maps the osu!api doesn't have (or has a newer version of); these
+# are rechecked after a while, in case they've since been submitted.
+unsubmitted: LRUCache[str, bool] = LRUCache(maxsize=10_000, ttl=3600)  # {md5: True}
+needs_update: LRUCache[str, bool] = LRUCache(maxsize=10_000, ttl=3600)  # {md5: True}
+
+# players' best scores, for weighted pp & acc; {(user_id, mode): top_scores}
+top_scores: LRUCache[tuple[int, GameMode], TopScores] = LRUCache(maxsize=1_000)
+
+# maps' top scores leaderboards, served to the osu! client.
+leaderboards = LeaderboardCache(maxsize=5_000, ttl=5 * 60)
+
+# all scores' checksums, to skip sql when checking for duplicate submissions.
+score_checksums: BloomFilter | None = None  # (built at startup)
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Return the size (& lookup stats, if bounded) of each cache."""
+    services = app.state.services
+
+    caches: dict[str, Any] = {
+        "bcrypt": bcrypt,
+        "beatmap": beatmap,
+        "beatmapset": beatmapset,
+        "unsubmitted": unsubmitted,
+        "needs_update": needs_update,
+        "top_scores": top_scores,
+        "leaderboards": leaderboards,
+    }
+    if hasattr(services, "ip_resolver"):
+        caches["ip_resolver"] = services.ip_resolver.cache
+    if services.geoloc_db is not None:
+        caches["geolocation"] = services.geoloc_db.cache
+    if score_checksums is not None:
+        caches["score_checksums"] = score_checksums
+
+    return {
+        name: cache.stats() if hasattr(cache, "stats") else {"size": len(cache)}
+        for name, cache in caches.items()
+    }
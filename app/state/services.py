@@ -1,20 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import bisect
+import contextvars
+import csv
 import ipaddress
 import pickle
+import random
 import re
 import secrets
+import time
 from collections.abc import AsyncGenerator
+from collections.abc import Awaitable
+from collections.abc import Callable
 from collections.abc import Mapping
-from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 from typing import TYPE_CHECKING
 from typing import TypedDict
+from typing import TypeVar
 
+import bcrypt
 import databases
 import datadog as datadog_module
 import datadog.threadstats.base as datadog_client
 import httpx
+import orjson
 import pymysql
 from redis import asyncio as aioredis
 
@@ -25,6 +37,7 @@ from app.logging import Ansi
 from app.logging import log
 from app.logging import printc
 from app.logging import Rainbow
+from app.objects.lru_cache import LRUCache
 
 if TYPE_CHECKING:
     import databases.core
@@ -51,6 +64,10 @@ if str(app.settings.DATADOG_API_KEY) and str(app.settings.DATADOG_APP_KEY):
     datadog = datadog_client.ThreadStats()
 
 ip_resolver: IPResolver
+geoloc_db: GeolocationDatabase | None = None
+bcrypt_pool: BcryptPool
+login_admission: LoginAdmission
+job_queue: JobQueue
 
 """ session usecases """
 
@@ -104,9 +121,13 @@ country_codes = {
 # fmt: on
 
 
+# the number of recently seen ip addresses kept parsed.
+IP_CACHE_SIZE = 10_000
+
+
 class IPResolver:
     def __init__(self) -> None:
-        self.cache: MutableMapping[str, IPAddress] = {}
+        self.cache: LRUCache[str, IPAddress] = LRUCache(maxsize=IP_CACHE_SIZE)
 
     def get_ip(self, headers: Mapping[str, str]) -> IPAddress:
         """Resolve the IP address from the headers."""
@@ -127,6 +148,493 @@ class IPResolver:
         return ip
 
 
+T = TypeVar("T")
+
+
+async def run_pooled(
+    func: Callable[[databases.core.Connection], Awaitable[T]],
+) -> T:
+    """\
+    Run `func` in a new task with its own pooled database connection,
+    so it can run concurrently with other queries (e.g. via `gather`).
+
+    Intended Usage:
+    >>> rows, _ = await asyncio.gather(
+    ...     run_pooled(fetch_rows),
+    ...     run_pooled(player.relationships_from_sql),
+    ... )
+    """
+
+    async def run() -> T:
+        async with database.connection() as db_conn:
+            return await func(db_conn)
+
+    # XXX: `databases` stores each task's connection in a contextvar, which
+    # new tasks would otherwise inherit (sharing a connection) from ours.
+    return await asyncio.create_task(run(), context=contextvars.Context())
+
+
+class BcryptPool:
+    """\
+    Runs bcrypt hashing (intentionally slow, ~200ms) in a pool of worker
+    threads, so logins & registrations don't block the event loop; bcrypt
+    releases the GIL while hashing.
+
+    Attributes
+    -----------
+    max_workers: `int`
+        The max number of hashes computed concurrently; further
+        calls wait for a worker to become available.
+
+    in_flight: `int`
+        The number of calls currently running or waiting for a worker.
+
+    Intended Usage:
+    >>> pool = BcryptPool(max_workers=4)
+    >>> pw_bcrypt = await pool.hashpw(pw_md5)
+    >>> await pool.checkpw(pw_md5, pw_bcrypt)
+    True
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self.in_flight = 0
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="bcrypt",
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of calls waiting for a worker."""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def checkpw(self, password: bytes, hashed_password: bytes) -> bool:
+        """Check `password` against `hashed_password` in a worker."""
+        return await self._run(bcrypt.checkpw, password, hashed_password)
+
+    async def hashpw(self, password: bytes) -> bytes:
+        """Hash `password` with a new salt in a worker."""
+        return await self._run(bcrypt.hashpw, password, bcrypt.gensalt())
+
+    async def _run(self, func: Callable[..., T], *args: object) -> T:
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        started_at = queued_at
+
+        def run() -> T:
+            nonlocal started_at
+            started_at = time.perf_counter()
+            return func(*args)
+
+        self.in_flight += 1
+
+        if datadog:
+            datadog.gauge("bancho.bcrypt.queue_depth", self.queue_depth)
+
+        try:
+            return await loop.run_in_executor(self._executor, run)
+        finally:
+            self.in_flight -= 1
+
+            if datadog:
+                datadog.gauge("bancho.bcrypt.queue_depth", self.queue_depth)
+                datadog.histogram(
+                    "bancho.bcrypt.queue_time",
+                    started_at - queued_at,
+                )
+
+    def shutdown(self) -> None:
+        """Stop the workers, cancelling any calls yet to start."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LoginAdmission:
+    """\
+    Admission control for logins, so a reconnecting full server doesn't
+    starve the players already online (or overwhelm itself).
+
+    Logins are admitted at `rate` per second (with bursts of up to `burst`),
+    by a token bucket; logins beyond that wait for a token, up to a limit of
+    `max_queued` at once. Logins beyond that are deferred; clients are asked
+    to reconnect after a delay spreading their reconnects over time.
+
+    Attributes
+    -----------
+    queued: `int`
+        The number of logins currently waiting for a token.
+
+    admitted & deferred: `int`
+        The number of logins admitted & deferred.
+    """
+
+    def __init__(self, rate: float, burst: int, max_queued: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_queued = max_queued
+
+        self.queued = 0
+        self.admitted = 0
+        self.deferred = 0
+
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._next_reconnect_at = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"<LoginAdmission ({self.queued} queued, {self.admitted} admitted, "
+            f"{self.deferred} deferred)>"
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def admit(self) -> bool:
+        """Wait until a login may proceed; returns `False` if it's deferred."""
+        self._refill()
+
+        if self._tokens < 1 and self.queued >= self.max_queued:
+            self.deferred += 1
+
+            if datadog:
+                datadog.increment("bancho.login_admission.deferred")
+
+            return False
+
+        # take a token; if there are none left, the bucket
+        # goes into debt & we wait until it's been refilled.
+        self._tokens -= 1
+
+        if self._tokens < 0:
+            self.queued += 1
+
+            if datadog:
+                datadog.gauge("bancho.login_admission.queued", self.queued)
+
+            try:
+                await asyncio.sleep(-self._tokens / self.rate)
+            except asyncio.CancelledError:
+                self._tokens += 1  # the client went away; refund it
+                raise
+            finally:
+                self.queued -= 1
+
+        self.admitted += 1
+
+        if datadog:
+            datadog.increment("bancho.login_admission.admitted")
+
+        return True
+
+    def reconnect_delay(self) -> int:
+        """\
+        Return a delay (in ms) for a client to reconnect after.
+
+        Each delay is scheduled at least one token after the last (and
+        after the current queue), with jitter, so the reconnects of many
+        clients are spread out at the rate logins are admitted.
+        """
+        now = time.monotonic()
+        interval = 1 / self.rate
+
+        self._next_reconnect_at = (
+            max(self._next_reconnect_at, now + self.queued * interval) + interval
+        )
+
+        delay = self._next_reconnect_at - now + random.uniform(0, interval)
+        return int(delay * 1000)
+
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """\
+    A durable queue of jobs in a redis stream, for work which needn't
+    delay a response (e.g. after score submission), run by workers in
+    the background (see `app.bg_loops`).
+
+    Jobs are delivered at least once; failed jobs (or those of workers
+    which died) are retried after `retry_delay` seconds, up to
+    `max_attempts` times, after which they're moved to a dead letter
+    stream (`{stream}:dead`) for inspection. A job is skipped if one
+    with the same idempotency key has already completed, so handlers
+    only need to be idempotent in case they fail partway through.
+
+    Attributes
+    -----------
+    stream: `str`
+        The key of the redis stream holding jobs.
+
+    handlers: `Mapping[str, JobHandler]`
+        The handler of each kind of job, by name.
+
+    Intended Usage:
+    >>> await job_queue.enqueue(
+    ...     "update_map_plays",
+    ...     {"map_md5": bmap.md5, "plays": bmap.plays, "passes": bmap.passes},
+    ...     key=f"update_map_plays:{score.client_checksum}",
+    ... )
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        handlers: Mapping[str, JobHandler],
+        group: str = "bancho",
+        max_attempts: int = 5,
+        retry_delay: float = 30.0,
+        completed_ttl: int = 24 * 60 * 60,
+    ) -> None:
+        self.stream = stream
+        self.handlers = handlers
+        self.group = group
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.completed_ttl = completed_ttl
+
+    def __repr__(self) -> str:
+        return f"<JobQueue {self.stream!r} ({len(self.handlers)} jobs)>"
+
+    async def initialize(self) -> None:
+        """Create the stream's consumer group, if it doesn't exist."""
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except aioredis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def enqueue(self, name: str, payload: dict[str, Any], key: str) -> None:
+        """Enqueue a job, identified by an idempotency key."""
+        await redis.xadd(
+            self.stream,
+            {"name": name, "key": key, "payload": orjson.dumps(payload)},
+        )
+
+    async def process(self, consumer: str, block: int = 5000) -> int:
+        """\
+        Process a batch of jobs as `consumer`, waiting up to `block` ms for
+        new jobs if there are none; returns the number of jobs processed.
+        """
+        # jobs left pending (i.e. failed) for `retry_delay` are retried first.
+        _, entries, *_ = await redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=int(self.retry_delay * 1000),
+            count=10,
+        )
+
+        if not entries:
+            response = await redis.xreadgroup(
+                self.group,
+                consumer,
+                {self.stream: ">"},
+                count=10,
+                block=block,
+            )
+            entries = response[0][1] if response else []
+
+        for entry_id, fields in entries:
+            if entry_id is None:
+                continue  # deleted while pending (redis <7)
+
+            await self._process_entry(entry_id, fields)
+
+        return len(entries)
+
+    async def _process_entry(self, entry_id: bytes, fields: dict[bytes, bytes]) -> None:
+        name = fields[b"name"].decode()
+        key = fields[b"key"].decode()
+        completed_key = f"{self.stream}:completed:{key}"
+
+        # stream entry ids begin with the time (in ms) they were added.
+        lag = time.time() - int(entry_id.split(b"-")[0]) / 1000
+
+        if datadog:
+            datadog.histogram("bancho.jobs.lag", lag, tags=[f"job:{name}"])
+
+        if await redis.exists(completed_key):
+            result = "duplicate"
+        else:
+            try:
+                await self.handlers[name](orjson.loads(fields[b"payload"]))
+            except Exception as exc:
+                attempts = await self._delivery_count(entry_id)
+
+                if attempts < self.max_attempts:
+                    log(
+                        f"Job {name} ({key}) failed on attempt {attempts}; "
+                        f"retrying in {self.retry_delay}s: {exc!r}",
+                        Ansi.LYELLOW,
+                    )
+                    self._record_result(name, "failed")
+                    return  # left pending, to be retried
+
+                log(f"Job {name} ({key}) failed; giving up: {exc!r}", Ansi.LRED)
+                await redis.xadd(
+                    f"{self.stream}:dead",
+                    {"name": name, "key": key, "payload": fields[b"payload"]},
+                )
+                result = "dead"
+            else:
+                await redis.set(completed_key, 1, ex=self.completed_ttl)
+                result = "completed"
+
+        pipe = redis.pipeline()
+        pipe.xack(self.stream, self.group, entry_id)
+        pipe.xdel(self.stream, entry_id)
+        await pipe.execute()
+
+        self._record_result(name, result)
+
+    async def _delivery_count(self, entry_id: bytes) -> int:
+        """Return the number of times a pending job has been delivered."""
+        pending = await redis.xpending_range(
+            self.stream,
+            self.group,
+            min=entry_id,
+            max=entry_id,
+            count=1,
+        )
+        if not pending:
+            return self.max_attempts  # (no longer pending)
+
+        return int(pending[0]["times_delivered"])
+
+    def _record_result(self, name: str, result: str) -> None:
+        if datadog:
+            datadog.increment(
+                "bancho.jobs.processed",
+                tags=[f"job:{name}", f"result:{result}"],
+            )
+
+    async def report_backlog(self) -> None:
+        """Report the number of jobs queued & the age of the oldest (as metrics)."""
+        pipe = redis.pipeline(transaction=False)
+        pipe.xlen(self.stream)
+        pipe.xrange(self.stream, count=1)
+        queued, oldest = await pipe.execute()
+
+        if oldest:
+            oldest_id = oldest[0][0]
+            oldest_age = time.time() - int(oldest_id.split(b"-")[0]) / 1000
+        else:
+            oldest_age = 0.0
+
+        if datadog:
+            datadog.gauge("bancho.jobs.queued", queued)
+            datadog.gauge("bancho.jobs.oldest_age", oldest_age)
+
+
+class GeolocationDatabase:
+    """\
+    A local database of ip address ranges & their geolocations,
+    loaded into sorted arrays which are binary searched by ip.
+
+    Supports DB-IP's "lite" csv formats (https://db-ip.com/db/lite.php):
+      country: `ip_start,ip_end,country`
+      city:    `ip_start,ip_end,continent,country,state,city,latitude,longitude`
+
+    Lookups of recently seen ips are served by an LRU cache (`cache`).
+    """
+
+    def __init__(self, cache_size: int = 4096) -> None:
+        # by ip version, the (sorted) start & end of each
+        # range, & the index of its geolocation in `_geolocs`.
+        self._starts: dict[int, list[int]] = {4: [], 6: []}
+        self._ends: dict[int, list[int]] = {4: [], 6: []}
+        self._geoloc_ids: dict[int, list[int]] = {4: [], 6: []}
+        self._geolocs: list[Geolocation] = []
+
+        self.cache: LRUCache[IPAddress, Geolocation | None] = LRUCache(
+            maxsize=cache_size,
+        )
+
+    def __len__(self) -> int:
+        return sum(map(len, self._starts.values()))
+
+    def __repr__(self) -> str:
+        return f"<GeolocationDatabase ({len(self)} ranges)>"
+
+    @classmethod
+    def from_csv(cls, path: Path) -> GeolocationDatabase:
+        """Load a database of ip ranges from a csv file."""
+        db = cls()
+        geoloc_ids: dict[tuple[str, float, float], int] = {}
+        ranges: dict[int, list[tuple[int, int, int]]] = {4: [], 6: []}
+
+        with path.open(newline="") as f:
+            for row in csv.reader(f):
+                if len(row) == 3:  # country
+                    ip_start, ip_end, acronym = row
+                    latitude = longitude = 0.0
+                elif len(row) == 8:  # city
+                    ip_start, ip_end, _, acronym, _, _, lat, long = row
+                    latitude, longitude = float(lat), float(long)
+                else:
+                    raise ValueError(f"Unknown geolocation database format ({path}).")
+
+                acronym = acronym.lower()
+                if acronym not in country_codes:
+                    acronym = "xx"  # e.g. "ZZ", for unassigned ranges
+
+                # many ranges share a location; only store each once.
+                key = (acronym, latitude, longitude)
+                geoloc_id = geoloc_ids.get(key)
+                if geoloc_id is None:
+                    geoloc_id = geoloc_ids[key] = len(db._geolocs)
+                    db._geolocs.append(
+                        {
+                            "latitude": latitude,
+                            "longitude": longitude,
+                            "country": {
+                                "acronym": acronym,
+                                "numeric": country_codes[acronym],
+                            },
+                        },
+                    )
+
+                start = ipaddress.ip_address(ip_start)
+                end = ipaddress.ip_address(ip_end)
+                ranges[start.version].append((int(start), int(end), geoloc_id))
+
+        for version, version_ranges in ranges.items():
+            version_ranges.sort()
+            for start_int, end_int, geoloc_id in version_ranges:
+                db._starts[version].append(start_int)
+                db._ends[version].append(end_int)
+                db._geoloc_ids[version].append(geoloc_id)
+
+        return db
+
+    def lookup(self, ip: IPAddress) -> Geolocation | None:
+        """Find the geolocation of `ip`, if it's in the database."""
+        try:
+            return self.cache[ip]
+        except KeyError:
+            pass
+
+        geoloc = self._lookup(ip)
+        self.cache[ip] = geoloc
+        return geoloc
+
+    def _lookup(self, ip: IPAddress) -> Geolocation | None:
+        ip_int = int(ip)
+
+        # the last range starting at (or before) the ip.
+        idx = bisect.bisect_right(self._starts[ip.version], ip_int) - 1
+        if idx < 0 or ip_int > self._ends[ip.version][idx]:
+            return None
+
+        return self._geolocs[self._geoloc_ids[ip.version][idx]]
+
+
 async def fetch_geoloc(
     ip: IPAddress,
     headers: Mapping[str, str] | None = None,
@@ -136,7 +644,10 @@ async def fetch_geoloc(
     if headers is not None:
         geoloc = _fetch_geoloc_from_headers(headers)
 
-    if geoloc is None:
+    if geoloc is None and geoloc_db is not None:
+        geoloc = geoloc_db.lookup(ip)
+
+    if geoloc is None and app.settings.GEOLOCATION_HTTP_FALLBACK:
         geoloc = await _fetch_geoloc_from_ip(ip)
 
     return geoloc
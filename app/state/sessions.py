@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import asyncio
+from pathlib import Path
 from typing import Any
 from typing import TYPE_CHECKING
 
+import app.settings
 from app.logging import Ansi
 from app.logging import log
+from app.objects.client_versions import ClientVersions
 from app.objects.collections import Channels
 from app.objects.collections import Clans
 from app.objects.collections import MapPools
 from app.objects.collections import Matches
 from app.objects.collections import Players
 from app.objects.collections import Groups
+from app.objects.hardware_index import HardwareIndex
 
 if TYPE_CHECKING:
     from app.objects.achievement import Achievement
@@ -24,6 +28,17 @@ clans = Clans()
 groups = Groups()
 matches = Matches()
 
+client_versions = ClientVersions(
+    snapshot_path=Path.cwd() / ".data/client_versions.json",
+    fixture_path=(
+        Path(app.settings.CLIENT_VERSIONS_FIXTURE)
+        if app.settings.CLIENT_VERSIONS_FIXTURE
+        else None
+    ),
+)
+
+hardware_index = HardwareIndex()
+
 api_keys: dict[str, int] = {}
 
 housekeeping_tasks: set[asyncio.Task[Any]] = set()
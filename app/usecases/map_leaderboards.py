@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Literal
+
+import app.state
+from app.constants.gamemodes import GameMode
+
+# maps' leaderboards of unrestricted players' best scores, in redis
+# sorted sets (by map & mode) of {user_id: score or pp}; used to rank
+# scores without counting the scores above them in sql.
+# XXX: sets are populated from sql when first needed, & can be
+#      rebuilt with tools/rebuild_map_leaderboards.py.
+MAP_LEADERBOARD_KEY_PREFIX = "bancho:leaderboard:map"
+
+# leaderboards expire once unused for this long (in seconds), so only
+# those of recently played (or viewed) maps are kept in redis.
+MAP_LEADERBOARD_TTL = 24 * 60 * 60
+
+# the modes with leaderboards (7 is unused).
+MODES = (0, 1, 2, 3, 4, 5, 6, 8)
+
+
+def scoring_metric(mode: int) -> Literal["pp", "score"]:
+    """Return the metric scores in `mode` are ranked by."""
+    return "pp" if mode >= GameMode.RELAX_OSU else "score"
+
+
+def _key(map_md5: str, mode: int) -> str:
+    return f"{MAP_LEADERBOARD_KEY_PREFIX}:{map_md5}:{mode}"
+
+
+async def populate(map_md5: str, mode: int) -> None:
+    """(Re)build a map's leaderboard in a mode from sql."""
+    metric = scoring_metric(mode)
+    rows = await app.state.services.database.fetch_all(
+        f"SELECT s.userid, s.{metric} AS _score FROM scores s "
+        "INNER JOIN users u ON u.id = s.userid "
+        "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
+        "AND s.status = 2 AND u.priv & 1",
+        {"map_md5": map_md5, "mode": mode},
+    )
+
+    pipe = app.state.services.redis.pipeline()
+    pipe.delete(_key(map_md5, mode))
+    if rows:
+        pipe.zadd(
+            _key(map_md5, mode),
+            {str(row["userid"]): row["_score"] for row in rows},
+        )
+        pipe.expire(_key(map_md5, mode), MAP_LEADERBOARD_TTL)
+    await pipe.execute()
+
+
+async def fetch_rank(map_md5: str, mode: int, score: float) -> int:
+    """\
+    Return the rank a score of `score` (or pp) would place on a map's
+    leaderboard in a mode; scores with equal values share a rank.
+    """
+    key = _key(map_md5, mode)
+
+    pipe = app.state.services.redis.pipeline()
+    pipe.exists(key)
+    pipe.zcount(key, f"({score}", "+inf")
+    pipe.expire(key, MAP_LEADERBOARD_TTL)
+    exists, num_better_scores, _ = await pipe.execute()
+
+    if not exists:
+        await populate(map_md5, mode)
+        num_better_scores = await app.state.services.redis.zcount(
+            key,
+            f"({score}",
+            "+inf",
+        )
+
+    return int(num_better_scores) + 1
+
+
+async def add_best(map_md5: str, mode: int, user_id: int, score: float) -> None:
+    """Set a player's best score (or pp) on a map's leaderboard in a mode."""
+    key = _key(map_md5, mode)
+
+    if await app.state.services.redis.exists(key):
+        pipe = app.state.services.redis.pipeline()
+        pipe.zadd(key, {str(user_id): score})
+        pipe.expire(key, MAP_LEADERBOARD_TTL)
+        await pipe.execute()
+    else:
+        # the score's already in sql.
+        await populate(map_md5, mode)
+
+
+async def wipe(map_md5s: Iterable[str]) -> None:
+    """Remove maps' leaderboards (in all modes)."""
+    keys = [_key(map_md5, mode) for map_md5 in map_md5s for mode in MODES]
+    if keys:
+        await app.state.services.redis.delete(*keys)
+
+
+async def update_player(user_id: int, restricted: bool) -> None:
+    """\
+    Update the leaderboards of maps a player has best scores on, after
+    their restriction status has changed (restricted players' scores
+    are not shown), & invalidate those maps' cached leaderboards.
+    """
+    rows = await app.state.services.database.fetch_all(
+        "SELECT map_md5, mode, score, pp FROM scores "
+        "WHERE userid = :user_id AND status = 2",
+        {"user_id": user_id},
+    )
+    if not rows:
+        return
+
+    for row in rows:
+        app.state.cache.leaderboards.invalidate(row["map_md5"])
+
+    keys = [_key(row["map_md5"], row["mode"]) for row in rows]
+
+    pipe = app.state.services.redis.pipeline(transaction=False)
+    if restricted:
+        for key in keys:
+            pipe.zrem(key, str(user_id))
+    else:
+        # only update populated leaderboards; the
+        # rest will include the scores once populated.
+        for key in keys:
+            pipe.exists(key)
+        populated = await pipe.execute()
+
+        for key, row, exists in zip(keys, rows, populated):
+            if exists:
+                pipe.zadd(key, {str(user_id): row[scoring_metric(row["mode"])]})
+                # (in case it expired since; keys must never lack a ttl.)
+                pipe.expire(key, MAP_LEADERBOARD_TTL)
+
+    await pipe.execute()
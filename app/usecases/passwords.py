@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+
+import app.settings
+import app.state
+
+# verified credentials are also persisted to redis (when a secret is
+# configured), so they survive restarts & are shared between workers.
+# XXX: only keyed hmacs of the credentials are stored, never their md5s.
+PERSISTENT_CACHE_KEY_PREFIX = "bancho:verified_credentials"
+
+
+def _persistent_cache_key(pw_md5: bytes, pw_bcrypt: bytes) -> str:
+    digest = hmac.new(
+        app.settings.PASSWORD_CACHE_SECRET.encode(),
+        pw_bcrypt + b":" + pw_md5,
+        hashlib.sha256,
+    ).hexdigest()
+    return f"{PERSISTENT_CACHE_KEY_PREFIX}:{digest}"
+
+
+def _record_lookup(result: str) -> None:
+    if app.state.services.datadog:
+        app.state.services.datadog.increment(
+            "bancho.password_cache.lookups",
+            tags=[f"result:{result}"],
+        )
+
+
+async def verify(pw_md5: bytes, pw_bcrypt: bytes) -> bool:
+    """\
+    Check `pw_md5` against `pw_bcrypt`, caching verified credentials.
+
+    Credentials are checked against the in-memory cache (~0.01ms), the
+    persistent cache in redis if enabled (~0.1ms), & lastly bcrypt (~200ms).
+    """
+    cached_md5 = app.state.cache.bcrypt.get(pw_bcrypt)
+    if cached_md5 is not None:
+        _record_lookup("memory")
+        return pw_md5 == cached_md5
+
+    if app.settings.PASSWORD_CACHE_SECRET:
+        key = _persistent_cache_key(pw_md5, pw_bcrypt)
+
+        if await app.state.services.redis.exists(key):
+            _record_lookup("redis")
+            app.state.cache.bcrypt[pw_bcrypt] = pw_md5
+            return True
+
+    _record_lookup("bcrypt")
+
+    if not await app.state.services.bcrypt_pool.checkpw(pw_md5, pw_bcrypt):
+        return False
+
+    await remember(pw_md5, pw_bcrypt)
+    return True
+
+
+async def remember(pw_md5: bytes, pw_bcrypt: bytes) -> None:
+    """Cache `pw_md5` as verified against `pw_bcrypt`."""
+    app.state.cache.bcrypt[pw_bcrypt] = pw_md5
+
+    if app.settings.PASSWORD_CACHE_SECRET:
+        await app.state.services.redis.set(
+            _persistent_cache_key(pw_md5, pw_bcrypt),
+            1,
+            ex=app.settings.PASSWORD_CACHE_TTL,
+        )
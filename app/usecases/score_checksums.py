@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import app.state
+from app.logging import Ansi
+from app.logging import log
+from app.objects.bloom_filter import BloomFilter
+
+# submitted scores' checksums are checked against all previous scores, to
+# reject duplicate submissions. most submissions aren't duplicates, so a
+# bloom filter of all scores' checksums lets them skip the sql query; it's
+# warmed in the background at startup, with room for the scores to double.
+# XXX: until it's warmed (or if warming failed), all checksums are
+#      checked in sql; the filter is rebuilt on each restart.
+FILTER_ERROR_RATE = 0.01
+FILTER_MIN_CAPACITY = 1_000_000
+FILTER_WARM_BATCH_SIZE = 10_000
+
+
+def _record_check(result: str) -> None:
+    if app.state.services.datadog:
+        app.state.services.datadog.increment(
+            "bancho.score_checksums.checks",
+            tags=[f"result:{result}"],
+        )
+
+
+async def is_duplicate(checksum: str) -> bool:
+    """Return whether a score with `checksum` has already been submitted."""
+    bloom = app.state.cache.score_checksums
+
+    if bloom is not None and bloom.complete and checksum not in bloom:
+        _record_check("filtered")
+        return False
+
+    duplicate = (
+        await app.state.services.database.fetch_val(
+            "SELECT 1 FROM scores WHERE online_checksum = :checksum",
+            {"checksum": checksum},
+        )
+        is not None
+    )
+
+    _record_check("duplicate" if duplicate else "checked")
+    return duplicate
+
+
+def add(checksum: str) -> None:
+    """Add a newly submitted score's checksum to the filter."""
+    if app.state.cache.score_checksums is not None:
+        app.state.cache.score_checksums.add(checksum)
+
+
+async def warm_filter() -> None:
+    """Build the filter from all scores' checksums."""
+    num_scores = await app.state.services.database.fetch_val(
+        "SELECT COUNT(*) FROM scores",
+    )
+
+    # from here on, newly submitted scores are added as they're inserted.
+    bloom = app.state.cache.score_checksums = BloomFilter(
+        capacity=max(num_scores * 2, FILTER_MIN_CAPACITY),
+        error_rate=FILTER_ERROR_RATE,
+    )
+
+    last_id = 0
+    while True:
+        rows = await app.state.services.database.fetch_all(
+            "SELECT id, online_checksum FROM scores "
+            "WHERE id > :last_id ORDER BY id LIMIT :batch_size",
+            {"last_id": last_id, "batch_size": FILTER_WARM_BATCH_SIZE},
+        )
+        if not rows:
+            break
+
+        for row in rows:
+            bloom.add(row["online_checksum"])
+
+        last_id = rows[-1]["id"]
+
+    bloom.complete = True
+    log(f"Warmed score checksum filter: {bloom}.", Ansi.LCYAN)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Any
+
+import app.settings
+import app.state
+from app.objects.beatmap import Beatmap
+from app.objects.score import Score
+from app.usecases.map_leaderboards import scoring_metric
+
+# work following score submission which the client doesn't wait for; it's
+# run by the job queue's workers, in the background (see `JobQueue`).
+# XXX: jobs are identified by the score's checksum (unique, as duplicate
+#      submissions are rejected), so retried submissions aren't repeated.
+
+
+async def enqueue_map_plays_update(bmap: Beatmap, score: Score) -> None:
+    """Save a map's play & pass counts (after `score`) to sql."""
+    await app.state.services.job_queue.enqueue(
+        "update_map_plays",
+        {"map_md5": bmap.md5, "plays": bmap.plays, "passes": bmap.passes},
+        key=f"update_map_plays:{score.client_checksum}",
+    )
+
+
+async def update_map_plays(payload: dict[str, Any]) -> None:
+    # counts only increase, so older updates (e.g. retried) don't overwrite newer.
+    await app.state.services.database.execute(
+        "UPDATE maps SET plays = :plays, passes = :passes "
+        "WHERE md5 = :map_md5 AND plays < :plays",
+        payload,
+    )
+
+
+async def enqueue_first_place_announcement(score: Score, announcement: str) -> None:
+    """Announce a new #1 score in #announce, along with the previous #1."""
+    assert score.player is not None
+    assert score.bmap is not None
+
+    if score.prev_best is not None:
+        prev_best_value = getattr(score.prev_best, scoring_metric(score.mode))
+    else:
+        prev_best_value = None
+
+    await app.state.services.job_queue.enqueue(
+        "announce_first_place",
+        {
+            "announcement": announcement,
+            "user_id": score.player.id,
+            "map_md5": score.bmap.md5,
+            "mode": score.mode,
+            "prev_best_value": prev_best_value,
+        },
+        key=f"announce_first_place:{score.client_checksum}",
+    )
+
+
+async def announce_first_place(payload: dict[str, Any]) -> None:
+    announce_chan = app.state.sessions.channels.get_by_name("#announce")
+    assert announce_chan is not None
+
+    player = await app.state.sessions.players.from_cache_or_sql(
+        id=payload["user_id"],
+    )
+    assert player is not None
+
+    announcement = payload["announcement"]
+
+    # the previous #1 is the best of other players' scores, if it was better
+    # than the player's own previous best (the scores may already be updated).
+    metric = scoring_metric(payload["mode"])
+    prev_n1 = await app.state.services.database.fetch_one(
+        f"SELECT u.id, u.name, s.{metric} AS _score FROM users u "
+        "INNER JOIN scores s ON u.id = s.userid "
+        "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
+        "AND s.status = 2 AND u.priv & 1 AND u.id != :user_id "
+        f"ORDER BY s.{metric} DESC LIMIT 1",
+        {
+            "map_md5": payload["map_md5"],
+            "mode": payload["mode"],
+            "user_id": payload["user_id"],
+        },
+    )
+
+    if prev_n1 and (
+        payload["prev_best_value"] is None
+        or prev_n1["_score"] > payload["prev_best_value"]
+    ):
+        announcement += (
+            f" (Previous #1: [https://{app.settings.DOMAIN}/u/"
+            f"{prev_n1['id']} {prev_n1['name']}])"
+        )
+
+    announce_chan.send(announcement, sender=player, to_self=True)
+
+
+async def enqueue_cheat_values_save(score: Score, cheat_values: str) -> None:
+    """Save the cheat values submitted with a score to sql."""
+    await app.state.services.job_queue.enqueue(
+        "save_cheat_values",
+        {"score_id": score.id, "cheat_values": cheat_values},
+        key=f"save_cheat_values:{score.id}",
+    )
+
+
+async def save_cheat_values(payload: dict[str, Any]) -> None:
+    exists = await app.state.services.database.fetch_val(
+        "SELECT 1 FROM scoreinfo WHERE scoreid = :score_id",
+        {"score_id": payload["score_id"]},
+    )
+    if exists:
+        return
+
+    await app.state.services.database.execute(
+        "INSERT INTO scoreinfo (scoreid, cheat_values) "
+        "VALUES (:score_id, :cheat_values)",
+        payload,
+    )
+
+
+JOB_HANDLERS = {
+    "update_map_plays": update_map_plays,
+    "announce_first_place": announce_first_place,
+    "save_cheat_values": save_cheat_values,
+}
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import math
+
+import app.state
+from app.constants.gamemodes import GameMode
+from app.logging import Ansi
+from app.logging import log
+from app.objects.top_scores import calculate_weighted_stats
+from app.objects.top_scores import TOP_SCORES_LIMIT
+from app.objects.top_scores import TopScores
+
+# a player's best scores which award pp (on ranked & approved maps).
+# XXX: ties are ordered by id, so the weighted accuracy is deterministic.
+BEST_SCORES_QUERY = (
+    "SELECT s.id, s.pp, s.acc FROM scores s "
+    "INNER JOIN maps m ON s.map_md5 = m.md5 "
+    "WHERE s.userid = :user_id AND s.mode = :mode "
+    "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
+    "ORDER BY s.pp DESC, s.id"
+)
+
+BEST_SCORES_COUNT_QUERY = (
+    "SELECT COUNT(*) FROM scores s "
+    "INNER JOIN maps m ON s.map_md5 = m.md5 "
+    "WHERE s.userid = :user_id AND s.mode = :mode "
+    "AND s.status = 2 AND m.status IN (2, 3)"
+)
+
+
+async def _fetch_from_sql(user_id: int, mode: GameMode) -> TopScores:
+    params = {"user_id": user_id, "mode": mode}
+    count = await app.state.services.database.fetch_val(BEST_SCORES_COUNT_QUERY, params)
+    rows = await app.state.services.database.fetch_all(
+        f"{BEST_SCORES_QUERY} LIMIT {TOP_SCORES_LIMIT}",
+        params,
+    )
+    return TopScores(
+        [(row["id"], row["pp"], row["acc"]) for row in rows],
+        count=count,
+    )
+
+
+async def add_best(
+    user_id: int,
+    mode: GameMode,
+    score_id: int,
+    pp: float,
+    acc: float,
+    prev_best_id: int | None,
+) -> TopScores:
+    """\
+    Update a player's top scores with a new best score (already in sql),
+    which replaced their previous best on the map (if they had one).
+    """
+    key = (user_id, mode)
+
+    top_scores = app.state.cache.top_scores.get(key)
+    if top_scores is not None:
+        # XXX: round as sql will have (pp & acc are stored as float(x, 3))
+        if top_scores.replace(score_id, round(pp, 3), round(acc, 3), prev_best_id):
+            return top_scores
+
+    # not cached, or we need scores beyond those cached.
+    top_scores = await _fetch_from_sql(user_id, mode)
+    app.state.cache.top_scores[key] = top_scores
+    return top_scores
+
+
+def invalidate() -> None:
+    """\
+    Clear all cached top scores; to be used when scores' eligibility for
+    pp changes outside of submission (e.g. map statuses, score deletion).
+    """
+    app.state.cache.top_scores.clear()
+
+
+async def check_consistency(user_id: int, mode: GameMode) -> bool:
+    """\
+    Check a player's cached weighted accuracy & pp against a full
+    recalculation from sql; inconsistent top scores are discarded.
+    """
+    top_scores = app.state.cache.top_scores.get((user_id, mode))
+    if top_scores is None:
+        return True
+
+    rows = await app.state.services.database.fetch_all(
+        BEST_SCORES_QUERY,
+        {"user_id": user_id, "mode": mode},
+    )
+    expected_acc, expected_pp = calculate_weighted_stats(
+        [(row["pp"], row["acc"]) for row in rows],
+        count=len(rows),
+    )
+    cached_acc, cached_pp = top_scores.stats
+
+    if cached_pp == expected_pp and math.isclose(
+        cached_acc,
+        expected_acc,
+        abs_tol=1e-6,
+    ):
+        return True
+
+    log(
+        f"Top scores for user {user_id} ({mode!r}) are inconsistent "
+        f"(cached: {cached_pp}pp {cached_acc:.3f}%, "
+        f"sql: {expected_pp}pp {expected_acc:.3f}%); discarding.",
+        Ansi.LRED,
+    )
+    app.state.cache.top_scores.pop((user_id, mode), None)
+
+    if app.state.services.datadog:
+        app.state.services.datadog.increment("bancho.top_scores.inconsistencies")
+
+    return False
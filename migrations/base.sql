@@ -55,6 +55,15 @@ create table client_hashes
 	primary key (userid, osupath, adapters, uninstall_id, disk_serial)
 );
 
+create index client_hashes_adapters_index
+	on client_hashes (adapters);
+
+create index client_hashes_uninstall_id_index
+	on client_hashes (uninstall_id);
+
+create index client_hashes_disk_serial_index
+	on client_hashes (disk_serial);
+
 create table comments
 (
 	id int auto_increment
@@ -223,6 +232,9 @@ create table scores
 	online_checksum char(32) not null
 );
 
+create index scores_online_checksum_index
+	on scores (online_checksum);
+
 create table startups
 (
 	id int auto_increment
@@ -409,3 +409,11 @@ alter table maps drop primary key;
 alter table maps add primary key (id);
 alter table maps modify column server enum('osu!', 'private') not null default 'osu!' after id;
 unlock tables;
+
+# v4.8.2
+create index client_hashes_adapters_index on client_hashes (adapters);
+create index client_hashes_uninstall_id_index on client_hashes (uninstall_id);
+create index client_hashes_disk_serial_index on client_hashes (disk_serial);
+
+# v4.8.3
+create index scores_online_checksum_index on scores (online_checksum);
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+
+from app.objects.bloom_filter import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    checksums = [uuid.uuid4().hex for _ in range(1_000)]
+
+    for checksum in checksums:
+        bloom.add(checksum)
+
+    assert len(bloom) == 1_000
+    assert all(checksum in bloom for checksum in checksums)
+    assert 1 not in bloom
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for _ in range(10_000):
+        bloom.add(uuid.uuid4().hex)
+
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10_000))
+
+    assert false_positives / 10_000 < 0.02
+    assert 0.005 < bloom.estimated_error_rate < 0.015
+    assert bloom.stats()["bytes"] == (bloom.num_bits + 7) // 8
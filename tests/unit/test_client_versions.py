@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date
+from typing import Any
+
+from app.objects.client_versions import ClientVersions
+from app.objects.client_versions import parse_changelog_builds
+
+
+def _build(version: str, major: bool = False) -> dict[str, Any]:
+    return {"version": version, "changelog_entries": [{"major": major}]}
+
+
+CHANGELOG_FIXTURE = {
+    "stable40": {
+        "builds": [
+            _build("20230326"),
+            _build("20230319", major=True),
+            _build("20230301"),
+        ],
+    },
+    "beta40": {"builds": [_build("20230401")]},
+    "cuttingedge": {"builds": [_build("20230402.1"), _build("20230330")]},
+}
+
+
+def test_parse_changelog_builds():
+    builds = CHANGELOG_FIXTURE["stable40"]["builds"]
+    assert parse_changelog_builds(builds) == {date(2023, 3, 26), date(2023, 3, 19)}
+    assert parse_changelog_builds([]) == set()
+
+
+def test_client_versions_refresh(tmp_path):
+    fixture_path = tmp_path / "changelog.json"
+    fixture_path.write_text(json.dumps(CHANGELOG_FIXTURE))
+    snapshot_path = tmp_path / "client_versions.json"
+
+    client_versions = ClientVersions(snapshot_path, fixture_path)
+    assert asyncio.run(client_versions.refresh())
+    assert asyncio.run(client_versions.is_allowed("stable", date(2023, 3, 19)))
+    assert not asyncio.run(client_versions.is_allowed("stable", date(2023, 3, 1)))
+    assert asyncio.run(client_versions.is_allowed("cuttingedge", date(2023, 4, 2)))
+
+    # a failed refresh keeps the last good versions of the failed streams.
+    fixture = {**CHANGELOG_FIXTURE, "stable40": {"builds": []}}
+    fixture["beta40"] = {"builds": [_build("20230405")]}
+    fixture_path.write_text(json.dumps(fixture))
+    assert not asyncio.run(client_versions.refresh())
+    assert not asyncio.run(client_versions.is_allowed("stable", date(2023, 3, 1)))
+    assert asyncio.run(client_versions.is_allowed("stable", date(2023, 3, 19)))
+    assert asyncio.run(client_versions.is_allowed("beta", date(2023, 4, 5)))
+
+    # which are also loaded from disk on startup.
+    reloaded = ClientVersions(snapshot_path)
+    assert reloaded.load_snapshot()
+    assert reloaded.updated_at == client_versions.updated_at
+    assert asyncio.run(reloaded.is_allowed("stable", date(2023, 3, 19)))
+    assert asyncio.run(reloaded.is_allowed("beta", date(2023, 4, 5)))
+    assert not asyncio.run(reloaded.is_allowed("beta", date(2023, 4, 1)))
+
+
+def test_client_versions_without_snapshot(tmp_path):
+    fixture_path = tmp_path / "changelog.json"
+    fixture_path.write_text(json.dumps(CHANGELOG_FIXTURE))
+
+    # streams without versions yet are fetched when first checked.
+    client_versions = ClientVersions(tmp_path / "client_versions.json", fixture_path)
+    assert not asyncio.run(client_versions.is_allowed("stable", date(2010, 1, 1)))
+    assert asyncio.run(client_versions.is_allowed("stable", date(2023, 3, 26)))
+
+    # & clients are rejected if they can't be.
+    assert not asyncio.run(client_versions.is_allowed("tourney", date(2023, 3, 26)))
+
+    fixture_path.write_text(json.dumps({}))
+    client_versions = ClientVersions(tmp_path / "missing.json", fixture_path)
+    assert not client_versions.load_snapshot()
+    assert not asyncio.run(client_versions.is_allowed("stable", date(2023, 3, 26)))
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import app.packets
+import app.settings
+import app.state
+from app.constants.gamemodes import GameMode
+from app.constants.mods import Mods
+from app.constants.privileges import Privileges
+from app.objects.channel import Channel
+from app.objects.clan import Clan
+from app.objects.collections import Channels
+from app.objects.collections import Clans
+from app.objects.collections import Matches
+from app.objects.collections import Players
+from app.objects.match import Match
+from app.objects.match import MatchTeamTypes
+from app.objects.match import MatchWinConditions
+from app.objects.match import SlotStatus
+from app.objects.player import ModeData
+from app.objects.player import Player
+
+
+def _player(id: int, name: str) -> Player:
+    return Player(id=id, name=name, priv=Privileges.UNRESTRICTED)
+
+
+def test_players_get():
+    players = Players()
+    cmyui = _player(3, "cmyui")
+    tourney = _player(3, "cmyui")  # a second session of the same player
+    other = _player(4, "Other Player")
+
+    for player in (cmyui, tourney, other):
+        players.append(player)
+
+    assert list(players) == [cmyui, tourney, other]
+    assert players.get(token=tourney.token) is tourney
+    assert players.get(id=3) is cmyui
+    assert players.get(name="other_player") is other
+    # (names are checked by calling __contains__, as `in` expects a Player.)
+    assert players.__contains__("Other Player")
+    assert not players.__contains__("other_player")
+    assert players.ids == {3, 4}
+
+    # tokens are cleared on logout, before the player is removed.
+    cmyui.token = ""
+    players.remove(cmyui)
+
+    assert cmyui not in players
+    assert players.get(id=3) is tourney
+    assert players.get(token="") is None
+    assert list(players) == [tourney, other]
+
+
+def test_players_privilege_sets():
+    players = Players()
+    admin = Player(id=3, name="cmyui", priv=Privileges.UNRESTRICTED | Privileges.STAFF)
+    player = _player(4, "Other Player")
+    players.append(admin)
+    players.append(player)
+
+    assert players.staff == {admin}
+    assert players.unrestricted == {admin, player}
+    assert players.restricted == set()
+
+    player.priv &= ~Privileges.UNRESTRICTED
+    players.update_privs(player)
+    assert players.unrestricted == {admin}
+    assert players.restricted == {player}
+
+    players.remove(admin)
+    assert players.staff == set()
+    assert players.unrestricted == set()
+
+
+def test_channels_get_by_name():
+    channels = Channels()
+    osu = Channel(name="#osu", topic="General discussion.")
+    spec = Channel(name="#spec_3", topic="cmyui's spectator channel.", instance=True)
+    channels.extend(c for c in (osu, spec))
+
+    assert channels.get_by_name("#osu") is osu
+    assert channels.get_by_name("#spec_3") is spec
+    assert channels.get_by_name("#spectator") is None
+
+    channels.remove(spec)
+    assert channels.get_by_name("#spec_3") is None
+    assert list(channels) == [osu]
+
+
+def test_clans_get():
+    clans = Clans()
+    clan = Clan(
+        id=1,
+        name="Kawata",
+        tag="KWT",
+        created_at=datetime.now(),
+        owner_id=3,
+        member_ids={3},
+    )
+    clans.append(clan)
+
+    assert clans.get(id=1) is clans.get(name="Kawata") is clans.get(tag="KWT") is clan
+    assert clan in clans and clans.__contains__("Kawata")
+
+    clans.remove(clan)
+    assert clans.get(tag="KWT") is None
+    assert clan not in clans
+
+
+def test_players_broadcast_stats():
+    players = Players()
+    cmyui = _player(3, "cmyui")
+    other = _player(4, "Other Player")
+    players.append(cmyui)
+    players.append(other)
+    cmyui.stats[cmyui.status.mode] = ModeData(
+        tscore=0,
+        rscore=0,
+        pp=0,
+        acc=0.0,
+        plays=0,
+        playtime=0,
+        max_combo=0,
+        total_hits=0,
+        rank=0,
+        grades={},
+    )
+
+    for _ in range(3):
+        players.broadcast_stats(cmyui)
+    players.broadcast_stats(other)
+    assert len(players.stats_broadcaster) == 2
+    assert players.stats_broadcaster.suppressed == 2
+    assert cmyui.dequeue() is None
+
+    players.remove(other)
+    players.stats_broadcaster.flush()
+    assert players.stats_broadcaster.flushed == 1
+    assert cmyui.dequeue() == cmyui.stats_packet
+    assert len(players.stats_broadcaster) == 0
+
+
+def test_players_enqueue_skips_bots(monkeypatch):
+    monkeypatch.setattr(app.settings, "PLAYER_QUEUE_MAX_SIZE", 8)
+    players = Players()
+    bot = Player(id=1, name="Aika", priv=Privileges.UNRESTRICTED, bot_client=True)
+    cmyui = _player(3, "cmyui")
+    players.append(bot)
+    players.append(cmyui)
+
+    # the bot's queue is never read, so nothing is queued for it.
+    for _ in range(3):
+        players.enqueue(b"\x00" * 4)
+        assert cmyui.dequeue() == b"\x00" * 4
+
+    assert (bot.dequeue(), bot.queue_size, bot.queue_overflowed) == (None, 0, False)
+
+
+def _match(host: Player, id: int = 0) -> Match:
+    return Match(
+        id=id,
+        name="cmyui's game",
+        password="hunter2",
+        map_name="",
+        map_id=0,
+        map_md5="",
+        host_id=host.id,
+        mode=GameMode.VANILLA_OSU,
+        mods=Mods.NOMOD,
+        win_condition=MatchWinConditions.score,
+        team_type=MatchTeamTypes.head_to_head,
+        freemods=False,
+        seed=0,
+        chat_channel=Channel(name=f"#multi_{id}", topic="", instance=True),
+    )
+
+
+def test_match_state_data(monkeypatch):
+    host = _player(3, "cmyui")
+    players = Players()
+    players.append(host)
+    monkeypatch.setattr(app.state.sessions, "players", players)
+
+    match = _match(host)
+    data = match.state_data(send_pw=True)
+    version = match.state_version
+    assert data == app.packets.write_match(match, send_pw=True)
+    assert match.state_data(send_pw=True) is data
+
+    # changes to non-serialized attributes keep the cached state.
+    match.slots[0].loaded = True
+    match.winning_pts = 3
+    assert match.state_version == version
+    assert match.state_data(send_pw=True) is data
+
+    match.slots[0].status = SlotStatus.locked
+    assert match.state_version > version
+    assert match.state_data(send_pw=True) == app.packets.write_match(match)
+
+    match.passwd = ""
+    assert match.state_data(send_pw=False) == app.packets.write_match(
+        match,
+        send_pw=False,
+    )
+
+
+def test_matches_lobby_state_collapsed(monkeypatch):
+    host = _player(3, "cmyui")
+    lobby_player = _player(4, "Other Player")
+    players = Players()
+    players.append(host)
+
+    lobby = Channel(name="#lobby", topic="Multiplayer lobby discussion room.")
+    lobby.append(lobby_player)
+    channels = Channels()
+    channels.append(lobby)
+
+    matches = Matches()
+    match = _match(host)
+    matches[0] = match
+
+    monkeypatch.setattr(app.state.sessions, "players", players)
+    monkeypatch.setattr(app.state.sessions, "channels", channels)
+    monkeypatch.setattr(app.state.sessions, "matches", matches)
+
+    async def handler() -> None:
+        for status in (SlotStatus.locked, SlotStatus.open, SlotStatus.locked):
+            match.slots[1].status = status
+            match.enqueue_state()
+
+        await asyncio.sleep(0)
+
+    asyncio.run(handler())
+    assert lobby_player.dequeue() == app.packets.update_match(match, send_pw=False)
+
+
+def test_matches_remove_keeps_ids():
+    host = _player(3, "cmyui")
+    matches = Matches()
+    first, second = _match(host, id=0), _match(host, id=1)
+    matches[0], matches[1] = first, second
+
+    matches.remove(first)
+
+    assert len(matches) == 64
+    assert matches[0] is None
+    assert matches[1] is second
+    assert matches.get_free() == 0
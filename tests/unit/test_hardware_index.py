@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from app.objects.hardware_index import HardwareIndex
+
+
+def test_hardware_index_matches():
+    hardware_index = HardwareIndex()
+    hardware_index.add(3, adapters="a1", uninstall_id="u1", disk_serial="d1")
+    hardware_index.add(4, adapters="a2", uninstall_id="u2", disk_serial="d1")
+    hardware_index.add(5, adapters="a3", uninstall_id="u3", disk_serial="d3")
+
+    assert hardware_index.matches(3, "a1", "u1", "d1") == {4}
+    assert hardware_index.matches(6, "a3", "u2", "d9") == {4, 5}
+    assert hardware_index.matches(6, "a9", "u9", "d9") == set()
+
+    # unchecked hashes (e.g. under wine) aren't matched.
+    assert hardware_index.matches(6, None, "u9", None) == set()
+    assert hardware_index.matches(6, None, "u1", None) == {3}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.objects.leaderboard_cache import CachedLeaderboard
+from app.objects.leaderboard_cache import LeaderboardCache
+
+
+def test_leaderboard_cache_invalidates_maps():
+    leaderboard_cache = LeaderboardCache(maxsize=10)
+    top = (0, 1, 0, "")
+    mods = (0, 2, 64, "")
+    leaderboard = CachedLeaderboard(score_rows=[], score_lines=[])
+
+    assert leaderboard_cache.get("a" * 32, top) is None
+    leaderboard_cache.set("a" * 32, top, leaderboard, generation=0)
+    leaderboard_cache.set("a" * 32, mods, leaderboard, generation=0)
+    leaderboard_cache.set("b" * 32, top, leaderboard, generation=0)
+    assert leaderboard_cache.get("a" * 32, top) is leaderboard
+    assert leaderboard_cache.get("a" * 32, (0, 2, 8, "")) is None
+
+    # all of a map's leaderboards are invalidated together.
+    leaderboard_cache.invalidate("a" * 32)
+    assert leaderboard_cache.peek("a" * 32, top) is None
+    assert leaderboard_cache.peek("a" * 32, mods) is None
+    assert leaderboard_cache.peek("b" * 32, top) is leaderboard
+
+    assert (leaderboard_cache.hits, leaderboard_cache.misses) == (1, 2)
+    assert leaderboard_cache.stats()["size"] == 1
+
+
+async def test_leaderboard_cache_drops_fetches_before_invalidation():
+    leaderboard_cache = LeaderboardCache(maxsize=10)
+    top = (0, 1, 0, "")
+    stale = CachedLeaderboard(score_rows=[{"id": 1}], score_lines=[])
+    fetching = asyncio.Event()
+    invalidated = asyncio.Event()
+
+    async def fetch_leaderboard() -> None:
+        generation = leaderboard_cache.generation("a" * 32)
+        fetching.set()
+        await invalidated.wait()  # (fetching the scores from sql)
+        leaderboard_cache.set("a" * 32, top, stale, generation)
+
+    async def submit_score() -> None:
+        await fetching.wait()
+        leaderboard_cache.invalidate("a" * 32)
+        invalidated.set()
+
+    # the map's scores changed during the fetch, so it isn't cached.
+    await asyncio.gather(fetch_leaderboard(), submit_score())
+    assert leaderboard_cache.peek("a" * 32, top) is None
+
+    # fetches after the invalidation are.
+    leaderboard = CachedLeaderboard(score_rows=[{"id": 2}], score_lines=[])
+    generation = leaderboard_cache.generation("a" * 32)
+    leaderboard_cache.set("a" * 32, top, leaderboard, generation)
+    assert leaderboard_cache.peek("a" * 32, top) is leaderboard
+
+
+def test_leaderboard_cache_forgets_old_generations():
+    leaderboard_cache = LeaderboardCache(maxsize=2)
+    top = (0, 1, 0, "")
+    leaderboard = CachedLeaderboard(score_rows=[], score_lines=[])
+
+    generation = leaderboard_cache.generation("a" * 32)
+    leaderboard_cache.invalidate("a" * 32)
+
+    # once the map's generation is forgotten, the fetch is still dropped.
+    leaderboard_cache.invalidate("b" * 32)
+    leaderboard_cache.invalidate("c" * 32)
+    leaderboard_cache.set("a" * 32, top, leaderboard, generation)
+    assert leaderboard_cache.peek("a" * 32, top) is None
+
+    leaderboard_cache.clear()
+    leaderboard_cache.set("c" * 32, top, leaderboard, generation)
+    assert leaderboard_cache.peek("c" * 32, top) is None
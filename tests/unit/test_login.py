@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+from starlette.requests import Request
+
+import app.settings
+import app.state
+from app.api.domains import cho
+from app.constants.privileges import Privileges
+from app.repositories import ingame_logins as logins_repo
+from app.repositories import players as players_repo
+from app.state.services import IPResolver
+from app.state.services import LoginAdmission
+from app.usecases import passwords as passwords_usecases
+
+
+class FakeConnection:
+    async def execute(self, query: str, values: dict[str, Any]) -> None:
+        await asyncio.sleep(0)
+
+    async def fetch_all(
+        self,
+        query: str,
+        values: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        await asyncio.sleep(0)
+
+        # a banned player with matching hardware; the login stops here.
+        return [{"name": "Banned Player", "priv": 0, "occurrences": 1}]
+
+
+class FakeDatabase:
+    """A database with a pool of `pool_size` connections."""
+
+    def __init__(self, pool_size: int) -> None:
+        self._pool = asyncio.Semaphore(pool_size)
+
+    @contextlib.asynccontextmanager
+    async def connection(self) -> AsyncIterator[FakeConnection]:
+        async with self._pool:
+            yield FakeConnection()
+
+
+def _login_request(username: str) -> Request:
+    body = (
+        f"{username}\n{'0' * 32}\n"
+        f"b20240101|0|0|{'0' * 32}:00-00-00-00-00-00.:{'0' * 32}:{'0' * 32}:{'0' * 32}:|0\n"
+    ).encode()
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "headers": [(b"x-real-ip", b"1.1.1.1"), (b"x-forwarded-for", b"1.1.1.1")],
+        },
+        receive,
+    )
+
+
+async def test_concurrent_logins_exceeding_pool_size(monkeypatch):
+    pool_size = 2
+    database = FakeDatabase(pool_size)
+    geoloc_lookups = 0
+
+    async def fetch_one(name: str, fetch_all_fields: bool) -> dict[str, Any]:
+        return {
+            "id": hash(name) % 1000 + 3,
+            "priv": Privileges.UNRESTRICTED,
+            "pw_bcrypt": "$2b$",
+            "clan_id": 0,
+        }
+
+    async def verify(password_md5: bytes, pw_bcrypt: bytes) -> bool:
+        await asyncio.sleep(0.01)  # (bcrypt)
+        return True
+
+    async def create(**kwargs: Any) -> None:
+        return None
+
+    async def fetch_geoloc(*args: Any) -> None:
+        nonlocal geoloc_lookups
+        geoloc_lookups += 1
+
+    monkeypatch.setattr(app.state.services, "database", database)
+
+    # (these are created at startup)
+    monkeypatch.setattr(
+        app.state.services,
+        "ip_resolver",
+        IPResolver(),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        app.state.services,
+        "login_admission",
+        LoginAdmission(rate=1000, burst=1000, max_queued=1000),
+        raising=False,
+    )
+    monkeypatch.setattr(app.state.services, "fetch_geoloc", fetch_geoloc)
+    monkeypatch.setattr(app.settings, "DISALLOW_OLD_CLIENTS", False)
+    monkeypatch.setattr(app.settings, "HARDWARE_INDEX_IN_MEMORY", False)
+    monkeypatch.setattr(cho, "log", lambda *args, **kwargs: None)
+    monkeypatch.setattr(players_repo, "fetch_one", fetch_one)
+    monkeypatch.setattr(passwords_usecases, "verify", verify)
+    monkeypatch.setattr(logins_repo, "create", create)
+
+    # each login runs up to three queries at once on pooled connections;
+    # none may be held while waiting for another, or the pool deadlocks.
+    responses = await asyncio.wait_for(
+        asyncio.gather(
+            *(
+                cho.bancho_handler(
+                    _login_request(f"Player {i}"),
+                    osu_token=None,
+                    user_agent="osu!",
+                )
+                for i in range(pool_size * 5)
+            ),
+        ),
+        timeout=5,
+    )
+
+    assert all(
+        response.headers["cho-token"] == "contact-staff" for response in responses
+    )
+
+    # players with banned hardware matches are never geolocated.
+    assert geoloc_lookups == 0
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.objects.lru_cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1  # "b" is now least recently used
+
+    cache["c"] = 3
+    assert "b" not in cache
+    assert list(cache) == ["a", "c"]
+    assert cache.get("b") is None
+
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "ttl": None,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+        "hit_rate": pytest.approx(1 / 3),
+    }
+
+
+def test_lru_cache_expires_items(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cache: LRUCache[str, bool] = LRUCache(maxsize=10, ttl=60)
+    cache["a"] = True
+    assert "a" in cache
+
+    now += 61
+    assert "a" not in cache
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
 
 import app.packets
@@ -173,6 +175,7 @@ def test_write_get_attention():
     [
         ("waowww", b"\x18\x00\x00\x08\x00\x00\x00\x0b\x06waowww"),
         ("", b"\x18\x00\x00\x01\x00\x00\x00\x00"),
+        ("a" * 200, b"\x18\x00\x00\xcb\x00\x00\x00\x0b\xc8\x01" + b"a" * 200),
     ],
 )
 def test_write_notification(test_input, expected):
@@ -667,3 +670,236 @@ def test_write_match_abort():
 )
 def test_write_switch_tournament_server(test_input, expected):
     assert app.packets.switch_tournament_server(test_input) == expected
+
+
+def test_compile_packet_matches_write():
+    layout = (
+        app.packets.osuTypes.i32,
+        app.packets.osuTypes.string,
+        app.packets.osuTypes.u8,
+        app.packets.osuTypes.i32_list,
+    )
+    args = (-1, "cmyui", 255, [1, 2, 3])
+    writer = app.packets.compile_packet(
+        app.packets.ServerPackets.USER_PRESENCE,
+        *layout,
+    )
+    assert writer(*args) == app.packets.write(
+        app.packets.ServerPackets.USER_PRESENCE,
+        *zip(args, layout),
+    )
+
+
+# reading
+
+
+def _read_packets(
+    body: bytes,
+    packet_id: int,
+    read: str,
+    unhandled: list[int] | None = None,
+) -> list[Any]:
+    """Read all packets of `packet_id` from `body` using `read`."""
+    results = []
+
+    class _Packet(app.packets.BasePacket):
+        def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+            results.append(getattr(reader, read)())
+
+        async def handle(self, player):
+            ...
+
+    packet_table = app.packets.compile_packet_table(
+        {app.packets.ClientPackets(packet_id): _Packet},
+    )
+    with memoryview(body) as body_view:
+        reader = app.packets.BanchoPacketReader(body_view, packet_table)
+        for _ in reader:
+            pass
+
+    if unhandled is not None:
+        unhandled.extend(reader.unhandled)
+
+    return results
+
+
+def _client_packet(packet_id: int, data: bytes) -> bytes:
+    return (
+        packet_id.to_bytes(2, "little")
+        + b"\x00"
+        + len(data).to_bytes(4, "little")
+        + data
+    )
+
+
+@pytest.mark.parametrize(
+    ("test_input", "expected"),
+    [
+        (
+            app.packets.write_message("cmyui", "woah woah crazy!!", "#osu", 32),
+            app.packets.Message("cmyui", "woah woah crazy!!", "#osu", 32),
+        ),
+        (
+            app.packets.write_message("", "", "", 0),
+            app.packets.Message("", "", "", 0),
+        ),
+        (
+            app.packets.write_message("a", "ü" * 200, "b", -1),
+            app.packets.Message("a", "ü" * 200, "b", -1),
+        ),
+    ],
+)
+def test_read_message(test_input, expected):
+    body = _client_packet(1, test_input)
+    assert _read_packets(body, 1, "read_message") == [expected]
+
+
+@pytest.mark.parametrize(
+    ("test_input", "expected"),
+    [
+        (b"\x03\x00\x01\x00\x00\x00\x04\x00\x00\x00\xe9\x03\x00\x00", (1, 4, 1001)),
+        (b"\x00\x00", ()),
+    ],
+)
+def test_read_i32_list_i16l(test_input, expected):
+    body = _client_packet(85, test_input)
+    assert _read_packets(body, 85, "read_i32_list_i16l") == [expected]
+
+
+def test_read_skips_unhandled_packets():
+    body = (
+        _client_packet(4, b"")  # ping
+        + _client_packet(2, b"\x00\x00\x00\x00")  # logout
+        + _client_packet(63, b"\x0b\x04#osu")  # channel join
+        + _client_packet(2, b"\xff\xff\xff\xff")
+        + _client_packet(63, b"\x00")
+    )
+    assert _read_packets(body, 63, "read_string") == ["#osu", ""]
+
+
+def test_read_skips_unknown_packets():
+    body = (
+        _client_packet(1176, b"\x01\x02\x03")  # unknown to ClientPackets
+        + _client_packet(63, b"\x0b\x04#osu")  # channel join
+        + _client_packet(64, b"\x0b\x04#osu")  # higher than any handled
+        + _client_packet(0xFFFF, b"")
+    )
+    unhandled: list[int] = []
+    assert _read_packets(body, 63, "read_string", unhandled) == ["#osu"]
+    assert unhandled == [1176, 64, 0xFFFF]
+
+
+@pytest.mark.parametrize(
+    "truncated_header",
+    [b"\x04", b"\x04\x00\x00", b"\x04\x00\x00\x00\x00\x00"],
+)
+def test_read_stops_at_truncated_header(truncated_header):
+    with memoryview(truncated_header) as body_view:
+        assert list(app.packets.BanchoPacketReader(body_view, [])) == []
+
+    body = _client_packet(63, b"\x0b\x04#osu") + truncated_header
+    unhandled: list[int] = []
+    assert _read_packets(body, 63, "read_string", unhandled) == ["#osu"]
+    assert unhandled == []
+
+
+def test_compile_packet_table():
+    class _Packet(app.packets.BasePacket):
+        async def handle(self, player):
+            ...
+
+    packet_table = app.packets.compile_packet_table(
+        {app.packets.ClientPackets.JOIN_LOBBY: _Packet},
+    )
+    assert len(packet_table) == app.packets.ClientPackets.JOIN_LOBBY + 1
+    assert packet_table[app.packets.ClientPackets.JOIN_LOBBY] is _Packet
+    assert packet_table.count(None) == len(packet_table) - 1
+    assert app.packets.compile_packet_table({}) == []
+
+
+def test_read_replayframe_bundle():
+    frame = app.packets.ScoreFrame(
+        time=38242,
+        id=28,
+        num300=320,
+        num100=48,
+        num50=2,
+        num_geki=32,
+        num_katu=8,
+        num_miss=3,
+        total_score=492_392,
+        current_combo=39,
+        max_combo=122,
+        perfect=False,
+        current_hp=245,
+        tag_byte=0,
+        score_v2=False,
+    )
+    data = (
+        b"\x00\x00\x00\x00"  # extra
+        + b"\x02\x00"  # frame count
+        + b"\x01\x00\x00\x00\x80\x3f\x00\x00\x00\x40\x10\x00\x00\x00"
+        + b"\x00\x00\x00\x00\x40\x40\x00\x00\x80\x40\x20\x00\x00\x00"
+        + b"\x00"  # action
+        + app.packets.write_scoreframe(frame)
+        + b"\x07\x00"  # sequence
+    )
+
+    (bundle,) = _read_packets(_client_packet(18, data), 18, "read_replayframe_bundle")
+
+    assert bundle.replay_frames == [
+        app.packets.ReplayFrame(1, 0, 1.0, 2.0, 16),
+        app.packets.ReplayFrame(0, 0, 3.0, 4.0, 32),
+    ]
+    assert bundle.score_frame == frame
+    assert bundle.action == app.packets.ReplayAction.Standard
+    assert bundle.sequence == 7
+    assert bytes(bundle.raw_data) == data
+
+
+def test_read_raw_replayframe_bundle():
+    frame = app.packets.ScoreFrame(
+        time=38242,
+        id=28,
+        num300=320,
+        num100=48,
+        num50=2,
+        num_geki=32,
+        num_katu=8,
+        num_miss=3,
+        total_score=492_392,
+        current_combo=39,
+        max_combo=122,
+        perfect=False,
+        current_hp=245,
+        tag_byte=0,
+        score_v2=False,
+    )
+    data = (
+        b"\x00\x00\x00\x00"  # extra
+        + b"\x01\x00"  # frame count
+        + b"\x01\x00\x00\x00\x80\x3f\x00\x00\x00\x40\x10\x00\x00\x00"
+        + b"\x00"  # action
+        + app.packets.write_scoreframe(frame)
+        + b"\x07\x00"  # sequence
+    )
+    body = (
+        _client_packet(18, data)
+        + _client_packet(18, data[:-1])  # truncated
+        + _client_packet(18, b"\x00\x00\x00\x00\xff\xff" + data[6:])  # bad count
+        + _client_packet(18, b"")
+        + _client_packet(18, data)
+    )
+
+    bundles = _read_packets(body, 18, "read_raw_replayframe_bundle")
+    assert bundles[1:4] == [None, None, None]
+    assert bundles[0] == bundles[-1]
+
+    bundle = bundles[0]
+    assert (bundle.extra, bundle.frame_count) == (0, 1)
+    assert bytes(bundle.raw_data) == data
+
+    decoded = bundle.decode()
+    assert decoded.replay_frames == [app.packets.ReplayFrame(1, 0, 1.0, 2.0, 16)]
+    assert decoded.score_frame == frame
+    assert decoded.sequence == 7
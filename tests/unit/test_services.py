@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+
+from app.state.services import GeolocationDatabase
+from app.state.services import LoginAdmission
+
+
+def test_login_admission():
+    admission = LoginAdmission(rate=50, burst=2, max_queued=1)
+
+    async def login_storm() -> list[bool]:
+        return await asyncio.gather(*(admission.admit() for _ in range(4)))
+
+    # two are admitted immediately, one waits for a token & the last is deferred.
+    assert asyncio.run(login_storm()) == [True, True, True, False]
+    assert (admission.admitted, admission.deferred, admission.queued) == (3, 1, 0)
+
+
+def test_login_admission_reconnect_delay():
+    admission = LoginAdmission(rate=10, burst=10, max_queued=10)
+    delays = [admission.reconnect_delay() for _ in range(5)]
+
+    # reconnects are spread out at the admission rate (100ms apart), with jitter.
+    for i, delay in enumerate(delays, start=1):
+        assert i * 100 - 5 <= delay <= (i + 1) * 100
+
+
+def test_geolocation_database(tmp_path):
+    csv_path = tmp_path / "dbip-city-lite.csv"
+    csv_path.write_text(
+        "1.0.0.0,1.0.0.255,OC,AU,Queensland,South Brisbane,-27.4767,153.017\n"
+        "1.0.1.0,1.0.3.255,AS,CN,Fujian,Wenzhou,28.0,120.7\n"
+        "2001:200::,2001:200:ffff:ffff:ffff:ffff:ffff:ffff,AS,JP,Tokyo,Tokyo,35.6,139.7\n"
+        "8.8.8.0,8.8.8.255,NA,US,California,Mountain View,37.4,-122.1\n",
+    )
+    geoloc_db = GeolocationDatabase.from_csv(csv_path)
+    assert len(geoloc_db) == 4
+
+    def lookup(ip: str) -> str | None:
+        geoloc = geoloc_db.lookup(ipaddress.ip_address(ip))
+        return geoloc["country"]["acronym"] if geoloc is not None else None
+
+    assert lookup("1.0.0.0") == "au"
+    assert lookup("1.0.2.17") == "cn"
+    assert lookup("1.0.3.255") == "cn"
+    assert lookup("8.8.8.8") == "us"
+    assert lookup("2001:200::1") == "jp"
+    assert lookup("0.255.255.255") is None  # before the first range
+    assert lookup("1.0.4.0") is None  # between ranges
+    assert lookup("9.0.0.0") is None  # after the last range
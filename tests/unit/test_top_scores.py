@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.objects.top_scores import calculate_weighted_stats
+from app.objects.top_scores import TopScores
+
+
+def sort_by_pp(
+    best_scores: dict[int, tuple[int, float, float]],
+) -> list[tuple[int, float, float]]:
+    return sorted(best_scores.values(), key=lambda score: (-score[1], score[0]))
+
+
+def recalculate(
+    best_scores: dict[int, tuple[int, float, float]],
+    limit: int,
+) -> tuple[float, int]:
+    """The full recalculation, from a player's best scores (by map)."""
+    return calculate_weighted_stats(
+        [(pp, acc) for _, pp, acc in sort_by_pp(best_scores)[:limit]],
+        count=len(best_scores),
+    )
+
+
+def test_weighted_stats_ignore_scores_beyond_limit():
+    scores = [(1000.0 - i * 0.5, 100.0 - i * 0.01) for i in range(1500)]
+    assert calculate_weighted_stats(scores[:1000], count=1500) == pytest.approx(
+        calculate_weighted_stats(scores, count=1500),
+        abs=1e-9,
+    )
+
+
+def test_top_scores_matches_full_recalculation():
+    rng = random.Random(0)
+    best_scores: dict[int, tuple[int, float, float]] = {}  # {map_id: score}
+    # (a small limit, so scores are often replaced beyond it.)
+    top_scores = TopScores([], count=0, limit=50)
+    reloads = 0
+
+    for score_id in range(1, 2000):
+        map_id = rng.randrange(200)
+        pp = round(rng.uniform(0, 500), 1)  # (make some ties)
+        acc = round(rng.uniform(80, 100), 3)
+
+        prev_best = best_scores.get(map_id)
+        if prev_best is not None and pp <= prev_best[1]:
+            continue  # not a new best
+
+        best_scores[map_id] = (score_id, pp, acc)
+        if not top_scores.replace(
+            score_id,
+            pp,
+            acc,
+            prev_best_id=prev_best[0] if prev_best is not None else None,
+        ):
+            # fetched again, from "sql".
+            top_scores = TopScores(
+                sort_by_pp(best_scores)[:50],
+                count=len(best_scores),
+                limit=50,
+            )
+            reloads += 1
+
+        assert top_scores.complete
+        assert top_scores.count == len(best_scores)
+
+        acc, pp = top_scores.stats
+        expected_acc, expected_pp = recalculate(best_scores, limit=50)
+        assert pp == expected_pp
+        assert abs(acc - expected_acc) < 1e-6
+
+    assert 0 < reloads < 100
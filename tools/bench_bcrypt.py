@@ -0,0 +1,125 @@
+#!/usr/bin/env python3.11
+"""bench_bcrypt.py - load test bcrypt's effect on the event loop during logins.
+
+Simulates a reconnect storm (e.g. after a restart, with an empty bcrypt
+cache), where many players log in at once & each login must check its
+password with bcrypt. A ticker task measures how late the event loop
+wakes it up; any lag here is also felt by every other cho request.
+
+Logins are either checked inline (as before), or by `BcryptPool`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Sequence
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import bcrypt
+
+    import app.settings
+    from app.state.services import BcryptPool
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+TICK_INTERVAL = 0.01  # seconds
+
+
+async def measure_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    """Record how late each tick of the event loop is, until `stop`."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(time.perf_counter() - start - TICK_INTERVAL)
+
+
+async def login_storm(
+    check: Callable[[bytes, bytes], Awaitable[bool]],
+    credentials: Sequence[tuple[bytes, bytes]],
+) -> tuple[float, list[float]]:
+    """Log in all `credentials` at once; return the time taken & loop lags."""
+    stop = asyncio.Event()
+    lags: list[float] = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(0)  # let the ticker start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(check(pw_md5, pw_bcrypt) for pw_md5, pw_bcrypt in credentials),
+    )
+    elapsed = time.perf_counter() - start
+    assert all(results)
+
+    stop.set()
+    await ticker
+
+    return elapsed, lags
+
+
+def print_results(name: str, elapsed: float, lags: Sequence[float]) -> None:
+    lags_ms = sorted(lag * 1e3 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"  {name:<10} {elapsed:>8.2f}s total"
+        f"  loop lag: median {statistics.median(lags_ms):>8.2f}ms"
+        f"  p99 {p99:>8.2f}ms  max {lags_ms[-1]:>8.2f}ms",
+    )
+
+
+async def run(logins: int, rounds: int, max_workers: int) -> None:
+    print(f"generating {logins} bcrypt hashes ({rounds} rounds)...")
+    credentials = []
+    for i in range(logins):
+        pw_md5 = f"{i:032x}".encode()
+        credentials.append((pw_md5, bcrypt.hashpw(pw_md5, bcrypt.gensalt(rounds))))
+
+    print(f"{logins} simultaneous logins:")
+
+    async def check_inline(pw_md5: bytes, pw_bcrypt: bytes) -> bool:
+        await asyncio.sleep(0)  # each login is its own request
+        return bcrypt.checkpw(pw_md5, pw_bcrypt)
+
+    print_results("inline", *await login_storm(check_inline, credentials))
+
+    pool = BcryptPool(max_workers)
+    try:
+        print_results(
+            f"pool ({max_workers})",
+            *await login_storm(pool.checkpw, credentials),
+        )
+    finally:
+        pool.shutdown()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Load test bcrypt's effect on the event loop during logins",
+    )
+    parser.add_argument("-n", "--logins", type=int, default=100)
+    parser.add_argument("-r", "--rounds", type=int, default=12)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=app.settings.BCRYPT_MAX_WORKERS,
+    )
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args.logins, args.rounds, args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3.11
+"""bench_packets.py - microbenchmarks for bancho.py's packet (de)serialization.
+
+Each benchmark compares the current implementation in `app.packets`
+against a copy of the implementation it replaced, over a workload
+resembling the traffic seen during spectator & multiplayer bursts.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import sys
+import timeit
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from typing import Any
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import app.packets
+    from app.packets import BanchoPacketReader
+    from app.packets import BasePacket
+    from app.packets import ClientPackets
+    from app.packets import osuTypes
+    from app.packets import ServerPackets
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+
+class LegacyBanchoPacketReader:
+    """The previous reader, which re-sliced `body_view` for every field."""
+
+    def __init__(self, body_view: memoryview, packet_map: Any) -> None:
+        self.body_view = body_view
+        self.packet_map = packet_map
+        self.current_len = 0
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        while self.body_view:
+            p_type, p_len = self._read_header()
+
+            if p_type not in self.packet_map:
+                if p_len != 0:
+                    self.body_view = self.body_view[p_len:]
+            else:
+                break
+        else:
+            raise StopIteration
+
+        packet_cls = self.packet_map[p_type]
+        self.current_len = p_len
+
+        return packet_cls(self)
+
+    def _read_header(self) -> tuple[ClientPackets, int]:
+        data = struct.unpack("<HxI", self.body_view[:7])
+        self.body_view = self.body_view[7:]
+        return ClientPackets(data[0]), data[1]
+
+    def read_u8(self) -> int:
+        val = self.body_view[0]
+        self.body_view = self.body_view[1:]
+        return val
+
+    def read_u16(self) -> int:
+        val = int.from_bytes(self.body_view[:2], "little", signed=False)
+        self.body_view = self.body_view[2:]
+        return val
+
+    def read_i32(self) -> int:
+        val = int.from_bytes(self.body_view[:4], "little", signed=True)
+        self.body_view = self.body_view[4:]
+        return val
+
+    def read_u32(self) -> int:
+        val = int.from_bytes(self.body_view[:4], "little", signed=False)
+        self.body_view = self.body_view[4:]
+        return val
+
+    def read_f32(self) -> float:
+        (val,) = struct.unpack_from("<f", self.body_view[:4])
+        self.body_view = self.body_view[4:]
+        return float(val)
+
+    def read_f64(self) -> float:
+        (val,) = struct.unpack_from("<d", self.body_view[:8])
+        self.body_view = self.body_view[8:]
+        return float(val)
+
+    def read_i32_list_i16l(self) -> tuple[int, ...]:
+        length = int.from_bytes(self.body_view[:2], "little")
+        self.body_view = self.body_view[2:]
+
+        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
+        self.body_view = self.body_view[length * 4 :]
+        return val
+
+    def read_string(self) -> str:
+        exists = self.body_view[0] == 0x0B
+        self.body_view = self.body_view[1:]
+
+        if not exists:
+            return ""
+
+        length = shift = 0
+
+        while True:
+            byte = self.body_view[0]
+            self.body_view = self.body_view[1:]
+
+            length |= (byte & 0x7F) << shift
+            if (byte & 0x80) == 0:
+                break
+
+            shift += 7
+
+        val = self.body_view[:length].tobytes().decode()
+        self.body_view = self.body_view[length:]
+        return val
+
+    def read_message(self) -> app.packets.Message:
+        return app.packets.Message(
+            sender=self.read_string(),
+            text=self.read_string(),
+            recipient=self.read_string(),
+            sender_id=self.read_i32(),
+        )
+
+    def read_scoreframe(self) -> app.packets.ScoreFrame:
+        sf = app.packets.ScoreFrame(
+            *app.packets.SCOREFRAME_FMT.unpack_from(self.body_view[:29]),
+        )
+        self.body_view = self.body_view[29:]
+
+        if sf.score_v2:
+            sf.combo_portion = self.read_f64()
+            sf.bonus_portion = self.read_f64()
+
+        return sf
+
+    def read_replayframe(self) -> app.packets.ReplayFrame:
+        return app.packets.ReplayFrame(
+            button_state=self.read_u8(),
+            taiko_byte=self.read_u8(),
+            x=self.read_f32(),
+            y=self.read_f32(),
+            time=self.read_i32(),
+        )
+
+    def read_replayframe_bundle(self) -> app.packets.ReplayFrameBundle:
+        raw_data = self.body_view[: self.current_len]
+
+        extra = self.read_i32()
+        framecount = self.read_u16()
+        frames = [self.read_replayframe() for _ in range(framecount)]
+        action = app.packets.ReplayAction(self.read_u8())
+        scoreframe = self.read_scoreframe()
+        sequence = self.read_u16()
+
+        return app.packets.ReplayFrameBundle(
+            frames,
+            scoreframe,
+            action,
+            extra,
+            sequence,
+            raw_data,
+        )
+
+
+def legacy_write_string(s: str) -> bytes:
+    if s:
+        encoded = s.encode()
+        return b"\x0b" + app.packets.write_uleb128(len(encoded)) + encoded
+    else:
+        return b"\x00"
+
+
+def legacy_write_i32_list(l: Sequence[int]) -> bytearray:
+    ret = bytearray(len(l).to_bytes(2, "little"))
+
+    for i in l:
+        ret += i.to_bytes(4, "little", signed=True)
+
+    return ret
+
+
+_LEGACY_WRITERS: dict[osuTypes, Callable[[Any], bytes | bytearray]] = {
+    osuTypes.u8: struct.Struct("<B").pack,
+    osuTypes.i16: struct.Struct("<h").pack,
+    osuTypes.u16: struct.Struct("<H").pack,
+    osuTypes.i32: struct.Struct("<i").pack,
+    osuTypes.f32: struct.Struct("<f").pack,
+    osuTypes.i64: struct.Struct("<q").pack,
+    osuTypes.string: legacy_write_string,
+    osuTypes.i32_list: legacy_write_i32_list,
+}
+
+
+def legacy_write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
+    """The previous generic writer, which inserted the length afterwards."""
+    ret = bytearray(struct.pack("<Hx", packid))
+
+    for p_args, p_type in args:
+        ret += _LEGACY_WRITERS[p_type](p_args)
+
+    ret[3:3] = struct.pack("<I", len(ret) - 3)
+    return bytes(ret)
+
+
+def legacy_user_stats(*args: Any) -> bytes:
+    return legacy_write(
+        ServerPackets.USER_STATS,
+        *zip(
+            args,
+            (
+                osuTypes.i32,
+                osuTypes.u8,
+                osuTypes.string,
+                osuTypes.string,
+                osuTypes.i32,
+                osuTypes.u8,
+                osuTypes.i32,
+                osuTypes.i64,
+                osuTypes.f32,
+                osuTypes.i32,
+                osuTypes.i64,
+                osuTypes.i32,
+                osuTypes.i16,
+            ),
+        ),
+    )
+
+
+def legacy_send_message(
+    sender: str,
+    msg: str,
+    recipient: str,
+    sender_id: int,
+) -> bytes:
+    return legacy_write(
+        ServerPackets.SEND_MESSAGE,
+        (sender, osuTypes.string),
+        (msg, osuTypes.string),
+        (recipient, osuTypes.string),
+        (sender_id, osuTypes.i32),
+    )
+
+
+def legacy_user_presence(*args: Any) -> bytes:
+    return legacy_write(
+        ServerPackets.USER_PRESENCE,
+        *zip(
+            args,
+            (
+                osuTypes.i32,
+                osuTypes.string,
+                osuTypes.u8,
+                osuTypes.u8,
+                osuTypes.u8,
+                osuTypes.f32,
+                osuTypes.f32,
+                osuTypes.i32,
+            ),
+        ),
+    )
+
+
+def legacy_friends_list(friends: Sequence[int]) -> bytes:
+    return legacy_write(ServerPackets.FRIENDS_LIST, (friends, osuTypes.i32_list))
+
+
+""" client packets resembling real traffic """
+
+
+class _ChangeAction(BasePacket):
+    def __init__(self, reader: Any) -> None:
+        self.action = reader.read_u8()
+        self.info_text = reader.read_string()
+        self.map_md5 = reader.read_string()
+        self.mods = reader.read_u32()
+        self.mode = reader.read_u8()
+        self.map_id = reader.read_i32()
+
+    async def handle(self, player: Any) -> None:
+        ...
+
+
+class _SendMessage(BasePacket):
+    def __init__(self, reader: Any) -> None:
+        self.msg = reader.read_message()
+
+    async def handle(self, player: Any) -> None:
+        ...
+
+
+class _SpectateFrames(BasePacket):
+    def __init__(self, reader: Any) -> None:
+        self.frame_bundle = reader.read_replayframe_bundle()
+
+    async def handle(self, player: Any) -> None:
+        ...
+
+
+class _StatsRequest(BasePacket):
+    def __init__(self, reader: Any) -> None:
+        self.user_ids = reader.read_i32_list_i16l()
+
+    async def handle(self, player: Any) -> None:
+        ...
+
+
+PACKET_MAP: dict[ClientPackets, type[BasePacket]] = {
+    ClientPackets.CHANGE_ACTION: _ChangeAction,
+    ClientPackets.SEND_PUBLIC_MESSAGE: _SendMessage,
+    ClientPackets.SPECTATE_FRAMES: _SpectateFrames,
+    ClientPackets.USER_STATS_REQUEST: _StatsRequest,
+}
+PACKET_TABLE = app.packets.compile_packet_table(PACKET_MAP)
+
+
+def client_packet(packet_id: ClientPackets, data: bytes) -> bytes:
+    return struct.pack("<HxI", packet_id, len(data)) + data
+
+
+def make_spectator_body(frames_per_bundle: int = 30) -> bytes:
+    """A request body from a client being spectated."""
+    frame_data = struct.pack("<BBffi", 1, 0, 256.0, 192.0, 16) * frames_per_bundle
+    scoreframe = app.packets.write_scoreframe(
+        app.packets.ScoreFrame(
+            time=38242,
+            id=28,
+            num300=320,
+            num100=48,
+            num50=2,
+            num_geki=32,
+            num_katu=8,
+            num_miss=3,
+            total_score=492_392,
+            current_combo=39,
+            max_combo=122,
+            perfect=False,
+            current_hp=245,
+            tag_byte=0,
+            score_v2=False,
+        ),
+    )
+    bundle = (
+        struct.pack("<iH", 0, frames_per_bundle)
+        + frame_data
+        + b"\x00"
+        + scoreframe
+        + struct.pack("<H", 7)
+    )
+
+    return (
+        client_packet(ClientPackets.PING, b"")
+        + client_packet(
+            ClientPackets.SPECTATE_FRAMES,
+            bundle,
+        )
+        * 4
+    )
+
+
+def make_multiplayer_body() -> bytes:
+    """A request body from a client in a busy multiplayer lobby."""
+    change_action = (
+        b"\x02"
+        + app.packets.write_string("Camellia - Exit This Earth's Atomosphere")
+        + app.packets.write_string("60b725f10c9c85c70d97880dfe8191b3")
+        + struct.pack("<IBi", 64, 0, 1723723)
+    )
+    message = app.packets.write_message("", "gl hf everyone!", "#multiplayer", 0)
+    stats_request = struct.pack("<H16I", 16, *range(1000, 1016))
+
+    return (
+        client_packet(ClientPackets.CHANGE_ACTION, change_action)
+        + client_packet(ClientPackets.SEND_PUBLIC_MESSAGE, message) * 3
+        + client_packet(ClientPackets.USER_STATS_REQUEST, stats_request)
+        + client_packet(ClientPackets.PING, b"")
+    )
+
+
+def read_all(
+    reader_cls: Callable[..., Iterator[Any]],
+    body: bytes,
+    packets: Any,
+) -> None:
+    with memoryview(body) as body_view:
+        for _ in reader_cls(body_view, packets):
+            pass
+
+
+def bench(name: str, func: Callable[[], object], number: int) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_us = best / number * 1e6
+    print(f"  {name:<10} {per_call_us:>10.2f}us / call")
+    return per_call_us
+
+
+def bench_reader(number: int) -> None:
+    for workload, body in (
+        ("spectator", make_spectator_body()),
+        ("multiplayer", make_multiplayer_body()),
+    ):
+        print(f"{workload} ({len(body)} bytes):")
+        legacy = bench(
+            "legacy",
+            lambda: read_all(LegacyBanchoPacketReader, body, PACKET_MAP),
+            number,
+        )
+        current = bench(
+            "current",
+            lambda: read_all(BanchoPacketReader, body, PACKET_TABLE),
+            number,
+        )
+        print(f"  speedup    {legacy / current:>10.2f}x")
+
+
+# spectated clients send their input at roughly 60 frames per second,
+# flushed into bundles of varying size depending on the client's state.
+SPECTATOR_FRAME_RATE = 60
+SPECTATOR_BUNDLE_SIZES = (1, 10, 30, 60)
+SPECTATOR_COUNT = 8
+
+
+def forward_frames(
+    body: bytes,
+    read_bundle: Callable[[BanchoPacketReader], Any],
+    spectators: Sequence[list[bytes]],
+) -> None:
+    """Read spectator frame bundles from `body` & forward them to `spectators`."""
+    with memoryview(body) as body_view:
+        reader = BanchoPacketReader(body_view, [])
+
+        while reader.offset < len(body_view):
+            p_type, reader.current_len = reader._read_header()
+            if p_type != ClientPackets.SPECTATE_FRAMES:
+                reader.offset += reader.current_len
+                continue
+
+            bundle = read_bundle(reader)
+
+            data = struct.pack("<HxI", 15, len(bundle.raw_data)) + bundle.raw_data
+            for spectator in spectators:
+                spectator.append(data)
+
+    for spectator in spectators:
+        spectator.clear()
+
+
+def bench_spectator(number: int) -> None:
+    spectators: list[list[bytes]] = [[] for _ in range(SPECTATOR_COUNT)]
+
+    for frames_per_bundle in SPECTATOR_BUNDLE_SIZES:
+        body = make_spectator_body(frames_per_bundle)
+        bundles_per_sec = SPECTATOR_FRAME_RATE / frames_per_bundle
+
+        print(
+            f"{frames_per_bundle} frames / bundle ({len(body)} bytes, "
+            f"{bundles_per_sec:.1f} bundles / sec, {SPECTATOR_COUNT} spectators):",
+        )
+        legacy = bench(
+            "legacy",
+            lambda: forward_frames(
+                body,
+                BanchoPacketReader.read_replayframe_bundle,
+                spectators,
+            ),
+            number,
+        )
+        current = bench(
+            "current",
+            lambda: forward_frames(
+                body,
+                BanchoPacketReader.read_raw_replayframe_bundle,
+                spectators,
+            ),
+            number,
+        )
+        # each body holds 4 bundles (see make_spectator_body).
+        print(
+            f"  per streaming player: {legacy / 4 * bundles_per_sec:.1f}us / sec"
+            f" -> {current / 4 * bundles_per_sec:.1f}us / sec",
+        )
+        print(f"  speedup    {legacy / current:>10.2f}x")
+
+
+# (name, legacy encoder, current encoder, args), with arguments
+# already in wire order so both encoders receive the same values.
+WRITER_WORKLOADS: list[
+    tuple[str, Callable[..., bytes], Callable[..., bytes], tuple[Any, ...]]
+] = [
+    (
+        "user_stats",
+        legacy_user_stats,
+        app.packets._USER_STATS,
+        (
+            1001,
+            2,
+            "Camellia - Exit This Earth's Atomosphere [Evolution]",
+            "60b725f10c9c85c70d97880dfe8191b3",
+            64,
+            0,
+            1723723,
+            2_394_859_234,
+            0.9823,
+            4_819,
+            9_238_482_394,
+            192,
+            8_421,
+        ),
+    ),
+    (
+        "send_message",
+        legacy_send_message,
+        app.packets.send_message,
+        ("cmyui", "gl hf everyone!", "#multiplayer", 1001),
+    ),
+    (
+        "user_presence",
+        legacy_user_presence,
+        app.packets._USER_PRESENCE,
+        (1001, "cmyui", 19, 38, 31, -79.38, 43.65, 192),
+    ),
+    (
+        "friends_list",
+        legacy_friends_list,
+        app.packets.friends_list,
+        (list(range(1000, 1064)),),
+    ),
+]
+
+
+def bench_writer(number: int) -> None:
+    for workload, legacy_func, current_func, args in WRITER_WORKLOADS:
+        packet = current_func(*args)
+        assert packet == legacy_func(*args), f"{workload} output differs"
+
+        print(f"{workload} ({len(packet)} bytes, identical output):")
+        legacy = bench("legacy", lambda: legacy_func(*args), number)
+        current = bench("current", lambda: current_func(*args), number)
+        print(f"  speedup    {legacy / current:>10.2f}x")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark bancho.py's packet (de)serialization",
+    )
+    parser.add_argument(
+        "benchmark",
+        choices=["reader", "writer", "spectator"],
+        nargs=argparse.OPTIONAL,
+        help="run a single benchmark (default: all)",
+    )
+    parser.add_argument("-n", "--number", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    if args.benchmark in (None, "reader"):
+        bench_reader(args.number)
+
+    if args.benchmark in (None, "writer"):
+        bench_writer(args.number)
+
+    if args.benchmark in (None, "spectator"):
+        bench_spectator(args.number)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
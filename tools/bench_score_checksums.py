@@ -0,0 +1,201 @@
+#!/usr/bin/env python3.11
+"""bench_score_checksums.py - benchmark duplicate score checks in mysql.
+
+Fills a scratch table (like `scores`, but only ids & checksums) in the
+configured database with random checksums, then times checking new
+(non-duplicate) checksums against it: by sql without an index on the
+checksums, by sql with the index (v4.8.3), & by the bloom filter used to
+skip sql for checksums which are definitely new.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Sequence
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import app.state.services
+    from app.objects.bloom_filter import BloomFilter
+    from app.usecases.score_checksums import FILTER_ERROR_RATE
+    from app.usecases.score_checksums import FILTER_WARM_BATCH_SIZE
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+TABLE = "bench_score_checksums"
+
+
+async def fill_table(rows: int) -> None:
+    database = app.state.services.database
+
+    await database.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    await database.execute(
+        f"CREATE TABLE {TABLE} ("
+        "id bigint unsigned auto_increment primary key, "
+        "online_checksum char(32) not null)",
+    )
+
+    # double the table with new checksums until it's full.
+    await database.execute(
+        f"INSERT INTO {TABLE} (online_checksum) VALUES (MD5(RAND()))",
+    )
+    count = 1
+    while count < rows:
+        await database.execute(
+            f"INSERT INTO {TABLE} (online_checksum) "
+            f"SELECT MD5(RAND()) FROM {TABLE} LIMIT {min(count, rows - count)}",
+        )
+        count += min(count, rows - count)
+        print(f"  filled {count:,}/{rows:,} rows")
+
+
+async def time_checks(
+    name: str,
+    check: Callable[[str], Awaitable[bool]],
+    checksums: Sequence[str],
+) -> float:
+    timings = []
+    for checksum in checksums:
+        started_at = time.perf_counter()
+        assert not await check(checksum)
+        timings.append(time.perf_counter() - started_at)
+
+    mean = statistics.mean(timings)
+    p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else mean
+    print(
+        f"  {name:<14} {mean * 1e3:>10.3f}ms mean {p99 * 1e3:>10.3f}ms p99"
+        f" ({len(checksums)} checks)",
+    )
+    return mean
+
+
+async def sql_check(checksum: str) -> bool:
+    return (
+        await app.state.services.database.fetch_val(
+            f"SELECT 1 FROM {TABLE} WHERE online_checksum = :checksum",
+            {"checksum": checksum},
+        )
+        is not None
+    )
+
+
+async def warm_filter(rows: int) -> BloomFilter:
+    """Build a filter from the table, as `score_checksums.warm_filter` does."""
+    bloom = BloomFilter(capacity=rows * 2, error_rate=FILTER_ERROR_RATE)
+
+    last_id = 0
+    while True:
+        batch = await app.state.services.database.fetch_all(
+            f"SELECT id, online_checksum FROM {TABLE} "
+            "WHERE id > :last_id ORDER BY id LIMIT :batch_size",
+            {"last_id": last_id, "batch_size": FILTER_WARM_BATCH_SIZE},
+        )
+        if not batch:
+            break
+
+        for row in batch:
+            bloom.add(row["online_checksum"])
+
+        last_id = batch[-1]["id"]
+
+    bloom.complete = True
+    return bloom
+
+
+async def bench(rows: int, checks: int, unindexed_checks: int, keep: bool) -> None:
+    database = app.state.services.database
+
+    if keep and await database.fetch_val(f"SHOW TABLES LIKE '{TABLE}'"):
+        rows = await database.fetch_val(f"SELECT COUNT(*) FROM {TABLE}")
+        print(f"Reusing {TABLE} ({rows:,} rows).")
+        if await database.fetch_val(
+            f"SHOW INDEX FROM {TABLE} WHERE Key_name = 'checksum'",
+        ):
+            await database.execute(f"DROP INDEX checksum ON {TABLE}")
+    else:
+        print(f"Filling {TABLE} ({rows:,} rows):")
+        await fill_table(rows)
+
+    # new checksums, like most submissions.
+    checksums = [uuid.uuid4().hex for _ in range(checks)]
+
+    print(f"{rows:,} scores, checking new checksums:")
+    unindexed = await time_checks(
+        "sql (no index)",
+        sql_check,
+        checksums[:unindexed_checks],
+    )
+
+    started_at = time.perf_counter()
+    await database.execute(f"CREATE INDEX checksum ON {TABLE} (online_checksum)")
+    print(f"  (indexed in {time.perf_counter() - started_at:.2f}s)")
+
+    indexed = await time_checks("sql (index)", sql_check, checksums)
+
+    started_at = time.perf_counter()
+    bloom = await warm_filter(rows)
+    print(
+        f"  (warmed {bloom} in {time.perf_counter() - started_at:.2f}s; "
+        f"{bloom.stats()['bytes'] / 1024**2:.1f}MiB)",
+    )
+
+    async def filtered_check(checksum: str) -> bool:
+        if checksum not in bloom:
+            return False
+        return await sql_check(checksum)
+
+    filtered = await time_checks("bloom + sql", filtered_check, checksums)
+    false_positives = sum(checksum in bloom for checksum in checksums)
+    print(f"  ({false_positives} false positives checked in sql)")
+
+    print(f"  speedup (index)  {unindexed / indexed:>10.2f}x")
+    print(f"  speedup (bloom)  {indexed / filtered:>10.2f}x")
+
+    if not keep:
+        await database.execute(f"DROP TABLE {TABLE}")
+
+
+async def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark duplicate score checks against the database",
+    )
+    parser.add_argument("-r", "--rows", type=int, default=10_000_000)
+    parser.add_argument("-n", "--checks", type=int, default=1_000)
+    parser.add_argument(
+        "--unindexed-checks",
+        type=int,
+        default=5,
+        help="checks without the index (each scans the table)",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help=f"keep (& reuse) the {TABLE} table between runs",
+    )
+    args = parser.parse_args(argv)
+
+    await app.state.services.database.connect()
+
+    try:
+        await bench(args.rows, args.checks, args.unindexed_checks, args.keep)
+    finally:
+        await app.state.services.http_client.aclose()
+        await app.state.services.database.disconnect()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3.11
+"""bench_sessions.py - microbenchmarks for bancho.py's online sessions.
+
+Each benchmark compares the current implementation (lookups in
+`app.objects.collections`, player packet queues) with a copy of
+the implementation it replaced, for increasing numbers of sessions.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from collections.abc import Sequence
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import app.packets
+    from app.constants.privileges import Privileges
+    from app.objects.collections import Players
+    import app.objects.player
+    from app.objects.player import Player
+    from app.utils import make_safe_name
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+SESSION_COUNTS = (100, 1_000, 5_000, 20_000)
+
+
+def legacy_get(
+    players: Sequence[Player],
+    token: str | None = None,
+    id: int | None = None,
+    name: str | None = None,
+) -> Player | None:
+    """The previous `Players.get`, which scanned the list."""
+    for player in players:
+        if token is not None:
+            if player.token == token:
+                return player
+        elif id is not None:
+            if player.id == id:
+                return player
+        elif name is not None:
+            if player.safe_name == make_safe_name(name):
+                return player
+
+    return None
+
+
+class LegacyPacketQueue:
+    """The previous player packet queue, which copied data into a bytearray."""
+
+    def __init__(self) -> None:
+        self._queue = bytearray()
+
+    def enqueue(self, data: bytes) -> None:
+        self._queue += data
+
+    def dequeue(self) -> bytes | None:
+        if self._queue:
+            data = bytes(self._queue)
+            self._queue.clear()
+            return data
+
+        return None
+
+
+def make_players(count: int) -> Players:
+    players = Players()
+
+    for user_id in range(3, count + 3):
+        players.append(
+            Player(
+                id=user_id,
+                name=f"Player {user_id}",
+                priv=Privileges.UNRESTRICTED | Privileges.VERIFIED,
+            ),
+        )
+
+    return players
+
+
+def bench(name: str, func: Callable[[], object], number: int) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_us = best / number * 1e6
+    print(f"  {name:<10} {per_call_us:>10.2f}us / call")
+    return per_call_us
+
+
+def bench_players(number: int) -> None:
+    rng = random.Random(0)
+
+    for count in SESSION_COUNTS:
+        players = make_players(count)
+        # sample targets across the whole list, since
+        # the legacy lookup gets slower further along it.
+        targets = rng.choices(players, k=64)
+
+        for key in ("token", "id", "name"):
+            lookups = [{key: getattr(p, key)} for p in targets]
+
+            for kwargs in lookups:
+                assert players.get(**kwargs) is legacy_get(players, **kwargs)
+
+            print(f"{count} sessions, by {key} ({len(lookups)} lookups):")
+            # the legacy scan gets too slow to repeat many times.
+            legacy_number = max(1, number * 100 // count)
+            legacy = bench(
+                "legacy",
+                lambda: [legacy_get(players, **kwargs) for kwargs in lookups],
+                legacy_number,
+            )
+            current = bench(
+                "current",
+                lambda: [players.get(**kwargs) for kwargs in lookups],
+                number,
+            )
+            print(f"  speedup    {legacy / current:>10.2f}x")
+
+
+def make_broadcasts(players: Sequence[Player]) -> list[bytes]:
+    """Packets broadcast to all players while a client is afk for a while."""
+    broadcasts: list[bytes] = []
+
+    for player in players[:200]:
+        broadcasts.append(player.stats_packet)
+        broadcasts.append(
+            app.packets.send_message(player.name, "hello!", "#osu", player.id),
+        )
+
+    return broadcasts
+
+
+def broadcast(
+    queues: Sequence[LegacyPacketQueue | Player],
+    broadcasts: Sequence[bytes],
+) -> None:
+    for data in broadcasts:
+        for queue in queues:
+            queue.enqueue(data)
+
+
+def measure_queue_memory(
+    queues: Sequence[LegacyPacketQueue | Player],
+    broadcasts: Sequence[bytes],
+) -> float:
+    """Return the memory held by each of `queues` after `broadcasts`."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    broadcast(queues, broadcasts)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for queue in queues:
+        queue.dequeue()
+
+    return (after - before) / len(queues)
+
+
+def bench_queues_time(
+    queues: Sequence[LegacyPacketQueue | Player],
+    broadcasts: Sequence[bytes],
+) -> float:
+    """Return the time taken to broadcast `broadcasts` & dequeue them."""
+
+    def func() -> None:
+        broadcast(queues, broadcasts)
+        for queue in queues:
+            queue.dequeue()
+
+    return min(timeit.repeat(func, number=1, repeat=3))
+
+
+def bench_queues(number: int) -> None:
+    for count in SESSION_COUNTS[:-1]:
+        players = make_players(count)
+        for player in players:
+            player.stats[player.status.mode] = app.objects.player.ModeData(
+                tscore=0,
+                rscore=0,
+                pp=0,
+                acc=0.0,
+                plays=0,
+                playtime=0,
+                max_combo=0,
+                total_hits=0,
+                rank=0,
+                grades={},
+            )
+
+        broadcasts = make_broadcasts(players)
+        size = sum(map(len, broadcasts))
+
+        print(f"{count} sessions, {len(broadcasts)} broadcasts ({size} bytes):")
+        queues_by_name: list[tuple[str, Sequence[LegacyPacketQueue | Player]]] = [
+            ("legacy", [LegacyPacketQueue() for _ in players]),
+            ("current", list(players)),
+        ]
+        for name, queues in queues_by_name:
+            memory = measure_queue_memory(queues, broadcasts)
+            elapsed = bench_queues_time(queues, broadcasts)
+            print(
+                f"  {name:<10} {memory / 1024:>10.2f}KiB / player"
+                f" {elapsed * 1e3:>10.2f}ms",
+            )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark bancho.py's session collection lookups",
+    )
+    parser.add_argument(
+        "benchmark",
+        choices=["players", "queues"],
+        nargs=argparse.OPTIONAL,
+        help="run a single benchmark (default: all)",
+    )
+    parser.add_argument("-n", "--number", type=int, default=1_000)
+    args = parser.parse_args(argv)
+
+    if args.benchmark in (None, "players"):
+        bench_players(args.number)
+
+    if args.benchmark in (None, "queues"):
+        bench_queues(args.number)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
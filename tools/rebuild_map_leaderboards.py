@@ -0,0 +1,84 @@
+#!/usr/bin/env python3.11
+"""rebuild_map_leaderboards.py - rebuild maps' leaderboards in redis from sql.
+
+Maps' leaderboards (used to rank scores on submission & personal bests
+on leaderboards) are kept in sync by the server, & populated from sql when
+first needed; this should be run after changing scores in sql directly
+(e.g. after recalculating pp with recalc.py).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+from collections.abc import Sequence
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import app.state.services
+    import app.usecases.map_leaderboards
+    from app.usecases.map_leaderboards import MAP_LEADERBOARD_KEY_PREFIX
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+
+async def rebuild(map_md5s: Sequence[str]) -> None:
+    database = app.state.services.database
+    redis = app.state.services.redis
+
+    if map_md5s:
+        await app.usecases.map_leaderboards.wipe(map_md5s)
+        rows = await database.fetch_all(
+            "SELECT DISTINCT map_md5, mode FROM scores "
+            "WHERE status = 2 AND map_md5 IN :map_md5s",
+            {"map_md5s": map_md5s},
+        )
+    else:
+        # remove all leaderboards, including those of maps without scores.
+        async for key in redis.scan_iter(f"{MAP_LEADERBOARD_KEY_PREFIX}:*"):
+            await redis.delete(key)
+
+        rows = await database.fetch_all(
+            "SELECT DISTINCT map_md5, mode FROM scores WHERE status = 2",
+        )
+
+    for i, row in enumerate(rows, start=1):
+        await app.usecases.map_leaderboards.populate(row["map_md5"], row["mode"])
+
+        if i % 1000 == 0 or i == len(rows):
+            print(f"rebuilt {i}/{len(rows)} leaderboards")
+
+
+async def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild maps' leaderboards in redis from sql",
+    )
+    parser.add_argument(
+        "map_md5s",
+        nargs=argparse.ZERO_OR_MORE,
+        metavar="map_md5",
+        help="rebuild specific maps' leaderboards (default: all)",
+    )
+    args = parser.parse_args(argv)
+
+    await app.state.services.database.connect()
+    await app.state.services.redis.initialize()
+
+    try:
+        await rebuild(args.map_md5s)
+    finally:
+        await app.state.services.http_client.aclose()
+        await app.state.services.database.disconnect()
+        await app.state.services.redis.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))